@@ -1,9 +1,11 @@
 # api/dependencies.py
 
+import os
 from pathlib import Path
 
 from app.registry.tool_registry import ToolRegistry
 from app.routing.intelligent_router import IntelligentRouter
+from app.routing.confidence_predictor import get_confidence_predictor
 from app.services.planning_agent_service import PlanningAgentService
 
 from app.services.embedding_service import EmbeddingService
@@ -17,7 +19,8 @@ from app.infra.retry_policy import RetryPolicy
 from app.infra.timeout_executor import TimeoutExecutor
 from app.infra.reliable_executor import ReliableExecutor
 from app.infra.logger import StructuredLogger
-from app.config.runtime import web_search_available
+from app.cache.tool_cache import get_tool_cache
+from app.config.runtime import env_flag, web_search_available
 
 
 BACKEND_ROOT = Path(__file__).resolve().parents[1]
@@ -36,7 +39,9 @@ def build_agent():
     timeout_executor = TimeoutExecutor(timeout_seconds=10)
     reliable_executor = ReliableExecutor(
         retry_policy=retry_policy,
-        timeout_executor=timeout_executor
+        timeout_executor=timeout_executor,
+        step_budget_seconds=float(os.getenv("TOOL_STEP_BUDGET_SECONDS", "15")),
+        hedging=env_flag("TOOL_HEDGING_ENABLED", False),
     )
 
     # ------------------------
@@ -71,7 +76,11 @@ def build_agent():
         registry=registry,
         reliable_executor=reliable_executor,
         logger=logger,
-        similarity_threshold=0.50
+        similarity_threshold=0.50,
+        tool_cache=get_tool_cache(),
+        hedge_with_fallback=env_flag("TOOL_HEDGE_WITH_FALLBACK", False),
+        speculative_fallback=env_flag("ROUTER_SPECULATIVE_FALLBACK", False),
+        confidence_predictor=get_confidence_predictor(),
     )
 
     # ------------------------
@@ -3,6 +3,12 @@ from api.schemas import AgentRequest, AgentResponse
 from api.dependencies import build_agent
 from app.infra.validators import InputValidator
 from app.api.auth import require_role
+from app.api.platform import admit_runs, quota_subject, rate_limited
+from app.config.runtime import run_timeout_seconds
+from app.infra.deadline import Deadline, use_deadline
+from app.infra.rate_limits import RateLimitExceeded, use_quota_subject
+from app.infra.stats_counters import record_run_transition
+from app.memory.database import MongoDB
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
@@ -18,9 +24,12 @@ def get_agent():
 @router.post("/run", response_model=AgentResponse)
 async def run_agent(
     request: AgentRequest,
-    _: dict = Depends(require_role("developer", "admin")),
+    user: dict = Depends(require_role("developer", "admin")),
     agent = Depends(get_agent)
 ):
+    subject = quota_subject(user, request.agent_id)
+    await admit_runs(subject)
+
     try:
         # Input validation
         try:
@@ -28,11 +37,19 @@ async def run_agent(
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-        execution_output = await agent.run_goal(
-            request.session_id,
-            validated_goal,
-            agent_id=request.agent_id,
-        )
+        use_quota_subject(subject)
+        run_timeout = run_timeout_seconds()
+        use_deadline(Deadline.after(run_timeout) if run_timeout else None)
+        try:
+            execution_output = await agent.run_goal(
+                request.session_id,
+                validated_goal,
+                agent_id=request.agent_id,
+            )
+        except Exception:
+            await record_run_transition(MongoDB.get_database(), None, "failed")
+            raise
+        await record_run_transition(MongoDB.get_database(), None, execution_output.get("status") or "completed")
 
         return AgentResponse(
             result=execution_output["result"],
@@ -42,5 +59,8 @@ async def run_agent(
 
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        # LLM token / tool call budget ran out mid-run.
+        raise rate_limited(e) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
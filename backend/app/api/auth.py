@@ -618,6 +618,7 @@ import json
 import os
 import random
 import smtplib
+import time
 from datetime import datetime, timedelta, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -636,7 +637,11 @@ from app.config.runtime import (
     dev_email_otp_echo_enabled,
 )
 from app.config.settings import settings
+from app.infra.bounded_executor import ExecutorSaturatedError, get_bounded_executor
+from app.infra.logger import AUTH_LOGIN_LATENCY
+from app.infra.stats_counters import get_stats, rebuild_counters, record_user_transition
 from app.memory.database import MongoDB
+from app.security.session_cache import CLAIM_FIELDS, get_claims_cache, get_revocation_list
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 security = HTTPBearer(auto_error=False)
@@ -662,6 +667,10 @@ class RefreshRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
+
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -756,6 +765,35 @@ def _verify_password(password: str, stored_hash: str) -> tuple[bool, bool]:
     return valid, valid
 
 
+def _kdf_executor():
+    # hashlib.scrypt releases the GIL, so a thread pool hashes in parallel.
+    return get_bounded_executor(
+        "kdf",
+        max_workers=int(os.getenv("AUTH_KDF_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        max_queue=int(os.getenv("AUTH_KDF_QUEUE_SIZE", "32")),
+    )
+
+
+async def _run_kdf(fn, *args):
+    """Run password hashing off the event loop; 429 when the KDF pool is full."""
+    try:
+        return await _kdf_executor().run(fn, *args)
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in attempts in progress. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def _hash_password_async(password: str) -> str:
+    return await _run_kdf(_hash_password, password)
+
+
+async def _verify_password_async(password: str, stored_hash: str) -> tuple[bool, bool]:
+    return await _run_kdf(_verify_password, password, stored_hash)
+
+
 def _b64url_encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
 
@@ -844,6 +882,81 @@ def _build_dev_bypass_user() -> dict:
     }
 
 
+async def _ensure_not_revoked(db, payload: dict) -> None:
+    revocations = get_revocation_list()
+    await revocations.sync(db, get_claims_cache())
+    if revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def _revoke_token(db, payload: dict) -> None:
+    await db.auth_revocations.update_one(
+        {"_id": f"token:{payload['jti']}"},
+        {"$set": {
+            "kind": "token",
+            "jti": payload["jti"],
+            "user_id": payload.get("sub"),
+            "expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc),
+        }},
+        upsert=True,
+    )
+    get_revocation_list().revoke_token(payload["jti"])
+
+
+async def _revoke_user_sessions(db, user_id: str) -> None:
+    """Invalidate every token issued to ``user_id`` up to now."""
+    not_before = int(time.time())
+    await db.auth_revocations.update_one(
+        {"_id": f"user:{user_id}"},
+        {"$set": {
+            "kind": "user",
+            "user_id": user_id,
+            "not_before": not_before,
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        }},
+        upsert=True,
+    )
+    get_revocation_list().revoke_user(user_id, not_before)
+    get_claims_cache().invalidate(user_id)
+
+
+async def _revoke_all_sessions(db, except_user_id: str) -> None:
+    """Invalidate every token but ``except_user_id``'s and drop all cached claims, in every process."""
+    not_before = int(time.time())
+    await db.auth_revocations.update_one(
+        {"_id": "all"},
+        {"$set": {
+            "kind": "all",
+            "except_user_id": except_user_id,
+            "not_before": not_before,
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        }},
+        upsert=True,
+    )
+    get_revocation_list().revoke_all(not_before, except_user_id)
+    get_claims_cache().clear()
+
+
+async def _invalidate_user_claims(db, user_id: str) -> None:
+    """Drop cached claims here now and in other processes on their next sync."""
+    cache = get_claims_cache()
+    cache.invalidate(user_id)
+    await db.auth_revocations.update_one(
+        {"_id": f"claims:{user_id}"},
+        {"$set": {
+            "kind": "claims",
+            "user_id": user_id,
+            "changed_at": time.time(),
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=cache.ttl_seconds * 2),
+        }},
+        upsert=True,
+    )
+
+
 async def get_current_user_from_access_token(access_token: str | None) -> dict:
     if access_token:
         payload = _decode_token(access_token)
@@ -854,13 +967,20 @@ async def get_current_user_from_access_token(access_token: str | None) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        # Signature, expiry and revocation are checked in memory; Mongo is only
+        # read when the user's claims are not cached.
         db = MongoDB.get_database()
-        user = await db.users.find_one({"_id": payload["sub"]})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-            )
+        await _ensure_not_revoked(db, payload)
+        cache = get_claims_cache()
+        user = cache.get(payload["sub"])
+        if user is None:
+            doc = await db.users.find_one({"_id": payload["sub"]}, {field: 1 for field in CLAIM_FIELDS})
+            if not doc:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found",
+                )
+            user = cache.put(doc)
         return user
 
     if auth_dev_bypass_enabled():
@@ -918,11 +1038,12 @@ async def register(payload: RegisterRequest):
         "email": payload.email.lower(),
         "name": payload.name.strip(),
         "role": "developer",
-        "password_hash": _hash_password(payload.password),
+        "password_hash": await _hash_password_async(payload.password),
         "created_at": now,
         "updated_at": now,
     }
     await db.users.insert_one(user)
+    await record_user_transition(db, None, user["role"])
 
     return TokenResponse(
         access_token=_create_access_token(user),
@@ -934,27 +1055,40 @@ async def register(payload: RegisterRequest):
 
 @router.post("/login", response_model=TokenResponse)
 async def login(payload: LoginRequest):
-    db = MongoDB.get_database()
-    user = await db.users.find_one({"email": payload.email.lower()})
-    valid, should_migrate = _verify_password(payload.password, user.get("password_hash", "") if user else "")
-    if not user or not valid:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
-
-    if should_migrate:
-        new_hash = _hash_password(payload.password)
-        await db.users.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"password_hash": new_hash, "updated_at": datetime.now(timezone.utc)}},
+    started = time.perf_counter()
+    outcome = "invalid"
+    try:
+        db = MongoDB.get_database()
+        user = await db.users.find_one({"email": payload.email.lower()})
+        valid, should_migrate = await _verify_password_async(
+            payload.password,
+            user.get("password_hash", "") if user else "",
         )
-        user["password_hash"] = new_hash
-
-    user["role"] = _normalize_role(user.get("role"))
-    return TokenResponse(
-        access_token=_create_access_token(user),
-        refresh_token=_create_refresh_token(str(user["_id"])),
-        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        user=_public_user(user),
-    )
+        if not user or not valid:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
+
+        if should_migrate:
+            new_hash = await _hash_password_async(payload.password)
+            await db.users.update_one(
+                {"_id": user["_id"]},
+                {"$set": {"password_hash": new_hash, "updated_at": datetime.now(timezone.utc)}},
+            )
+            user["password_hash"] = new_hash
+
+        user["role"] = _normalize_role(user.get("role"))
+        outcome = "success"
+        return TokenResponse(
+            access_token=_create_access_token(user),
+            refresh_token=_create_refresh_token(str(user["_id"])),
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            user=_public_user(user),
+        )
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            outcome = "rejected"
+        raise
+    finally:
+        AUTH_LOGIN_LATENCY.labels(outcome=outcome).observe(time.perf_counter() - started)
 
 
 @router.post("/refresh", response_model=TokenResponse)
@@ -964,6 +1098,7 @@ async def refresh_token(payload: RefreshRequest):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
 
     db = MongoDB.get_database()
+    await _ensure_not_revoked(db, token_payload)
     user = await db.users.find_one({"_id": token_payload["sub"]})
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
@@ -982,6 +1117,28 @@ async def get_me(user: dict = Depends(get_current_user)):
     return _public_user(user)
 
 
+@router.post("/logout")
+async def logout(
+    payload: LogoutRequest | None = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+):
+    access_payload = _decode_token(credentials.credentials) if credentials else None
+    if not access_payload or access_payload.get("type") != "access":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+
+    db = MongoDB.get_database()
+    await _revoke_token(db, access_payload)
+    if payload and payload.refresh_token:
+        refresh_payload = _decode_token(payload.refresh_token)
+        if (
+            refresh_payload
+            and refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("sub") == access_payload.get("sub")
+        ):
+            await _revoke_token(db, refresh_payload)
+    return {"message": "Logged out"}
+
+
 
 
 
@@ -1123,7 +1280,7 @@ async def reset_password(payload: PasswordResetRequest):
     if not record:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reset session invalid. Please request a new code.")
 
-    new_hash = _hash_password(payload.new_password)
+    new_hash = await _hash_password_async(payload.new_password)
     result = await db.users.update_one(
         {"email": email},
         {"$set": {"password_hash": new_hash, "updated_at": datetime.now(timezone.utc)}},
@@ -1163,6 +1320,7 @@ async def seed_admin_user() -> dict | None:
     if existing:
         if _normalize_role(existing.get("role")) != "admin":
             await db.users.update_one({"_id": existing["_id"]}, {"$set": {"role": "admin"}})
+            await record_user_transition(db, existing.get("role"), "admin")
         return existing
 
     now = datetime.now(timezone.utc)
@@ -1171,11 +1329,12 @@ async def seed_admin_user() -> dict | None:
         "email": email.lower(),
         "name": name.strip(),
         "role": "admin",
-        "password_hash": _hash_password(password),
+        "password_hash": await _hash_password_async(password),
         "created_at": now,
         "updated_at": now,
     }
     await db.users.insert_one(user_doc)
+    await record_user_transition(db, None, "admin")
     print(f"⚡ Seeded admin user: {email}")
     return user_doc
 
@@ -1192,12 +1351,15 @@ async def list_users(user: dict = Depends(require_role("admin"))):
 async def update_user_role(user_id: str, payload: ChangeRoleRequest, user: dict = Depends(require_role("admin"))):
     role = _normalize_role(payload.role)
     db = MongoDB.get_database()
-    result = await db.users.update_one(
+    previous = await db.users.find_one_and_update(
         {"_id": user_id},
-        {"$set": {"role": role, "updated_at": datetime.now(timezone.utc)}}
+        {"$set": {"role": role, "updated_at": datetime.now(timezone.utc)}},
+        projection={"role": 1},
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="User not found")
+    await record_user_transition(db, previous.get("role"), role)
+    await _invalidate_user_claims(db, user_id)
     updated = await db.users.find_one({"_id": user_id})
     return _public_user(updated)
 
@@ -1207,39 +1369,27 @@ async def delete_user(user_id: str, user: dict = Depends(require_role("admin")))
     if user_id == str(user["_id"]):
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     db = MongoDB.get_database()
+    existing = await db.users.find_one({"_id": user_id}, {"role": 1})
     result = await db.users.delete_one({"_id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    await record_user_transition(db, (existing or {}).get("role"), None)
+    await _revoke_user_sessions(db, user_id)
     return {"message": "User deleted successfully"}
 
 
-@router.get("/api/admin/stats")
-async def get_admin_stats(user: dict = Depends(require_role("admin"))):
+@router.post("/api/admin/users/{user_id}/revoke-sessions")
+async def revoke_user_sessions(user_id: str, user: dict = Depends(require_role("admin"))):
     db = MongoDB.get_database()
-    total_users = await db.users.count_documents({})
-    admins = await db.users.count_documents({"role": "admin"})
-    developers = await db.users.count_documents({"role": "developer"})
-    viewers = await db.users.count_documents({"role": "viewer"})
+    if not await db.users.find_one({"_id": user_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+    await _revoke_user_sessions(db, user_id)
+    return {"message": "Sessions revoked"}
 
-    total_runs = await db.traces.count_documents({})
-    running_runs = await db.traces.count_documents({"status": "running"})
-    completed_runs = await db.traces.count_documents({"status": "completed"})
-    failed_runs = await db.traces.count_documents({"status": "failed"})
 
-    return {
-        "users": {
-            "total": total_users,
-            "admin": admins,
-            "developer": developers,
-            "viewer": viewers
-        },
-        "runs": {
-            "total": total_runs,
-            "running": running_runs,
-            "completed": completed_runs,
-            "failed": failed_runs
-        }
-    }
+@router.get("/api/admin/stats")
+async def get_admin_stats(user: dict = Depends(require_role("admin"))):
+    return await get_stats(MongoDB.get_database())
 
 
 @router.post("/api/admin/clear-all")
@@ -1256,6 +1406,9 @@ async def clear_all_users_and_runs(user: dict = Depends(require_role("admin"))):
     await db.run_events.delete_many({})
     await db.agents.delete_many({})
     await db.agent_versions.delete_many({})
+    await rebuild_counters(db)
+    # Other processes would otherwise keep serving deleted users' cached claims.
+    await _revoke_all_sessions(db, except_user_id=admin_id)
 
     return {"message": "All database records, credentials, and run histories have been cleared successfully."}
 
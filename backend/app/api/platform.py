@@ -332,24 +332,42 @@ async def get_feature_flags():
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import json
+import re
 from datetime import datetime, timezone
 from typing import Any, Literal
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
-from pymongo import DESCENDING
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
 
 from app.api.auth import get_current_user, require_role
-from app.config.runtime import feature_flags_payload
+from app.cache.response_cache import ResponseCache
+from app.config.runtime import env_flag, feature_flags_payload
+from app.infra.cancellation import estimate_run_seconds
+from app.infra.event_bus import publish_run_events
+from app.infra.logger import RUN_CANCEL_COUNTER, RUN_CANCEL_SAVED_SECONDS, RUN_SUBMIT_COUNTER
+from app.infra.rate_limits import QuotaSubject, RateLimitExceeded, check_run_submission
+from app.infra.run_persistence import RunEventWriter
+from app.infra.stats_counters import record_run_transition
 from app.memory.database import MongoDB
+from app.security.guardrails import Guardrails
 
 router = APIRouter(tags=["platform"])
 ReadableRole = Depends(get_current_user)
 DeveloperRole = Depends(require_role("developer", "admin"))
 AdminRole = Depends(require_role("admin"))
 
-RunStatus = Literal["queued", "running", "completed", "failed"]
+RunStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+RunPriority = Literal["interactive", "batch", "eval"]
+_FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+# Input checks for the submit cache fast path (the worker runs its own).
+_input_guardrails = Guardrails()
 
 
 class AgentCreateRequest(BaseModel):
@@ -376,6 +394,21 @@ class RunSubmitRequest(BaseModel):
     session_id: str = Field(..., min_length=3, max_length=100)
     goal: str = Field(..., min_length=1, max_length=5000)
     agent_id: str | None = Field(default=None, max_length=100)
+    priority: RunPriority = "interactive"
+
+
+MAX_BATCH_RUNS = 500
+
+
+class RunBatchItem(BaseModel):
+    session_id: str = Field(..., min_length=3, max_length=100)
+    goal: str = Field(..., min_length=1, max_length=5000)
+    agent_id: str | None = Field(default=None, max_length=100)
+
+
+class RunBatchSubmitRequest(BaseModel):
+    runs: list[RunBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_RUNS)
+    priority: RunPriority = "batch"
 
 
 def _as_iso(value: Any) -> str | None:
@@ -402,7 +435,7 @@ def _normalize_run_status(status: str | None, trace: dict[str, Any]) -> RunStatu
     normalized = (status or "").strip().lower()
     if normalized == "pending":
         normalized = "queued"
-    if normalized in {"queued", "running", "completed", "failed"}:
+    if normalized in {"queued", "running", "completed", "failed", "cancelled"}:
         return normalized  # type: ignore[return-value]
     return "completed" if trace.get("final_answer") else "failed"
 
@@ -441,7 +474,7 @@ def _to_agent_dto(doc: dict[str, Any], versions: list[dict[str, Any]] | None = N
 def _to_run_dto(trace: dict[str, Any]) -> dict[str, Any]:
     status = _normalize_run_status(trace.get("status"), trace)
     latency = trace.get("latency") or {}
-    completed_at = trace.get("completed_at") if status in {"completed", "failed"} else None
+    completed_at = trace.get("completed_at") if status in _FINISHED_STATUSES else None
     return {
         "id": trace.get("request_id"),
         "agent_id": trace.get("agent_id") or trace.get("session_id") or "default",
@@ -646,33 +679,115 @@ async def promote_agent_version(agent_id: str, version: str, _: dict = AdminRole
 @router.delete("/api/runs/{request_id}", status_code=204)
 async def delete_run(request_id: str, _: dict = AdminRole):
     db = MongoDB.get_database()
+    existing = await db.traces.find_one({"request_id": request_id}, {"status": 1})
     result = await db.traces.delete_one({"request_id": request_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Run not found")
+    await record_run_transition(db, (existing or {}).get("status"), None)
     await db.run_events.delete_many({"run_id": request_id})
 
 
+# Only what _to_run_dto reads; plans, steps and observations stay in Mongo.
+_RUN_LIST_PROJECTION = {
+    "request_id": 1,
+    "agent_id": 1,
+    "agent_name": 1,
+    "session_id": 1,
+    "status": 1,
+    "goal": 1,
+    "started_at": 1,
+    "completed_at": 1,
+    "timestamp": 1,
+    "cache_hit": 1,
+    "latency.total": 1,
+    "error": 1,
+    "final_answer": 1,
+}
+
+
+def _encode_runs_cursor(trace: dict[str, Any]) -> str:
+    raw = json.dumps([_as_iso(trace.get("timestamp")), trace.get("request_id")])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_runs_cursor(cursor: str) -> tuple[datetime | None, str]:
+    """(timestamp, request_id); the timestamp is None for legacy traces without one."""
+    try:
+        timestamp, request_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (None if timestamp is None else datetime.fromisoformat(timestamp)), str(request_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _runs_search_filter(q: str) -> dict[str, Any]:
+    """
+    Index-friendly search: exact agent id, run id prefix (anchored, so the
+    request_id index applies) or words in the goal / agent name via the
+    traces text index.
+    """
+    term = q.strip()
+    return {
+        "$or": [
+            {"request_id": {"$regex": f"^{re.escape(term)}"}},
+            {"agent_id": term},
+            {"$text": {"$search": term}},
+        ]
+    }
+
+
+def _etag_for(body: Any) -> str:
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
 @router.get("/api/runs")
 async def list_runs(
-    q: str | None = Query(default=None, description="Run id, goal, agent, or trace search"),
-    status: Literal["all", "queued", "running", "completed", "failed"] = "all",
+    q: str | None = Query(default=None, description="Run id prefix, agent id, or words in goal / agent name"),
+    status: Literal["all", "queued", "running", "completed", "failed", "cancelled"] = "all",
+    # The dashboard client does not follow X-Next-Cursor yet, so the default
+    # stays at the pre-pagination 500 to keep its listing complete.
+    limit: int = Query(default=500, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    if_none_match: str | None = Header(default=None),
     _: dict = ReadableRole,
 ):
     db = MongoDB.get_database()
-    query: dict[str, Any] = {}
+    clauses: list[dict[str, Any]] = []
     if status != "all":
-        query["status"] = status
-    if q:
-        regex = {"$regex": q.strip(), "$options": "i"}
-        query["$or"] = [
-            {"request_id": regex},
-            {"agent_id": regex},
-            {"agent_name": regex},
-            {"goal": regex},
-        ]
+        clauses.append({"status": status})
+    if q and q.strip():
+        clauses.append(_runs_search_filter(q))
+    if cursor:
+        # Keyset pagination on (timestamp, request_id), newest first. Traces
+        # without a timestamp sort after all others, ordered by request_id.
+        timestamp, request_id = _decode_runs_cursor(cursor)
+        if timestamp is None:
+            clauses.append({"timestamp": None, "request_id": {"$lt": request_id}})
+        else:
+            clauses.append({
+                "$or": [
+                    {"timestamp": {"$lt": timestamp}},
+                    {"timestamp": timestamp, "request_id": {"$lt": request_id}},
+                    {"timestamp": None},
+                ]
+            })
+    query: dict[str, Any] = {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+
+    traces = await (
+        db.traces.find(query, _RUN_LIST_PROJECTION)
+        .sort([("timestamp", DESCENDING), ("request_id", DESCENDING)])
+        .to_list(length=limit + 1)
+    )
+    page = [trace for trace in traces[:limit] if trace.get("request_id")]
+    body = [_to_run_dto(trace) for trace in page]
 
-    traces = await db.traces.find(query).sort("timestamp", DESCENDING).to_list(length=500)
-    return [_to_run_dto(trace) for trace in traces if trace.get("request_id")]
+    etag = _etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if len(traces) > limit and page:
+        headers["X-Next-Cursor"] = _encode_runs_cursor(page[-1])
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=body, headers=headers)
 
 
 @router.get("/traces/{request_id}")
@@ -689,10 +804,109 @@ async def get_trace(request_id: str, _: dict = ReadableRole):
     return serialized
 
 
-@router.post("/api/runs/submit", status_code=202)
-async def submit_run(payload: RunSubmitRequest, _: dict = DeveloperRole):
+async def _complete_from_cache(
+    db,
+    run_id: str,
+    payload: RunSubmitRequest,
+    agent_name: str | None,
+    cached_response: str,
+    received_at: datetime,
+) -> dict[str, Any]:
+    """Record a run answered straight from the response cache; no worker involved."""
+    now = datetime.now(timezone.utc)
+    latency = {
+        "planner": 0.0,
+        "tool_total": 0.0,
+        "tool_wall_time": 0.0,
+        "synthesis": 0.0,
+        "total": (now - received_at).total_seconds(),
+    }
+    events = [
+        ("status_change", {"status": "queued"}),
+        ("result", {"status": "completed", "result": cached_response, "cache_hit": True, "latency": latency}),
+        ("status_change", {"status": "completed"}),
+    ]
+    await db.traces.insert_one(
+        {
+            "request_id": run_id,
+            "session_id": payload.session_id,
+            "agent_id": payload.agent_id,
+            "agent_name": agent_name,
+            "goal": payload.goal,
+            "status": "completed",
+            "plan": None,
+            "steps": [],
+            "observations": [],
+            "final_answer": cached_response,
+            "cache_hit": True,
+            "latency": latency,
+            "error": None,
+            "queued_at": received_at,
+            "started_at": received_at,
+            "completed_at": now,
+            "timestamp": received_at,
+            "event_seq": len(events),
+        }
+    )
+    await db.run_events.insert_many(
+        [
+            {"run_id": run_id, "seq": seq, "event": event, "data": data, "timestamp": now}
+            for seq, (event, data) in enumerate(events, start=1)
+        ],
+        ordered=True,
+    )
+    await record_run_transition(db, None, "completed")
+    return {"run_id": run_id, "status": "completed", "result": cached_response, "cache_hit": True}
+
+
+def quota_subject(user: dict, agent_id: str | None = None) -> QuotaSubject:
+    return QuotaSubject(user_id=str(user.get("_id")), role=str(user.get("role") or "developer"), agent_id=agent_id)
+
+
+def rate_limited(exc: RateLimitExceeded) -> HTTPException:
+    if not exc.retryable:
+        # Larger than the bucket can ever hold: retrying the same request won't help.
+        return HTTPException(status_code=413, detail=str(exc))
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": exc.retry_after_header})
+
+
+async def admit_runs(
+    subject: QuotaSubject,
+    runs: int = 1,
+    batch: bool = False,
+    agent_runs: dict[str, int] | None = None,
+) -> None:
+    """429 with Retry-After when the caller's run rate or quotas are exhausted (413 if never admissible)."""
+    try:
+        await check_run_submission(subject, runs=runs, batch=batch, agent_runs=agent_runs)
+    except RateLimitExceeded as exc:
+        raise rate_limited(exc) from exc
+
+
+def _submitted_by(subject: QuotaSubject) -> dict[str, str]:
+    # Read by the worker to charge the run's LLM tokens and tool calls.
+    return {"user_id": subject.user_id, "role": subject.role}
+
+
+def _passes_input_guardrails(goal: str) -> bool:
+    try:
+        _input_guardrails.validate_user_input(goal)
+    except ValueError:
+        return False
+    return True
+
+
+@router.post(
+    "/api/runs/submit",
+    status_code=202,
+    responses={200: {"description": "Goal answered from the response cache; the run is already completed."}},
+)
+async def submit_run(payload: RunSubmitRequest, user: dict = DeveloperRole):
     from app.tasks.agent_tasks import execute_agent_run
 
+    subject = quota_subject(user, payload.agent_id)
+    await admit_runs(subject)
+
     db = MongoDB.get_database()
     run_id = str(uuid4())
     agent_name = None
@@ -701,6 +915,18 @@ async def submit_run(payload: RunSubmitRequest, _: dict = DeveloperRole):
         agent_name = agent_doc.get("name")
 
     now = datetime.now(timezone.utc)
+
+    # Goal-level cache hits complete inline: no broker hop, worker or SSE wait.
+    # The plan-level cache needs a planner call, so it stays on the worker path.
+    # Goals the input guardrail rejects are queued as usual, so the worker
+    # records the violation on the trace like for any other run.
+    if env_flag("SUBMIT_CACHE_FAST_PATH_ENABLED", True) and _passes_input_guardrails(payload.goal):
+        cached_response = await ResponseCache(db).get_by_goal(payload.goal)
+        if cached_response:
+            RUN_SUBMIT_COUNTER.labels(path="cache_fast_path").inc()
+            body = await _complete_from_cache(db, run_id, payload, agent_name, cached_response, now)
+            return JSONResponse(status_code=200, content=body)
+
     trace_doc = {
         "request_id": run_id,
         "session_id": payload.session_id,
@@ -708,6 +934,8 @@ async def submit_run(payload: RunSubmitRequest, _: dict = DeveloperRole):
         "agent_name": agent_name,
         "goal": payload.goal,
         "status": "queued",
+        "priority": payload.priority,
+        "submitted_by": _submitted_by(subject),
         "plan": None,
         "steps": [],
         "observations": [],
@@ -717,21 +945,243 @@ async def submit_run(payload: RunSubmitRequest, _: dict = DeveloperRole):
         "error": None,
         "queued_at": now,
         "timestamp": now,
+        "event_seq": 1,
     }
     await db.traces.insert_one(trace_doc)
+    await record_run_transition(db, None, "queued")
     await db.run_events.insert_one(
         {
             "run_id": run_id,
+            "seq": 1,
             "event": "status_change",
             "data": {"status": "queued"},
             "timestamp": now,
         }
     )
 
-    execute_agent_run.delay(run_id, payload.session_id, payload.goal, payload.agent_id)
+    async_result = execute_agent_run.delay(
+        run_id,
+        payload.session_id,
+        payload.goal,
+        payload.agent_id,
+        priority=payload.priority,
+    )
+    task_id = getattr(async_result, "id", None)
+    if isinstance(task_id, str):
+        # Kept so a cancel can revoke the task before a worker picks it up.
+        await db.traces.update_one({"request_id": run_id}, {"$set": {"celery_task_id": task_id}})
+    RUN_SUBMIT_COUNTER.labels(path="queued").inc()
     return {"run_id": run_id, "status": "queued"}
 
 
+@router.post("/api/runs/submit-batch", status_code=202)
+async def submit_run_batch(payload: RunBatchSubmitRequest, user: dict = DeveloperRole):
+    from app.tasks.agent_tasks import enqueue_agent_runs
+
+    subject = quota_subject(user)
+    agent_runs: dict[str, int] = {}
+    for item in payload.runs:
+        if item.agent_id:
+            agent_runs[item.agent_id] = agent_runs.get(item.agent_id, 0) + 1
+    await admit_runs(subject, runs=len(payload.runs), batch=True, agent_runs=agent_runs)
+
+    db = MongoDB.get_database()
+
+    agent_ids = sorted({item.agent_id for item in payload.runs if item.agent_id})
+    agent_names: dict[str, str | None] = {}
+    if agent_ids:
+        agents = await db.agents.find({"_id": {"$in": agent_ids}}, {"name": 1}).to_list(length=len(agent_ids))
+        agent_names = {doc["_id"]: doc.get("name") for doc in agents}
+        missing = [agent_id for agent_id in agent_ids if agent_id not in agent_names]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Agent not found: {', '.join(missing)}")
+
+    batch_id = str(uuid4())
+    now = datetime.now(timezone.utc)
+    runs = [
+        {
+            "run_id": str(uuid4()),
+            "session_id": item.session_id,
+            "goal": item.goal,
+            "agent_id": item.agent_id,
+            "priority": payload.priority,
+        }
+        for item in payload.runs
+    ]
+
+    await db.run_batches.insert_one(
+        {
+            "_id": batch_id,
+            "batch_id": batch_id,
+            "total": len(runs),
+            "priority": payload.priority,
+            "run_ids": [run["run_id"] for run in runs],
+            "created_at": now,
+        }
+    )
+    await db.traces.insert_many(
+        [
+            {
+                "request_id": run["run_id"],
+                "batch_id": batch_id,
+                "session_id": run["session_id"],
+                "agent_id": run["agent_id"],
+                "agent_name": agent_names.get(run["agent_id"]) if run["agent_id"] else None,
+                "goal": run["goal"],
+                "status": "queued",
+                "priority": payload.priority,
+                "submitted_by": _submitted_by(subject),
+                "plan": None,
+                "steps": [],
+                "observations": [],
+                "final_answer": None,
+                "cache_hit": False,
+                "latency": {},
+                "error": None,
+                "queued_at": now,
+                "timestamp": now,
+                "event_seq": 1,
+            }
+            for run in runs
+        ],
+        ordered=False,
+    )
+    await record_run_transition(db, None, "queued", count=len(runs))
+    await db.run_events.insert_many(
+        [
+            {
+                "run_id": run["run_id"],
+                "seq": 1,
+                "event": "status_change",
+                "data": {"status": "queued", "batch_id": batch_id},
+                "timestamp": now,
+            }
+            for run in runs
+        ],
+        ordered=False,
+    )
+
+    # Publishing one message per run blocks; keep it off the event loop.
+    task_ids = await asyncio.to_thread(enqueue_agent_runs, runs)
+    task_updates = [
+        UpdateOne({"request_id": run["run_id"]}, {"$set": {"celery_task_id": task_id}})
+        for run, task_id in zip(runs, task_ids)
+        if isinstance(task_id, str)
+    ]
+    if task_updates:
+        await db.traces.bulk_write(task_updates, ordered=False)
+
+    RUN_SUBMIT_COUNTER.labels(path="batch").inc(len(runs))
+    return {
+        "batch_id": batch_id,
+        "status": "queued",
+        "total": len(runs),
+        "run_ids": [run["run_id"] for run in runs],
+    }
+
+
+@router.get("/api/runs/batches/{batch_id}")
+async def get_run_batch_status(batch_id: str, _: dict = ReadableRole):
+    db = MongoDB.get_database()
+    batch = await db.run_batches.find_one({"_id": batch_id}, {"total": 1, "priority": 1, "created_at": 1})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    rows = await db.traces.aggregate([
+        {"$match": {"batch_id": batch_id}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}, "avg_latency": {"$avg": "$latency.total"}}},
+    ]).to_list(length=None)
+
+    counts = {status: 0 for status in ("queued", "running", "completed", "failed", "cancelled")}
+    avg_latency = None
+    for row in rows:
+        status = row["_id"] if row["_id"] in counts else "running"
+        counts[status] += row["count"]
+        if row["_id"] == "completed":
+            avg_latency = row.get("avg_latency")
+
+    total = int(batch.get("total") or sum(counts.values()))
+    finished = sum(counts[status] for status in _FINISHED_STATUSES)
+    if finished >= total:
+        status = "completed"
+    elif counts["queued"] == total:
+        status = "queued"
+    else:
+        status = "running"
+
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "priority": batch.get("priority"),
+        "total": total,
+        "finished": finished,
+        "counts": counts,
+        "avg_latency_completed": avg_latency,
+        "created_at": _as_iso(batch.get("created_at")),
+    }
+
+
+async def _revoke_task(task_id: str) -> None:
+    from app.infra.celery_app import celery_app
+
+    try:
+        await asyncio.to_thread(celery_app.control.revoke, task_id)
+    except Exception:
+        # Workers also skip cancelled runs at pickup; revoke is only a shortcut.
+        pass
+
+
+@router.post("/api/runs/{run_id}/cancel")
+async def cancel_run(run_id: str, _: dict = DeveloperRole):
+    db = MongoDB.get_database()
+    now = datetime.now(timezone.utc)
+
+    queued = await db.traces.find_one_and_update(
+        {"request_id": run_id, "status": "queued"},
+        {"$set": {
+            "status": "cancelled",
+            "cancel_requested": True,
+            "error": "Cancelled before execution",
+            "completed_at": now,
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+    if queued:
+        await record_run_transition(db, "queued", "cancelled")
+        saved = await estimate_run_seconds(db)
+        await db.traces.update_one(
+            {"request_id": run_id},
+            {"$set": {"cancellation": {"stage": "queued", "estimated_saved_seconds": saved}}},
+        )
+        RUN_CANCEL_COUNTER.labels(stage="queued").inc()
+        RUN_CANCEL_SAVED_SECONDS.labels(stage="queued").observe(saved)
+        if queued.get("celery_task_id"):
+            await _revoke_task(queued["celery_task_id"])
+        # Safe to write here: a cancelled run is never claimed by a worker.
+        events = RunEventWriter(db, run_id)
+        await events.emit("status_change", {"status": "cancelled", "reason": "Cancelled before execution"})
+        await events.close()
+        return {"run_id": run_id, "status": "cancelled"}
+
+    running = await db.traces.find_one_and_update(
+        {"request_id": run_id, "status": "running"},
+        {"$set": {"cancel_requested": True, "cancel_requested_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if running:
+        # The worker owns this run's persisted events (see run_persistence), so
+        # the request goes out as an unsequenced bus signal; the worker's
+        # watcher hears it there, or reads the flag when polling. SSE clients
+        # see the outcome as the worker's status_change.
+        await publish_run_events(run_id, [{"event": "cancel_requested", "data": {"requested_at": now}}])
+        return JSONResponse(status_code=202, content={"run_id": run_id, "status": "cancelling"})
+
+    trace = await db.traces.find_one({"request_id": run_id})
+    if not trace:
+        raise HTTPException(status_code=404, detail="Run not found")
+    raise HTTPException(status_code=409, detail=f"Run already {_normalize_run_status(trace.get('status'), trace)}")
+
+
 @router.get("/api/runs/{run_id}/status")
 async def get_run_status(run_id: str, _: dict = ReadableRole):
     db = MongoDB.get_database()
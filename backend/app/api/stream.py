@@ -7,7 +7,8 @@ Clients connect via:
     GET /api/runs/{run_id}/stream
 
 Events emitted:
-    status_change   — queued/running/completed/failed
+    status_change   — queued/running/completed/failed/cancelled
+    cancel_requested — cancellation requested for a running run
     planner_start   — planner LLM call started
     planner_complete — planner finished, plan preview
     execution_start  — tool execution beginning
@@ -15,6 +16,7 @@ Events emitted:
     tool_complete    — individual tool finished
     execution_complete — all tools done
     synthesis_start  — synthesis LLM call started
+    synthesis_delta  — next piece of the answer, after guardrail scanning
     synthesis_complete — synthesis finished
     result           — final answer
     error            — execution error
@@ -24,70 +26,155 @@ from __future__ import annotations
 
 import asyncio
 import json
-from datetime import datetime, timezone
+import logging
 from typing import AsyncGenerator
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, Header, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 
 from app.api.auth import get_current_user_from_access_token
+from app.infra.event_bus import get_event_bus
 from app.memory.database import MongoDB
 
 router = APIRouter(tags=["streaming"])
+_logger = logging.getLogger("stream")
 
-# How often to poll for new events (seconds)
+# How often to poll for new events when no event bus is configured (seconds)
 _POLL_INTERVAL = 0.5
+# How long to wait on the bus before sending an SSE keepalive comment (seconds)
+_KEEPALIVE_INTERVAL = 15
 # Maximum time to keep SSE connection open (seconds)
 _MAX_STREAM_DURATION = 300
+# Page size for Last-Event-ID catch-up queries
+_CATCHUP_BATCH = 100
 
 
-def _serialize_event(event_type: str, data: dict) -> str:
+def _serialize_event(event_type: str, data: dict, event_id: str | None = None) -> str:
     """Format an SSE event string."""
     payload = json.dumps(data, default=str)
-    return f"event: {event_type}\ndata: {payload}\n\n"
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"{id_line}event: {event_type}\ndata: {payload}\n\n"
 
 
-async def _event_generator(run_id: str) -> AsyncGenerator[str, None]:
+def _is_terminal(event_type: str, data: dict) -> bool:
+    return event_type == "status_change" and data.get("status") in ("completed", "failed", "cancelled")
+
+
+def _parse_event_id(event_id: str | None) -> int:
+    """Last-Event-ID is the per-run ``seq``; anything else replays from the start."""
+    try:
+        return max(int(event_id), 0) if event_id else 0
+    except ValueError:
+        return 0
+
+
+async def _fetch_events_after(db, run_id: str, after_seq: int) -> list[dict]:
+    """Persisted events for ``run_id`` with ``seq > after_seq``, oldest first."""
+    cursor = db.run_events.find(
+        {"run_id": run_id, "seq": {"$gt": after_seq}},
+        {"seq": 1, "event": 1, "data": 1},
+    ).sort("seq", 1)
+    return await cursor.to_list(length=_CATCHUP_BATCH)
+
+
+async def _subscribe(bus, run_id: str):
+    """Bus subscription, or None (polling) when there is no bus or it is unreachable."""
+    if bus is None:
+        return None
+    try:
+        return await bus.subscribe(run_id)
+    except Exception as e:
+        _logger.warning(f"event_bus subscribe failed, polling run_events run_id={run_id} error={e}")
+        return None
+
+
+async def _close(subscription) -> None:
+    try:
+        await subscription.close()
+    except Exception as e:
+        _logger.warning(f"event_bus close failed error={e}")
+
+
+async def _event_generator(run_id: str, last_event_id: str | None = None) -> AsyncGenerator[str, None]:
     """
-    Yield SSE events by polling the run_events collection.
-    Terminates when status reaches completed/failed or timeout.
+    Yield SSE events for a run.
+
+    Subscribes to the event bus first, then replays persisted events with
+    ``seq`` after ``last_event_id`` in pages, so nothing published during
+    the catch-up is lost. Without a bus, or once the bus fails, polls
+    run_events incrementally from the last delivered ``seq``.
+    Terminates when status reaches completed/failed/cancelled or timeout.
     """
     db = MongoDB.get_database()
-    seen_ids: set = set()
-    start_time = asyncio.get_event_loop().time()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    bus = get_event_bus()
+    last_seq = _parse_event_id(last_event_id)
 
     # Send initial keepalive
     yield _serialize_event("connected", {"run_id": run_id, "message": "Stream connected"})
 
-    while True:
-        elapsed = asyncio.get_event_loop().time() - start_time
-        if elapsed > _MAX_STREAM_DURATION:
-            yield _serialize_event("timeout", {"message": "Stream timeout reached"})
-            break
-
-        # Fetch new events since last check
-        cursor = db.run_events.find(
-            {"run_id": run_id}
-        ).sort("timestamp", 1)
-
-        events = await cursor.to_list(length=100)
-
-        for event in events:
-            event_id = str(event["_id"])
-            if event_id not in seen_ids:
-                seen_ids.add(event_id)
-                yield _serialize_event(
-                    event.get("event", "update"),
-                    event.get("data", {})
-                )
-
-                # Check for terminal events
-                if event.get("event") == "status_change":
-                    status = event.get("data", {}).get("status")
-                    if status in ("completed", "failed"):
+    subscription = await _subscribe(bus, run_id)
+    try:
+        while True:
+            # ---- Catch-up from run_events (and the polling fallback) ----
+            while True:
+                events = await _fetch_events_after(db, run_id, last_seq)
+                for event in events:
+                    event_type = event.get("event", "update")
+                    data = event.get("data", {})
+                    last_seq = event["seq"]
+                    yield _serialize_event(event_type, data, str(last_seq))
+                    if _is_terminal(event_type, data):
                         return
 
-        await asyncio.sleep(_POLL_INTERVAL)
+                if len(events) == _CATCHUP_BATCH:
+                    continue
+                if subscription is not None:
+                    break
+                if loop.time() - start_time > _MAX_STREAM_DURATION:
+                    yield _serialize_event("timeout", {"message": "Stream timeout reached"})
+                    return
+                await asyncio.sleep(_POLL_INTERVAL)
+
+            # ---- Live events from the bus ----
+            while True:
+                if loop.time() - start_time > _MAX_STREAM_DURATION:
+                    yield _serialize_event("timeout", {"message": "Stream timeout reached"})
+                    return
+
+                try:
+                    message = await subscription.get(timeout=_KEEPALIVE_INTERVAL)
+                except Exception as e:
+                    # Bus went away mid-stream: continue by polling run_events.
+                    _logger.warning(f"event_bus receive failed, polling run_events run_id={run_id} error={e}")
+                    await _close(subscription)
+                    subscription = None
+                    break
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+
+                seq = message.get("seq")
+                if not isinstance(seq, int) or seq <= last_seq:
+                    continue
+
+                if seq == last_seq + 1:
+                    pending = [message]
+                else:
+                    # Pub/sub is at-most-once; fill the gap from the store.
+                    pending = await _fetch_events_after(db, run_id, last_seq)
+
+                for event in pending:
+                    last_seq = event["seq"]
+                    event_type = event.get("event", "update")
+                    data = event.get("data", {})
+                    yield _serialize_event(event_type, data, str(last_seq))
+                    if _is_terminal(event_type, data):
+                        return
+    finally:
+        if subscription is not None:
+            await _close(subscription)
 
 
 @router.get("/api/runs/{run_id}/stream")
@@ -95,6 +182,7 @@ async def stream_run_events(
     run_id: str,
     request: Request,
     access_token: str | None = Query(default=None),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
 ):
     """
     SSE endpoint for real-time run progress.
@@ -104,6 +192,9 @@ async def stream_run_events(
         source.addEventListener('status_change', (e) => {
             console.log(JSON.parse(e.data));
         });
+
+    Reconnecting clients send the standard Last-Event-ID header and only
+    receive events after it.
     """
     bearer_token = access_token
     if not bearer_token:
@@ -117,7 +208,7 @@ async def stream_run_events(
         raise HTTPException(status_code=404, detail="Run not found")
 
     return StreamingResponse(
-        _event_generator(run_id),
+        _event_generator(run_id, last_event_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
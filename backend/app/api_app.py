@@ -12,17 +12,20 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import make_asgi_app
+from prometheus_client import REGISTRY, make_asgi_app
 
 from app.api.agent import router as agent_router
 from app.api.auth import router as auth_router
 from app.api.eval import router as eval_router
 from app.api.platform import router as platform_router
 from app.api.stream import router as stream_router
+from app.config.runtime import env_flag
 from app.infra.logger import REQUEST_COUNTER, REQUEST_LATENCY
 from app.memory.database import MongoDB
 from app.observability.health import router as health_router
+from app.observability.queue_metrics import QueueDepthCollector
 from app.observability.readiness import router as readiness_router
+from app.security.request_size import RequestSizeLimitMiddleware
 
 
 def _allowed_origins() -> list[str]:
@@ -52,6 +55,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Added before CORS so 413 responses still carry CORS headers.
+app.add_middleware(RequestSizeLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_allowed_origins(),
@@ -79,6 +84,9 @@ app.include_router(platform_router)
 app.include_router(stream_router)
 app.include_router(eval_router)
 
+if env_flag("QUEUE_DEPTH_METRICS_ENABLED", True):
+    REGISTRY.register(QueueDepthCollector())
+
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
@@ -3,20 +3,30 @@ app/cache/response_cache.py
 
 Smart response caching layer with TTL support.
 Enterprise-safe version with L1 + L2 caching.
+
+L2 reads fetch the goal and plan keys in one round trip, and L2 writes
+upsert both keys in one bulk_write. With ``write_behind=True`` the
+L2 write is scheduled off the response path.
 """
 
+import asyncio
 import hashlib
+import logging
 import time
 from datetime import datetime, timedelta
 from typing import Optional
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, UpdateOne
+
+_logger = logging.getLogger("response_cache")
 
 
 class ResponseCache:
-    def __init__(self, db, ttl_seconds: int = 3600):
+    def __init__(self, db, ttl_seconds: int = 3600, write_behind: bool = False):
         self.collection = db.response_cache
         self.ttl_seconds = ttl_seconds
+        self.write_behind = write_behind
+        self._pending_writes: set[asyncio.Task] = set()
 
         # ----------------------------
         # L1 In-Memory Cache (Process Level)
@@ -92,30 +102,46 @@ class ResponseCache:
             return result
 
         # ----------------------------
-        # 2️⃣ L2 Mongo Check
+        # 2️⃣ L2 Mongo Check (single round trip)
         # ----------------------------
-        doc = await self.collection.find_one({"_id": goal_key})
-        if doc:
-            if "expires_at" in doc and doc["expires_at"] < datetime.utcnow():
-                return None
-
-            response = doc.get("response")
-            if response:
-                self._l1_set(goal_key, response)
-                return response
+        docs = await self.collection.find(
+            {"_id": {"$in": [goal_key, plan_key]}}
+        ).to_list(length=2)
+        by_key = {doc.get("_id"): doc for doc in docs}
 
-        doc = await self.collection.find_one({"_id": plan_key})
-        if doc:
-            if "expires_at" in doc and doc["expires_at"] < datetime.utcnow():
-                return None
+        now = datetime.utcnow()
+        for key in (goal_key, plan_key):
+            doc = by_key.get(key)
+            if not doc:
+                continue
+            if "expires_at" in doc and doc["expires_at"] < now:
+                continue
 
             response = doc.get("response")
             if response:
-                self._l1_set(plan_key, response)
+                self._l1_set(key, response)
                 return response
 
         return None
 
+    async def get_by_goal(self, goal: str) -> Optional[str]:
+        """Goal-key lookup only; usable before a plan exists."""
+        goal_key = self._goal_key(goal)
+        result = self._l1_get(goal_key)
+        if result:
+            return result
+
+        doc = await self.collection.find_one({"_id": goal_key})
+        if not doc:
+            return None
+        if "expires_at" in doc and doc["expires_at"] < datetime.utcnow():
+            return None
+
+        response = doc.get("response")
+        if response:
+            self._l1_set(goal_key, response)
+        return response or None
+
     async def set(self, goal: str, plan_text: str, response: str):
         now = datetime.utcnow()
 
@@ -129,31 +155,54 @@ class ResponseCache:
         self._l1_set(plan_key, response)
 
         # ----------------------------
-        # L2 Store
+        # L2 Store (single bulk_write)
         # ----------------------------
-        await self.collection.update_one(
-            {"_id": goal_key},
-            {
-                "$set": {
-                    "goal": self._normalize(goal),
-                    "response": response,
-                    "created_at": now,
-                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
-                }
-            },
-            upsert=True,
-        )
-
-        await self.collection.update_one(
-            {"_id": plan_key},
-            {
-                "$set": {
-                    "goal": self._normalize(goal),
-                    "plan": plan_text,
-                    "response": response,
-                    "created_at": now,
-                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
-                }
-            },
-            upsert=True,
-        )
+        normalized_goal = self._normalize(goal)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        operations = [
+            UpdateOne(
+                {"_id": goal_key},
+                {
+                    "$set": {
+                        "goal": normalized_goal,
+                        "response": response,
+                        "created_at": now,
+                        "expires_at": expires_at,
+                    }
+                },
+                upsert=True,
+            ),
+            UpdateOne(
+                {"_id": plan_key},
+                {
+                    "$set": {
+                        "goal": normalized_goal,
+                        "plan": plan_text,
+                        "response": response,
+                        "created_at": now,
+                        "expires_at": expires_at,
+                    }
+                },
+                upsert=True,
+            ),
+        ]
+
+        if not self.write_behind:
+            await self.collection.bulk_write(operations, ordered=False)
+            return
+
+        task = asyncio.ensure_future(self._write_l2(operations))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def _write_l2(self, operations):
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # L1 already holds the value; a lost L2 write only costs a future miss.
+            _logger.warning(f"response_cache write-behind failed: {e}")
+
+    async def flush(self):
+        """Wait for any write-behind L2 writes still in flight."""
+        if self._pending_writes:
+            await asyncio.gather(*list(self._pending_writes), return_exceptions=True)
@@ -0,0 +1,237 @@
+"""
+app/cache/tool_cache.py
+
+Process-level tool result cache used by the IntelligentRouter.
+Entries are keyed on tool name + normalized query + index version,
+expire on per-tool TTLs, and are evicted LRU-first once the entry or
+byte budget is exceeded. Tools listed in ``stale_while_revalidate``
+keep serving expired entries for a grace window while a background
+refresh runs, so a tripped circuit can still answer from recent data.
+A refresh that outlives ``refresh_timeout`` (e.g. because its loop stopped
+with WORKER_RUNTIME=loop) is abandoned so the key can refresh again.
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.infra.logger import TOOL_CACHE_COUNTER
+
+_logger = logging.getLogger("tool_cache")
+
+DEFAULT_TOOL_TTLS: Dict[str, float] = {
+    "rag_search": 600,
+    "web_search": 900,
+}
+
+DEFAULT_STALE_WINDOWS: Dict[str, float] = {
+    "web_search": 3600,
+}
+
+
+class _Entry:
+    __slots__ = ("response", "expires_at", "stale_until", "size")
+
+    def __init__(self, response: Dict[str, Any], expires_at: float, stale_until: float, size: int):
+        self.response = response
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+
+
+class ToolResultCache:
+    """
+    Responsibilities:
+    - Cache successful tool responses per (tool, query, index version)
+    - Apply per-tool TTLs and an LRU entry/byte budget
+    - Serve stale entries for stale-while-revalidate tools
+    - De-duplicate background refreshes per key
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: Optional[Dict[str, float]] = None,
+        default_ttl: float = 0,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        refresh_timeout: float = 15,
+    ):
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.stale_windows = dict(
+            DEFAULT_STALE_WINDOWS if stale_while_revalidate is None else stale_while_revalidate
+        )
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.refresh_timeout = refresh_timeout
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Dict[str, Tuple[asyncio.Task, float]] = {}
+
+    # ============================================================
+    # Utilities
+    # ============================================================
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(str(text).strip().lower().split())
+
+    def make_key(self, tool_name: str, query: str, index_version: Optional[str] = None) -> str:
+        raw = f"{tool_name}\x1f{self._normalize(query)}\x1f{index_version or ''}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, tool_name: str) -> float:
+        return float(self.ttls.get(tool_name, self.default_ttl))
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return self.ttl_for(tool_name) > 0
+
+    @staticmethod
+    def _size_of(response: Dict[str, Any]) -> int:
+        data = response.get("data")
+        return len(data) if isinstance(data, str) else len(repr(data))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry.size
+
+    # ============================================================
+    # Public API
+    # ============================================================
+
+    def get(self, tool_name: str, key: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Return ``(response, is_stale)``. ``response`` is a deep copy so
+        callers may annotate metadata freely.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="miss").inc()
+            return None, False
+
+        now = time.time()
+        if now < entry.expires_at:
+            self._entries.move_to_end(key)
+            TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="hit").inc()
+            return copy.deepcopy(entry.response), False
+
+        if now < entry.stale_until:
+            self._entries.move_to_end(key)
+            TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="stale").inc()
+            return copy.deepcopy(entry.response), True
+
+        self._evict(key)
+        TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="miss").inc()
+        return None, False
+
+    def is_fresh(self, key: str) -> bool:
+        """True when ``key`` would be a non-stale hit; no metrics or LRU update."""
+        entry = self._entries.get(key)
+        return entry is not None and time.time() < entry.expires_at
+
+    def set(self, tool_name: str, key: str, response: Dict[str, Any]) -> None:
+        if response.get("status") != "success" or not self.is_cacheable(tool_name):
+            return
+        # A hedge on another tool produced this; it must not answer for ``tool_name``.
+        if response.get("metadata", {}).get("hedge_winner") not in (None, tool_name):
+            return
+
+        size = self._size_of(response)
+        if size > self.max_bytes:
+            return
+
+        ttl = self.ttl_for(tool_name)
+        now = time.time()
+        stored = copy.deepcopy(response)
+        metadata = stored.setdefault("metadata", {})
+        metadata.pop("cache", None)
+        metadata.pop("hedge_winner", None)
+
+        self._evict(key)
+        self._entries[key] = _Entry(
+            response=stored,
+            expires_at=now + ttl,
+            stale_until=now + ttl + float(self.stale_windows.get(tool_name, 0)),
+            size=size,
+        )
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+            TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="evicted").inc()
+
+    def revalidate(
+        self,
+        tool_name: str,
+        key: str,
+        refresh: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> None:
+        """Schedule a single background refresh for ``key``."""
+        running = self._refreshing.get(key)
+        if running is not None:
+            task, started = running
+            if time.monotonic() - started < self.refresh_timeout:
+                return
+            # Its loop may never run again (run_until_complete returned), so
+            # stop waiting on it rather than leave the key stuck forever.
+            self._refreshing.pop(key, None)
+            _cancel_task(task)
+            TOOL_CACHE_COUNTER.labels(tool_name=tool_name, result="refresh_abandoned").inc()
+
+        async def _run():
+            try:
+                response = await refresh()
+                self.set(tool_name, key, response)
+            except Exception as e:
+                _logger.warning(f"tool_cache revalidate failed tool={tool_name} error={e}")
+            finally:
+                current = self._refreshing.get(key)
+                if current is not None and current[0] is task:
+                    self._refreshing.pop(key, None)
+
+        task = asyncio.ensure_future(_run())
+        self._refreshing[key] = (task, time.monotonic())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "refreshing": len(self._refreshing),
+        }
+
+
+def _cancel_task(task: asyncio.Task) -> None:
+    loop = task.get_loop()
+    if loop.is_closed():
+        return
+    loop.call_soon_threadsafe(task.cancel)
+
+
+_tool_cache: Optional[ToolResultCache] = None
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Return the worker-local tool result cache (singleton per process)."""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolResultCache(
+            max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            refresh_timeout=float(os.getenv("TOOL_STEP_BUDGET_SECONDS", "15")),
+        )
+    return _tool_cache
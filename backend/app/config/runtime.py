@@ -26,6 +26,13 @@ def mongodb_db() -> str:
     return os.getenv("MONGODB_DB", "agent_memory")
 
 
+def run_timeout_seconds() -> float | None:
+    """RUN_TIMEOUT_SECONDS for one agent run; None (no limit) when empty or 0."""
+    raw = os.getenv("RUN_TIMEOUT_SECONDS", "240").strip()
+    timeout = float(raw) if raw else 0.0
+    return timeout if timeout > 0 else None
+
+
 def web_search_available() -> bool:
     return bool(os.getenv("SERPAPI_KEY"))
 
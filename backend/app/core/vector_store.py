@@ -13,6 +13,7 @@ class VectorStore:
         # PUBLIC CONTRACT (used by RAGSearchTool)
         self.documents = []  # List[str]
         self.document_embeddings = None  # np.ndarray (N, dim)
+        self.index_version = "unknown"  # hash of the indexed data file
 
         self._initialize_store()
 
@@ -50,6 +51,7 @@ class VectorStore:
         self.document_embeddings = np.asarray(embeddings, dtype=np.float32)
 
         file_hash = self._get_file_hash()
+        self.index_version = file_hash
 
         with open(self.store_path, "wb") as f:
             pickle.dump(
@@ -76,6 +78,7 @@ class VectorStore:
         else:
             self.documents = docs
             self.document_embeddings = np.asarray(embeds, dtype=np.float32)
+            self.index_version = saved_hash
             print("Embeddings are up to date.")
 
     # ------------------------------------------------
@@ -0,0 +1,133 @@
+"""
+app/infra/async_runtime.py
+
+Long-lived asyncio runtime for Celery workers.
+
+Instead of spinning ``run_until_complete`` per task, each worker process
+keeps one event loop on a background thread. Celery runs with the
+``threads`` pool; every task thread hands its coroutine to the shared loop
+and blocks on the result, so one process overlaps many agent runs while
+they wait on Ollama, Mongo or SerpAPI. A bounded semaphore caps the
+number of runs in flight (WORKER_ASYNC_CONCURRENCY); callers beyond that
+block until a slot frees up.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+_logger = logging.getLogger("async_runtime")
+
+
+class AsyncWorkerRuntime:
+
+    def __init__(self, max_concurrency: int = 8):
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._in_flight = 0
+
+    # ============================================================
+    # Lifecycle
+    # ============================================================
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=_run, name="async-worker-runtime", daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            return loop
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    # ============================================================
+    # Execution
+    # ============================================================
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``coro`` on the shared loop and block the calling thread for its
+        result. Raises TimeoutError (after cancelling the coroutine) when
+        ``timeout`` elapses.
+        """
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncWorkerRuntime.run() called from its own loop thread")
+
+        self._slots.acquire()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+            try:
+                return future.result(timeout)
+            except concurrent.futures.TimeoutError as exc:
+                future.cancel()
+                raise TimeoutError(f"Async task exceeded {timeout}s") from exc
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+
+_runtime: Optional[AsyncWorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_worker_runtime() -> AsyncWorkerRuntime:
+    """Return the per-process runtime, created on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncWorkerRuntime(
+                max_concurrency=int(os.getenv("WORKER_ASYNC_CONCURRENCY", "8")),
+            )
+        return _runtime
+
+
+def reset_worker_runtime() -> None:
+    """Stop and forget the runtime (after fork, or in tests)."""
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        try:
+            runtime.stop()
+        except Exception as e:
+            _logger.warning(f"async runtime stop failed error={e}")
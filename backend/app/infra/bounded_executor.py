@@ -0,0 +1,203 @@
+"""
+app/infra/bounded_executor.py
+
+Named thread pools with a hard admission limit, for blocking work that
+must not run on the event loop (scrypt, ...). They double as bulkheads:
+each registered tool and the LLM client get their own pool (see
+ToolRegistry.register and ollama_client), so hung SerpAPI calls or slow RAG
+searches only exhaust their own threads, never the loop's default executor.
+
+At most ``max_workers`` calls run at once and ``max_queue`` more may wait;
+anything beyond that is rejected immediately with ExecutorSaturatedError
+instead of piling up behind the pool, so callers can shed load (HTTP 429)
+while the loop keeps serving other requests. An executor created with
+``wait_when_full=True`` instead makes callers await a free slot (from any
+event loop) without holding a thread; the LLM bulkhead uses that, since an
+LLM call that waits beats failing the whole run. In-flight count, queue wait,
+run time, queue depth, saturation and rejections are exported per executor
+name.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Tuple
+
+from app.infra.logger import (
+    EXECUTOR_IN_FLIGHT,
+    EXECUTOR_QUEUE_DEPTH,
+    EXECUTOR_QUEUE_WAIT,
+    EXECUTOR_REJECTED,
+    EXECUTOR_RUN_TIME,
+    EXECUTOR_SATURATION,
+)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a BoundedExecutor's workers and queue are all taken."""
+
+    def __init__(self, name: str, limit: int):
+        super().__init__(f"Executor '{name}' is saturated ({limit} calls in flight)")
+        self.name = name
+        self.limit = limit
+
+
+class BoundedExecutor:
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0, wait_when_full: bool = False):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.wait_when_full = wait_when_full
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._in_flight - self._running
+
+    def _publish(self) -> None:
+        # Called with self._lock held.
+        EXECUTOR_IN_FLIGHT.labels(executor=self.name).set(self._in_flight)
+        EXECUTOR_QUEUE_DEPTH.labels(executor=self.name).set(self._in_flight - self._running)
+        EXECUTOR_SATURATION.labels(executor=self.name).set(self._in_flight / self.limit)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.limit:
+                EXECUTOR_REJECTED.labels(executor=self.name).inc()
+                raise ExecutorSaturatedError(self.name, self.limit)
+            self._in_flight += 1
+            self._publish()
+
+    async def _acquire_waiting(self) -> None:
+        """Like _acquire(), but await a free slot instead of rejecting."""
+        while True:
+            with self._lock:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    self._publish()
+                    return
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except BaseException:
+                with self._lock:
+                    try:
+                        self._waiters.remove((loop, waiter))
+                        popped = False
+                    except ValueError:
+                        popped = True
+                if popped:
+                    # A release already picked this waiter; pass the wakeup on
+                    # or the freed slot would sit idle.
+                    self._wake_one()
+                raise
+
+    def _wake_one(self) -> None:
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    return
+                loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+                return
+            except RuntimeError:
+                continue  # the waiter's loop is closed
+
+    def _set_running(self, delta: int) -> None:
+        with self._lock:
+            self._running += delta
+            self._publish()
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._publish()
+            has_waiters = bool(self._waiters)
+        if has_waiters:
+            self._wake_one()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn`` on the pool; when full, waits or raises ExecutorSaturatedError (see wait_when_full)."""
+        submitted = time.perf_counter()
+        if self.wait_when_full:
+            await self._acquire_waiting()
+        else:
+            self._acquire()
+
+        def _timed():
+            started = time.perf_counter()
+            EXECUTOR_QUEUE_WAIT.labels(executor=self.name).observe(started - submitted)
+            self._set_running(1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._set_running(-1)
+                EXECUTOR_RUN_TIME.labels(executor=self.name).observe(time.perf_counter() - started)
+
+        try:
+            # Like asyncio.to_thread, run in a copy of the caller's context.
+            future = self._pool.submit(contextvars.copy_context().run, _timed)
+        except Exception:
+            self._release()
+            raise
+        # Released when the thread finishes, even if the awaiting request is cancelled.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_bounded_executor(
+    name: str,
+    max_workers: int,
+    max_queue: int = 0,
+    wait_when_full: bool = False,
+) -> BoundedExecutor:
+    """Return the process-wide executor called ``name``, created on first use."""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = BoundedExecutor(
+                name, max_workers=max_workers, max_queue=max_queue, wait_when_full=wait_when_full
+            )
+            _executors[name] = executor
+        return executor
+
+
+def reset_bounded_executors() -> None:
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
@@ -0,0 +1,85 @@
+"""
+app/infra/cancellation.py
+
+Cooperative cancellation for agent runs.
+
+The worker creates one CancellationToken per run and installs it in the
+run's context. PlanningAgentService checks it between stages and tool
+steps; llm_chat switches to streaming while a token is installed, so a
+cancel closes the HTTP response to Ollama between chunks and generation
+stops instead of running to completion.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+_logger = logging.getLogger("cancellation")
+
+# Used when there is no completed-run history to estimate from.
+DEFAULT_RUN_SECONDS = 30.0
+
+
+class RunCancelledError(Exception):
+    """Raised inside a run once its cancellation token has been triggered."""
+
+
+class CancellationToken:
+    """Thread-safe flag shared by the run's coroutine and LLM worker threads."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Run cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelledError(self.reason or "Run cancelled")
+
+
+_current_token: ContextVar[Optional[CancellationToken]] = ContextVar("cancellation_token", default=None)
+
+
+def use_cancellation_token(token: Optional[CancellationToken]) -> None:
+    """Install ``token`` for the current async context (and tasks it spawns)."""
+    _current_token.set(token)
+
+
+def current_cancellation_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+def raise_if_cancelled() -> None:
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+async def estimate_run_seconds(db, sample_size: int = 50) -> float:
+    """Mean total latency of recent completed runs, used to estimate time saved."""
+    try:
+        traces = await db.traces.find(
+            {"status": "completed", "cache_hit": False},
+            {"latency": 1},
+        ).sort("timestamp", -1).to_list(length=sample_size)
+    except Exception as e:
+        _logger.warning(f"run duration estimate failed error={e}")
+        return DEFAULT_RUN_SECONDS
+
+    totals = [
+        float(trace["latency"]["total"])
+        for trace in traces
+        if isinstance(trace.get("latency"), dict) and isinstance(trace["latency"].get("total"), (int, float))
+    ]
+    return sum(totals) / len(totals) if totals else DEFAULT_RUN_SECONDS
@@ -1,16 +1,69 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_shutdown
+from kombu import Queue
+import logging
 import os
 
+# Named run queues. Workers subscribe with ``-Q`` so each queue gets its own
+# concurrency; interactive UI runs never wait behind eval or batch work.
+RUN_QUEUES = ("interactive", "batch", "eval")
+DEFAULT_RUN_QUEUE = "interactive"
+
 celery_app = Celery(
     "agent_worker",
     broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
     backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1"),
 )
 
+
+def queue_for_priority(priority: str | None) -> str:
+    return priority if priority in RUN_QUEUES else DEFAULT_RUN_QUEUE
+
+
+def route_agent_task(name, args, kwargs, options, task=None, **kw):
+    """Route agent runs to the queue named by their ``priority`` kwarg."""
+    if name != "agent.execute_run":
+        return None
+    return {"queue": queue_for_priority((kwargs or {}).get("priority"))}
+
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     task_acks_late=True,
     worker_prefetch_multiplier=1,
-)
\ No newline at end of file
+    task_queues=[Queue(name) for name in RUN_QUEUES],
+    task_default_queue=DEFAULT_RUN_QUEUE,
+    task_routes=(route_agent_task,),
+)
+
+
+@worker_init.connect
+def _start_worker_metrics_server(**_):
+    """
+    Expose worker-side metrics (queue wait, LLM timings) when WORKER_METRICS_PORT
+    is set. Served from the worker's main process, which is where runs execute
+    with the threads pool and the async runtime.
+    """
+    port = os.getenv("WORKER_METRICS_PORT")
+    if not port:
+        return
+    try:
+        from prometheus_client import start_http_server
+
+        start_http_server(int(port))
+    except OSError as e:
+        logging.getLogger("celery_app").warning(f"worker metrics server not started port={port} error={e}")
+
+
+@worker_process_init.connect
+@worker_shutdown.connect
+def _reset_async_runtime(**_):
+    """
+    Drop the async runtime on fork (a forked child must not reuse the
+    parent's loop thread) and stop its loop on shutdown.
+    """
+    from app.infra.async_runtime import reset_worker_runtime
+
+    reset_worker_runtime()
@@ -0,0 +1,74 @@
+"""
+app/infra/deadline.py
+
+Deadline propagation for agent runs.
+
+The worker installs one Deadline per run (RUN_TIMEOUT_SECONDS) in the run's
+context. TimeoutExecutor clamps each attempt to the time that is left,
+RetryPolicy skips retries that can no longer fit, and ReliableExecutor
+narrows the deadline per tool step with deadline_scope(), so a slow tool
+cannot eat the whole run before the router gets to its fallback.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when there is no time left in the current deadline."""
+
+
+class Deadline:
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at  # time.monotonic() based
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def use_deadline(deadline: Optional[Deadline]) -> None:
+    """Install ``deadline`` for the current async context (and tasks it spawns)."""
+    _current_deadline.set(deadline)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left in the current deadline, or None when there is none."""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """Narrow the current deadline to at most ``seconds`` from now for the block."""
+    outer = _current_deadline.get()
+    if seconds is None:
+        yield outer
+        return
+    inner = Deadline.after(seconds)
+    if outer is not None and outer.expires_at < inner.expires_at:
+        inner = outer
+    reset = _current_deadline.set(inner)
+    try:
+        yield inner
+    finally:
+        _current_deadline.reset(reset)
@@ -0,0 +1,226 @@
+"""
+app/infra/event_bus.py
+
+Run event fan-out for SSE streams.
+
+Workers persist every run event to ``run_events`` and then publish it
+here; SSE handlers subscribe per run and only touch Mongo once, for the
+Last-Event-ID catch-up. Backends (EVENT_BUS_BACKEND):
+
+    redis   — Redis pub/sub, one channel per run (default; works across processes)
+    memory  — in-process broker (tests, single-process dev)
+    poll    — no bus; SSE handlers fall back to polling run_events
+
+A bus that cannot be reached (subscribe or receive fails) also degrades to
+polling run_events rather than failing the stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+_logger = logging.getLogger("event_bus")
+
+CHANNEL_PREFIX = "run_events:"
+
+
+class Subscription(ABC):
+    """Per-run subscription handle. Use as an async context manager."""
+
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if none arrives within ``timeout`` seconds."""
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class EventBus(ABC):
+
+    @abstractmethod
+    async def publish(self, run_id: str, event: Dict[str, Any]) -> None:
+        pass
+
+    async def publish_many(self, run_id: str, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            await self.publish(run_id, event)
+
+    @abstractmethod
+    async def subscribe(self, run_id: str) -> Subscription:
+        pass
+
+
+# ============================================================
+# In-process broker
+# ============================================================
+
+class _MemorySubscription(Subscription):
+
+    def __init__(self, bus: "InMemoryEventBus", run_id: str):
+        self._bus = bus
+        self._run_id = run_id
+        self._loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        # Publishers may live on another loop/thread (e.g. a worker thread).
+        self._loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        # Not wait_for(): on 3.11 it swallows a cancel that races with a
+        # delivered event, which left cancelled subscribers looping forever.
+        getter = asyncio.ensure_future(self.queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        return getter.result() if done else None
+
+    async def close(self) -> None:
+        self._bus._unsubscribe(self._run_id, self)
+
+
+class InMemoryEventBus(EventBus):
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[_MemorySubscription]] = defaultdict(set)
+
+    async def publish(self, run_id: str, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscribers.get(run_id, ())):
+            subscription.deliver(event)
+
+    async def subscribe(self, run_id: str) -> Subscription:
+        subscription = _MemorySubscription(self, run_id)
+        self._subscribers[run_id].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, run_id: str, subscription: _MemorySubscription) -> None:
+        subscribers = self._subscribers.get(run_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            self._subscribers.pop(run_id, None)
+
+    def subscriber_count(self, run_id: str) -> int:
+        return len(self._subscribers.get(run_id, ()))
+
+
+# ============================================================
+# Redis pub/sub
+# ============================================================
+
+class _RedisSubscription(Subscription):
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not message or message.get("type") != "message":
+            return None
+        try:
+            return json.loads(message["data"])
+        except (TypeError, ValueError):
+            return None
+
+    async def close(self) -> None:
+        try:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+        except Exception as e:
+            _logger.warning(f"event_bus unsubscribe failed error={e}")
+
+
+class RedisEventBus(EventBus):
+    """
+    Publishes through a sync client (safe from the per-task event loops in
+    Celery workers); subscribes through an asyncio client owned by the API loop.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._sync_client = None
+        self._async_client = None
+
+    def _publisher(self):
+        if self._sync_client is None:
+            import redis
+
+            self._sync_client = redis.from_url(self.url)
+        return self._sync_client
+
+    def _subscriber(self):
+        if self._async_client is None:
+            import redis.asyncio as aioredis
+
+            self._async_client = aioredis.from_url(self.url)
+        return self._async_client
+
+    async def publish(self, run_id: str, event: Dict[str, Any]) -> None:
+        await self.publish_many(run_id, [event])
+
+    async def publish_many(self, run_id: str, events: List[Dict[str, Any]]) -> None:
+        channel = CHANNEL_PREFIX + run_id
+        payloads = [json.dumps(event, default=str) for event in events]
+
+        def _send():
+            pipeline = self._publisher().pipeline(transaction=False)
+            for payload in payloads:
+                pipeline.publish(channel, payload)
+            pipeline.execute()
+
+        await asyncio.to_thread(_send)
+
+    async def subscribe(self, run_id: str) -> Subscription:
+        pubsub = self._subscriber().pubsub()
+        await pubsub.subscribe(CHANNEL_PREFIX + run_id)
+        return _RedisSubscription(pubsub)
+
+
+# ============================================================
+# Factory
+# ============================================================
+
+_event_bus: Optional[EventBus] = None
+_event_bus_backend: Optional[str] = None
+
+
+def get_event_bus() -> Optional[EventBus]:
+    """Return the process-wide bus, or None when EVENT_BUS_BACKEND=poll."""
+    global _event_bus, _event_bus_backend
+    backend = os.getenv("EVENT_BUS_BACKEND", "redis").strip().lower()
+    if backend != _event_bus_backend:
+        _event_bus_backend = backend
+        if backend == "memory":
+            _event_bus = InMemoryEventBus()
+        elif backend == "redis":
+            url = os.getenv("EVENT_BUS_REDIS_URL") or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+            _event_bus = RedisEventBus(url)
+        else:
+            _event_bus = None
+    return _event_bus
+
+
+async def publish_run_events(run_id: str, events: List[Dict[str, Any]]) -> None:
+    """Best-effort publish; the persisted events remain the source of truth."""
+    bus = get_event_bus()
+    if bus is None or not events:
+        return
+    try:
+        await bus.publish_many(run_id, events)
+    except Exception as e:
+        _logger.warning(f"event_bus publish failed run_id={run_id} error={e}")
@@ -0,0 +1,121 @@
+"""
+app/infra/json_repair.py
+
+Tolerant JSON parsing for LLM output.
+Handles the common near-misses (markdown fences, prose around the object,
+trailing commas) locally so they never cost an LLM repair round trip.
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced ``{...}`` block in ``text``.
+    Braces inside string literals are ignored.
+    """
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                continue
+
+            if char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:index + 1]
+
+        # Unbalanced from this brace; try the next opening brace.
+        start = text.find("{", start + 1)
+    return None
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before ``}`` or ``]`` outside string literals."""
+    out = []
+    in_string = False
+    escaped = False
+    pending_comma = None
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if pending_comma is not None:
+            if char.isspace():
+                pending_comma.append(char)
+                continue
+            if char not in "}]":
+                out.extend(pending_comma)
+            else:
+                out.extend(pending_comma[1:])
+            pending_comma = None
+
+        if char == ",":
+            pending_comma = [char]
+            continue
+
+        if char == '"':
+            in_string = True
+        out.append(char)
+
+    if pending_comma is not None:
+        out.extend(pending_comma)
+    return "".join(out)
+
+
+def loads_tolerant(text: Any) -> Any:
+    """
+    Parse ``text`` as JSON, falling back to fence stripping, object
+    extraction and trailing-comma repair. Raises ValueError when nothing
+    parseable is found.
+    """
+    if isinstance(text, (dict, list)):
+        return text
+    if not isinstance(text, str):
+        raise ValueError("JSON input must be a string.")
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    candidate = _FENCE_RE.sub("", text)
+    extracted = extract_json_object(candidate)
+    if extracted is None:
+        raise ValueError("No JSON object found.")
+
+    try:
+        return json.loads(extracted)
+    except ValueError:
+        pass
+
+    try:
+        return json.loads(strip_trailing_commas(extracted))
+    except ValueError as exc:
+        raise ValueError(f"Unrepairable JSON: {exc}") from exc
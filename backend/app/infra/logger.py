@@ -1,7 +1,7 @@
 import logging
 import json
 import uuid
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
 # ============================================================
 # PROMETHEUS METRICS
@@ -18,6 +18,32 @@ REQUEST_LATENCY = Histogram(
     buckets=(0.1, 0.3, 0.5, 1, 2, 5, 10, 20)
 )
 
+RUN_SUBMIT_COUNTER = Counter(
+    "agent_run_submit_total",
+    "Async run submissions by path (queued|cache_fast_path)",
+    ["path"]
+)
+
+RUN_QUEUE_WAIT = Histogram(
+    "agent_run_queue_wait_seconds",
+    "Time an async run waited in its Celery queue before a worker picked it up",
+    ["queue"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+)
+
+RUN_CANCEL_COUNTER = Counter(
+    "agent_run_cancellations_total",
+    "Cancelled runs by the stage they were in (queued|running)",
+    ["stage"]
+)
+
+RUN_CANCEL_SAVED_SECONDS = Histogram(
+    "agent_run_cancel_saved_seconds",
+    "Estimated worker/LLM time saved by cancelling (recent mean run time minus elapsed)",
+    ["stage"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+
 TOOL_EXECUTION_COUNTER = Counter(
     "agent_tool_execution_total",
     "Total tool executions",
@@ -31,6 +57,12 @@ TOOL_EXECUTION_LATENCY = Histogram(
     buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5)
 )
 
+TOOL_CACHE_COUNTER = Counter(
+    "agent_tool_cache_total",
+    "Tool result cache lookups and evictions",
+    ["tool_name", "result"]
+)
+
 MEMORY_HIT_COUNTER = Counter(
     "agent_memory_hits_total",
     "Memory retrieval hits",
@@ -55,8 +87,23 @@ LLM_CALL_COUNTER = Counter(
 
 LLM_CALL_LATENCY = Histogram(
     "llm_call_latency_seconds",
-    "LLM inference latency per call",
-    buckets=(0.5, 1, 2, 5, 10, 15, 20, 30)
+    "LLM inference latency per call (phase=total|load|prompt_eval|eval)",
+    ["call_site", "phase"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 20, 30)
+)
+
+LLM_TOKEN_COUNT = Histogram(
+    "llm_tokens_per_call",
+    "Tokens processed per LLM call (kind=prompt|eval)",
+    ["call_site", "kind"],
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "LLM throughput per call (kind=prompt|eval)",
+    ["call_site", "kind"],
+    buckets=(1, 2, 5, 10, 20, 40, 80, 160, 320, 640, 1280)
 )
 
 LLM_FAILURE_COUNTER = Counter(
@@ -65,6 +112,104 @@ LLM_FAILURE_COUNTER = Counter(
     ["error_type"]
 )
 
+PLANNER_PARSE_COUNTER = Counter(
+    "agent_planner_parse_total",
+    "Planner output parses by outcome (strict|local_repair|llm_repair|failed)",
+    ["outcome"]
+)
+
+EXECUTOR_IN_FLIGHT = Gauge(
+    "agent_executor_in_flight",
+    "Calls running or queued on a bounded executor",
+    ["executor"]
+)
+
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "agent_executor_queue_wait_seconds",
+    "Time a call waited for a bounded executor thread",
+    ["executor"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+EXECUTOR_RUN_TIME = Histogram(
+    "agent_executor_run_seconds",
+    "Time a call ran on a bounded executor thread",
+    ["executor"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "agent_executor_queue_depth",
+    "Calls admitted to a bounded executor but still waiting for a thread",
+    ["executor"]
+)
+
+EXECUTOR_SATURATION = Gauge(
+    "agent_executor_saturation_ratio",
+    "In-flight calls as a fraction of a bounded executor's admission limit",
+    ["executor"]
+)
+
+EXECUTOR_REJECTED = Counter(
+    "agent_executor_rejected_total",
+    "Calls rejected because a bounded executor was saturated",
+    ["executor"]
+)
+
+AUTH_LOGIN_LATENCY = Histogram(
+    "agent_auth_login_latency_seconds",
+    "Login handler latency by outcome (success|invalid|rejected)",
+    ["outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+REQUEST_BODY_REJECTED = Counter(
+    "agent_request_body_rejected_total",
+    "Requests answered with 413 by reason (content_length|streamed)",
+    ["reason"]
+)
+
+TOOL_HEDGE_COUNTER = Counter(
+    "agent_tool_hedges_total",
+    "Hedged tool executions by which attempt succeeded first (primary|hedge|none)",
+    ["tool_name", "winner"]
+)
+
+RATE_LIMIT_REJECTED = Counter(
+    "agent_rate_limit_rejected_total",
+    "Requests or in-run calls rejected by a rate limit or quota",
+    ["limit"]
+)
+
+CIRCUIT_STATE = Gauge(
+    "agent_circuit_state",
+    "Circuit breaker state (0=closed, 1=half_open, 2=open)",
+    ["name"]
+)
+
+CIRCUIT_TRANSITIONS = Counter(
+    "agent_circuit_transitions_total",
+    "Circuit breaker state changes",
+    ["name", "from_state", "to_state"]
+)
+
+CIRCUIT_REJECTED = Counter(
+    "agent_circuit_rejected_total",
+    "Calls rejected by an open circuit or the half-open probe limit",
+    ["name"]
+)
+
+ROUTER_SPECULATION_COUNTER = Counter(
+    "agent_router_speculative_fallbacks_total",
+    "Speculative web_search calls started alongside rag_search, by outcome (used|wasted)",
+    ["outcome"]
+)
+
+ROUTER_SPECULATION_SAVED = Counter(
+    "agent_router_speculation_saved_seconds_total",
+    "Latency saved by running the web_search fallback concurrently with rag_search"
+)
+
 def metrics_response():
     return generate_latest(), CONTENT_TYPE_LATEST
 
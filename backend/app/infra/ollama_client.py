@@ -3,7 +3,16 @@ app/infra/ollama_client.py
 Worker-local singleton Ollama client with:
   - hard timeout (30s)
   - concurrency guard (semaphore)
+  - pinned keep_alive so the model (and its prompt cache) stays loaded
   - inference observability (latency + success/failure metrics)
+  - Ollama timing counters (load, prompt eval, decode) per call site,
+    mirrored into the current run's trace via record_llm_calls()
+  - cooperative cancellation: with a run CancellationToken installed the
+    call streams and closes the connection as soon as the run is cancelled
+  - LLM token quota: checked before the call and charged after it for the
+    current run's QuotaSubject (see rate_limits.use_quota_subject)
+  - an ``on_chunk`` hook that sees streamed content as it is generated and
+    can stop generation by raising (streaming guardrails)
 
 After Gunicorn forks, each worker gets its own _client instance
 on first call to get_ollama_client(). No shared sockets, no stale
@@ -15,15 +24,23 @@ import time
 import asyncio
 import logging
 import requests
+from contextvars import ContextVar
 from ollama import Client
 
+from typing import Callable, Optional
+
+from .cancellation import CancellationToken, RunCancelledError, current_cancellation_token
+from .rate_limits import ensure_llm_budget, spend_llm_tokens
 from .logger import (
     LLM_CALL_COUNTER,
     LLM_CALL_LATENCY,
     LLM_FAILURE_COUNTER,
+    LLM_TOKEN_COUNT,
+    LLM_TOKENS_PER_SECOND,
     StructuredLogger,
 )
 
+from .bounded_executor import BoundedExecutor, get_bounded_executor
 from ..reliability.circuit_breaker import CircuitBreaker
 
 _client = None
@@ -37,10 +54,80 @@ _llm_circuit = CircuitBreaker(
     failure_threshold=4,
     recovery_timeout=30,
     execution_timeout=150,  # Longer for slow inference
-    name="llm"
+    name="llm",
+    slow_call_duration=120,
+    minimum_calls=10,
+    window_seconds=120,
+    half_open_max_calls=1,  # one probe while Ollama reloads the model
 )
 
 
+# Per-run list of timing records; set by record_llm_calls() for the current task.
+_llm_call_records: ContextVar[list | None] = ContextVar("llm_call_records", default=None)
+
+
+def record_llm_calls() -> list:
+    """
+    Start collecting timing records for LLM calls made from the current
+    async context. Returns the (live) list the records are appended to.
+    """
+    records: list = []
+    _llm_call_records.set(records)
+    return records
+
+
+def current_llm_calls() -> list:
+    """Return the records collected since the last record_llm_calls()."""
+    return _llm_call_records.get() or []
+
+
+def extract_llm_timings(response) -> dict:
+    """
+    Convert Ollama's nanosecond counters into seconds and tokens/sec.
+    Missing counters (mocked clients, older servers) are reported as None.
+    """
+    def _field(name):
+        value = response.get(name) if hasattr(response, "get") else None
+        return value if isinstance(value, (int, float)) else None
+
+    def _seconds(name):
+        value = _field(name)
+        return value / 1e9 if value is not None else None
+
+    def _rate(count, seconds):
+        if count is None or not seconds:
+            return None
+        return count / seconds
+
+    prompt_eval_count = _field("prompt_eval_count")
+    eval_count = _field("eval_count")
+    prompt_eval = _seconds("prompt_eval_duration")
+    eval_duration = _seconds("eval_duration")
+    return {
+        "load_duration": _seconds("load_duration"),
+        "prompt_eval_count": prompt_eval_count,
+        "prompt_eval_duration": prompt_eval,
+        "prompt_tokens_per_sec": _rate(prompt_eval_count, prompt_eval),
+        "eval_count": eval_count,
+        "eval_duration": eval_duration,
+        "eval_tokens_per_sec": _rate(eval_count, eval_duration),
+    }
+
+
+def _observe_llm_timings(call_site: str, timings: dict) -> None:
+    for phase, key in (("load", "load_duration"), ("prompt_eval", "prompt_eval_duration"), ("eval", "eval_duration")):
+        if timings[key] is not None:
+            LLM_CALL_LATENCY.labels(call_site=call_site, phase=phase).observe(timings[key])
+
+    for kind in ("prompt", "eval"):
+        count = timings["prompt_eval_count" if kind == "prompt" else "eval_count"]
+        if count is not None:
+            LLM_TOKEN_COUNT.labels(call_site=call_site, kind=kind).observe(count)
+        rate = timings[f"{kind}_tokens_per_sec"]
+        if rate is not None:
+            LLM_TOKENS_PER_SECOND.labels(call_site=call_site, kind=kind).observe(rate)
+
+
 def get_ollama_client() -> Client:
     """Return a worker-local cached Ollama Client (singleton per process)."""
     global _client
@@ -57,6 +144,11 @@ def get_ollama_model() -> str:
     return os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q4_K_M")
 
 
+def get_ollama_keep_alive() -> str:
+    """Return how long Ollama should keep the model loaded between calls."""
+    return os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+
 def get_llm_semaphore() -> asyncio.Semaphore:
     """Return a worker-local LLM concurrency semaphore (max 2 parallel calls)."""
     global _llm_semaphore
@@ -66,20 +158,131 @@ def get_llm_semaphore() -> asyncio.Semaphore:
     return _llm_semaphore
 
 
-async def llm_chat(client: Client, **kwargs) -> dict:
+def get_llm_bulkhead() -> BoundedExecutor:
+    """
+    Dedicated threads for blocking Ollama calls. A call abandoned by the
+    circuit breaker's timeout keeps its thread until Ollama answers; the
+    bulkhead caps how many of those can pile up without touching the
+    default executor tools and Redis calls use.
+
+    Unlike the tool bulkheads it never rejects: planner, synthesis and
+    judge calls beyond LLM_BULKHEAD_WORKERS + LLM_BULKHEAD_QUEUE wait for a
+    slot (bounded by the run deadline) rather than failing the whole run.
+    """
+    return get_bounded_executor(
+        "llm",
+        max_workers=int(os.getenv("LLM_BULKHEAD_WORKERS", "4")),
+        max_queue=int(os.getenv("LLM_BULKHEAD_QUEUE", "4")),
+        wait_when_full=True,
+    )
+
+
+def _as_dict(chunk) -> dict:
+    if isinstance(chunk, dict):
+        return chunk
+    if hasattr(chunk, "model_dump"):
+        return chunk.model_dump()
+    return dict(chunk)
+
+
+def _chat_until_cancelled(
+    client: Client,
+    token: Optional[CancellationToken],
+    kwargs: dict,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    aborted: Optional[list] = None,
+    streamed: Optional[dict] = None,
+) -> dict:
+    """
+    Stream a chat completion, checking ``token`` between chunks. Closing the
+    stream drops the HTTP response, which makes Ollama stop generating.
+    Returns a non-streaming-shaped response (content joined, final counters).
+
+    ``on_chunk`` gets each piece of content; if it raises, generation stops
+    and the exception is appended to ``aborted`` instead of propagating, so
+    the circuit breaker does not count a guardrail block as an LLM failure.
+
+    Ollama only reports counters on the final chunk, so ``streamed`` keeps a
+    running ``eval_count`` (one token per content chunk) for a stream that
+    is cut short by cancellation or ``on_chunk``.
+    """
+    if token is not None:
+        token.raise_if_cancelled()
+    stream = client.chat(stream=True, **kwargs)
+    parts: list[str] = []
+    final: dict = {}
+    if streamed is None:
+        streamed = {}
+    streamed["eval_count"] = 0
+    try:
+        for chunk in stream:
+            if token is not None and token.cancelled:
+                raise RunCancelledError(token.reason or "Run cancelled")
+            chunk = _as_dict(chunk)
+            message = chunk.get("message") or {}
+            content = message.get("content") or ""
+            parts.append(content)
+            if content:
+                streamed["eval_count"] += 1
+            if on_chunk is not None and content:
+                try:
+                    on_chunk(content)
+                except Exception as exc:
+                    if aborted is None:
+                        raise
+                    aborted.append(exc)
+                    final = {"done_reason": "aborted", "eval_count": streamed["eval_count"]}
+                    break
+            if chunk.get("done"):
+                final = chunk
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    response = {key: value for key, value in final.items() if key != "message"}
+    response["message"] = {"role": "assistant", "content": "".join(parts)}
+    return response
+
+
+async def llm_chat(
+    client: Client,
+    call_site: str = "unknown",
+    on_chunk: Optional[Callable[[str], None]] = None,
+    **kwargs,
+) -> dict:
     """
     Observable wrapper around client.chat() with Circuit Breaker protection.
 
+    ``call_site`` labels the metrics (planner, repair, synthesis, judge, ...).
+
+    ``on_chunk`` streams the completion and is called with each piece of
+    content on the worker thread; an exception it raises stops generation
+    and is re-raised here once the call has been recorded.
+
     Automatically records:
-      - inference latency (Prometheus histogram)
+      - inference latency (Prometheus histogram, phase="total")
+      - load / prompt eval / decode time reported by Ollama (other phases)
+      - prompt and decode token counts and tokens/sec
       - success/failure counts (Prometheus counters)
+      - a timing record on the current run (see record_llm_calls)
       - structured log entry with duration
     """
     model = kwargs.get("model", "unknown")
+    kwargs.setdefault("keep_alive", get_ollama_keep_alive())
+    token = current_cancellation_token()
+    aborted: list = []
+    streamed: dict = {}
 
     async def _chat_call():
-        # ollama.Client.chat is sync, wrap in to_thread
-        return await asyncio.to_thread(client.chat, **kwargs)
+        # ollama.Client.chat is sync, run it on the LLM bulkhead
+        bulkhead = get_llm_bulkhead()
+        if (token is not None or on_chunk is not None) and not kwargs.get("stream"):
+            return await bulkhead.run(_chat_until_cancelled, client, token, kwargs, on_chunk, aborted, streamed)
+        return await bulkhead.run(client.chat, **kwargs)
+
+    # Outside the try: an exhausted quota is not an LLM failure.
+    await ensure_llm_budget()
 
     start = time.time()
     try:
@@ -89,21 +292,57 @@ async def llm_chat(client: Client, **kwargs) -> dict:
 
         # Prometheus metrics
         LLM_CALL_COUNTER.labels(status="success").inc()
-        LLM_CALL_LATENCY.observe(duration)
+        LLM_CALL_LATENCY.labels(call_site=call_site, phase="total").observe(duration)
+
+        timings = extract_llm_timings(response)
+        _observe_llm_timings(call_site, timings)
+        await spend_llm_tokens((timings["prompt_eval_count"] or 0) + (timings["eval_count"] or 0))
+
+        records = _llm_call_records.get()
+        if records is not None:
+            record = {"call_site": call_site, "model": model, "duration": duration, **timings}
+            if aborted:
+                record["aborted"] = True
+            records.append(record)
 
         # Structured log
         _logger.info(
-            f"llm_call model={model} duration={duration:.2f}s status=success"
+            f"llm_call site={call_site} model={model} duration={duration:.2f}s "
+            f"load={timings['load_duration'] or 0:.2f}s "
+            f"prompt_eval={timings['prompt_eval_duration'] or 0:.2f}s "
+            f"eval_tps={timings['eval_tokens_per_sec'] or 0:.1f} "
+            f"status={'aborted' if aborted else 'success'}"
         )
 
-        return response
+        if not aborted:
+            return response
+
+    except RunCancelledError:
+        duration = time.time() - start
+        LLM_CALL_COUNTER.labels(status="cancelled").inc()
+        # Tokens generated before the stream was closed were still spent.
+        eval_count = streamed.get("eval_count")
+        await spend_llm_tokens(eval_count or 0)
+        records = _llm_call_records.get()
+        if records is not None:
+            records.append({
+                "call_site": call_site,
+                "model": model,
+                "duration": duration,
+                "eval_count": eval_count,
+                "cancelled": True,
+            })
+        _logger.info(
+            f"llm_call site={call_site} model={model} duration={duration:.2f}s status=cancelled"
+        )
+        raise
 
     except asyncio.TimeoutError as e:
         duration = time.time() - start
         LLM_CALL_COUNTER.labels(status="error").inc()
         LLM_FAILURE_COUNTER.labels(error_type="timeout").inc()
         _logger.error(
-            f"llm_call model={model} duration={duration:.2f}s status=timeout"
+            f"llm_call site={call_site} model={model} duration={duration:.2f}s status=timeout"
         )
         raise RuntimeError("LLM request timed out (circuit breaker)") from e
 
@@ -112,7 +351,7 @@ async def llm_chat(client: Client, **kwargs) -> dict:
         LLM_CALL_COUNTER.labels(status="error").inc()
         LLM_FAILURE_COUNTER.labels(error_type="connection").inc()
         _logger.error(
-            f"llm_call model={model} duration={duration:.2f}s status=connection_error"
+            f"llm_call site={call_site} model={model} duration={duration:.2f}s status=connection_error"
         )
         raise RuntimeError("LLM unavailable") from e
 
@@ -122,6 +361,10 @@ async def llm_chat(client: Client, **kwargs) -> dict:
         LLM_CALL_COUNTER.labels(status="error").inc()
         LLM_FAILURE_COUNTER.labels(error_type="general").inc()
         _logger.error(
-            f"llm_call model={model} duration={duration:.2f}s status=error error={e}"
+            f"llm_call site={call_site} model={model} duration={duration:.2f}s status=error error={e}"
         )
         raise e
+
+    # Outside the try: the hook's own error (e.g. a GuardrailViolation) is
+    # not an LLM failure.
+    raise aborted[0]
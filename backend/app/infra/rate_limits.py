@@ -0,0 +1,392 @@
+"""
+app/infra/rate_limits.py
+
+Per-user / per-agent rate limits and usage quotas.
+
+Two kinds of limit, both keyed by user (limits chosen by role) and agent:
+
+    rate    — token buckets on run submission (POST /api/runs/submit,
+              submit-batch, /agent/run); a batch takes one token per run
+              from the same buckets, it is only allowed a larger burst
+    budget  — LLM tokens and tool calls per fixed window (QUOTA_WINDOW_SECONDS)
+
+Buckets are stored as a GCRA "theoretical arrival time", one number per key,
+which behaves exactly like a token bucket of size ``burst`` refilled at
+``rate``. Budgets are plain counters per window.
+
+Rejections raise RateLimitExceeded carrying ``retry_after`` (seconds); the
+API turns it into 429 + Retry-After. Inside a run (worker or /agent/run),
+use_quota_subject() names who pays: llm_chat() and the tool loop then check
+the budgets before each call and charge actual usage after it, so one call
+can overshoot a budget by its own size, never more. Tool calls the run
+could do without (hedges, speculative fallbacks, stale-cache refreshes) are
+charged too, but once the budget is spent they are skipped rather than
+failing the run.
+
+Limits (``0`` = unlimited; a ``_<ROLE>`` suffix overrides per role, e.g.
+RUN_SUBMIT_RATE_PER_MINUTE_ADMIN=0):
+
+    RUN_SUBMIT_RATE_PER_MINUTE / RUN_SUBMIT_BURST     per user
+    AGENT_RUN_RATE_PER_MINUTE / AGENT_RUN_BURST       per agent, all users
+    RUN_BATCH_BURST                                   burst for submit-batch, both buckets
+    LLM_TOKEN_BUDGET / TOOL_CALL_BUDGET               per user per window
+    AGENT_LLM_TOKEN_BUDGET / AGENT_TOOL_CALL_BUDGET   per agent per window, all users
+
+Backends (RATE_LIMIT_BACKEND): ``redis`` (shared by all API processes and
+workers) or ``memory`` (per process; tests, single-process dev). A store
+that cannot be reached fails open with a warning rather than failing runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from app.config.runtime import env_flag
+from app.infra.logger import RATE_LIMIT_REJECTED
+
+_logger = logging.getLogger("rate_limits")
+
+KEY_PREFIX = "ratelimit:"
+
+DEFAULT_LLM_TOKEN_BUDGET = 500_000
+DEFAULT_TOOL_CALL_BUDGET = 2_000
+DEFAULT_BATCH_BURST = 500
+
+
+class RateLimitExceeded(Exception):
+    """
+    A rate limit or quota is exhausted; retry after ``retry_after`` seconds.
+    ``retryable`` is False when the request can never be admitted as sent
+    (it costs more than the bucket holds).
+    """
+
+    def __init__(self, limit: str, retry_after: float, message: Optional[str] = None, retryable: bool = True):
+        super().__init__(message or f"Rate limit exceeded: {limit}")
+        self.limit = limit
+        self.retry_after = max(retry_after, 0.0)
+        self.retryable = retryable
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass(frozen=True)
+class QuotaSubject:
+    user_id: str
+    role: str = "developer"
+    agent_id: Optional[str] = None
+
+
+# ============================================================
+# Stores
+# ============================================================
+
+class RateLimitStore(ABC):
+
+    @abstractmethod
+    async def acquire(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        """Take ``cost`` tokens; 0.0 when allowed, else seconds until they would be."""
+
+    @abstractmethod
+    async def usage(self, key: str, window: int) -> Tuple[int, float]:
+        """(amount charged in the current window, seconds until it resets)."""
+
+    @abstractmethod
+    async def charge(self, key: str, amount: int, window: int) -> int:
+        """Add ``amount`` to the current window; returns the new window total."""
+
+
+def _window(window: int, now: float) -> Tuple[int, float]:
+    index = int(now // window)
+    return index, (index + 1) * window - now
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+        self._counters: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        interval = 1.0 / rate
+        now = time.time()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + interval * cost
+            allow_at = new_tat - interval * burst
+            if allow_at > now:
+                return allow_at - now
+            self._tat[key] = new_tat
+            return 0.0
+
+    async def usage(self, key: str, window: int) -> Tuple[int, float]:
+        index, reset_in = _window(window, time.time())
+        with self._lock:
+            return self._counters.get((key, index), 0), reset_in
+
+    async def charge(self, key: str, amount: int, window: int) -> int:
+        index, _ = _window(window, time.time())
+        with self._lock:
+            # Drop counters of windows that have already ended.
+            for stale in [k for k in self._counters if k[0] == key and k[1] < index]:
+                del self._counters[stale]
+            total = self._counters.get((key, index), 0) + amount
+            self._counters[(key, index)] = total
+            return total
+
+
+# KEYS[1] bucket; ARGV: now, interval, burst, cost. Returns retry-after (ms) or 0.
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - interval * burst
+if allow_at > now then
+  return math.ceil((allow_at - now) * 1000)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return 0
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Buckets via one Lua script call, budgets via INCRBY + EXPIRE. Uses a sync
+    client off the loop (safe from the per-task event loops in Celery workers).
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None):
+        self.url = url
+        self._client = client
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.from_url(self.url, socket_timeout=1.0)
+        return self._client
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        retry_ms = await asyncio.to_thread(
+            self._redis().eval, _GCRA_SCRIPT, 1, KEY_PREFIX + key, time.time(), 1.0 / rate, burst, cost,
+        )
+        return int(retry_ms) / 1000
+
+    async def usage(self, key: str, window: int) -> Tuple[int, float]:
+        index, reset_in = _window(window, time.time())
+        value = await asyncio.to_thread(self._redis().get, f"{KEY_PREFIX}{key}:{index}")
+        return int(value or 0), reset_in
+
+    async def charge(self, key: str, amount: int, window: int) -> int:
+        index, reset_in = _window(window, time.time())
+        counter = f"{KEY_PREFIX}{key}:{index}"
+
+        def _incr():
+            pipeline = self._redis().pipeline(transaction=False)
+            pipeline.incrby(counter, amount)
+            pipeline.expire(counter, int(reset_in) + 60)
+            return pipeline.execute()[0]
+
+        return int(await asyncio.to_thread(_incr))
+
+
+_store: Optional[RateLimitStore] = None
+_store_backend: Optional[str] = None
+
+
+def get_rate_limit_store() -> RateLimitStore:
+    global _store, _store_backend
+    backend = os.getenv("RATE_LIMIT_BACKEND", "redis").strip().lower()
+    if backend != _store_backend:
+        _store_backend = backend
+        if backend == "memory":
+            _store = InMemoryRateLimitStore()
+        else:
+            url = os.getenv("RATE_LIMIT_REDIS_URL") or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+            _store = RedisRateLimitStore(url)
+    return _store
+
+
+def reset_rate_limit_store() -> None:
+    global _store, _store_backend
+    _store = None
+    _store_backend = None
+
+
+# ============================================================
+# Limits
+# ============================================================
+
+def rate_limits_enabled() -> bool:
+    return env_flag("RATE_LIMITS_ENABLED", True)
+
+
+def _limit(name: str, role: Optional[str], default: float) -> float:
+    raw = os.getenv(f"{name}_{role.upper()}") if role else None
+    if raw is None:
+        raw = os.getenv(name)
+    try:
+        return float(raw) if raw is not None else default
+    except ValueError:
+        return default
+
+
+def _quota_window() -> int:
+    return max(1, int(_limit("QUOTA_WINDOW_SECONDS", None, 3600)))
+
+
+async def _guarded(operation, fallback):
+    try:
+        return await operation
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        _logger.warning(f"rate limit store unavailable, allowing request error={e}")
+        return fallback
+
+
+def _burst(name: str, role: Optional[str], default: float) -> int:
+    return max(1, int(_limit(name, role, default)))
+
+
+async def _take(key: str, name: str, role: Optional[str], burst: int, default_rate: float, cost: int) -> None:
+    per_minute = _limit(name, role, default_rate)
+    if per_minute <= 0:
+        return
+    if cost > burst:
+        RATE_LIMIT_REJECTED.labels(limit=name.lower()).inc()
+        raise RateLimitExceeded(
+            name.lower(), 0.0, f"Request of {cost} runs exceeds the burst limit of {burst}", retryable=False,
+        )
+    retry_after = await _guarded(get_rate_limit_store().acquire(key, per_minute / 60.0, burst, cost), 0.0)
+    if retry_after > 0:
+        RATE_LIMIT_REJECTED.labels(limit=name.lower()).inc()
+        raise RateLimitExceeded(name.lower(), retry_after)
+
+
+def _budgets(subject: QuotaSubject, name: str, default: float) -> List[Tuple[str, str, float]]:
+    """(limit name, counter key, budget) for each enabled budget ``subject`` draws on."""
+    budgets = []
+    user_budget = _limit(name, subject.role, default)
+    if user_budget > 0:
+        budgets.append((name.lower(), f"{name.lower()}:{subject.user_id}", user_budget))
+    if subject.agent_id:
+        agent_name = f"AGENT_{name}"
+        agent_budget = _limit(agent_name, None, 0)
+        if agent_budget > 0:
+            budgets.append((agent_name.lower(), f"{name.lower()}:agent:{subject.agent_id}", agent_budget))
+    return budgets
+
+
+async def _check_budget(subject: QuotaSubject, name: str, default: float) -> None:
+    for limit, key, budget in _budgets(subject, name, default):
+        used, reset_in = await _guarded(get_rate_limit_store().usage(key, _quota_window()), (0, 0.0))
+        if used >= budget:
+            RATE_LIMIT_REJECTED.labels(limit=limit).inc()
+            raise RateLimitExceeded(limit, reset_in, f"Quota exhausted: {limit} ({int(used)}/{int(budget)})")
+
+
+async def _charge(subject: QuotaSubject, name: str, default: float, amount: int) -> None:
+    if amount <= 0:
+        return
+    for _, key, _ in _budgets(subject, name, default):
+        await _guarded(get_rate_limit_store().charge(key, amount, _quota_window()), 0)
+
+
+async def check_run_submission(
+    subject: QuotaSubject,
+    runs: int = 1,
+    batch: bool = False,
+    agent_runs: Optional[Dict[str, int]] = None,
+) -> None:
+    """
+    Admit ``runs`` new runs for ``subject`` or raise RateLimitExceeded.
+    Batches are charged against the same per-user and per-agent buckets as
+    single submits and only get a larger burst (RUN_BATCH_BURST), so a big
+    batch delays the user's (and the agent's) next submissions instead of
+    bypassing their rate. ``agent_runs`` splits the runs of a batch that
+    spans several agents by agent id; by default all of them go to
+    ``subject.agent_id``.
+    """
+    if not rate_limits_enabled():
+        return
+    if agent_runs is None:
+        agent_runs = {subject.agent_id: runs} if subject.agent_id else {}
+    # Read-only checks first, so a rejected request takes no bucket tokens.
+    for payer in [replace(subject, agent_id=agent_id) for agent_id in agent_runs] or [subject]:
+        await _check_budget(payer, "LLM_TOKEN_BUDGET", DEFAULT_LLM_TOKEN_BUDGET)
+        await _check_budget(payer, "TOOL_CALL_BUDGET", DEFAULT_TOOL_CALL_BUDGET)
+    user_burst = _burst("RUN_SUBMIT_BURST", subject.role, 10)
+    agent_burst = _burst("AGENT_RUN_BURST", None, 30)
+    if batch:
+        batch_burst = _burst("RUN_BATCH_BURST", subject.role, DEFAULT_BATCH_BURST)
+        user_burst = max(user_burst, batch_burst)
+        agent_burst = max(agent_burst, batch_burst)
+    await _take(f"runs:user:{subject.user_id}", "RUN_SUBMIT_RATE_PER_MINUTE", subject.role, user_burst, 30, runs)
+    for agent_id, count in sorted(agent_runs.items()):
+        await _take(f"runs:agent:{agent_id}", "AGENT_RUN_RATE_PER_MINUTE", None, agent_burst, 120, count)
+
+
+# ============================================================
+# In-run accounting
+# ============================================================
+
+_quota_subject: ContextVar[Optional[QuotaSubject]] = ContextVar("quota_subject", default=None)
+
+
+def use_quota_subject(subject: Optional[QuotaSubject]) -> None:
+    """Charge LLM and tool usage in the current async context to ``subject``."""
+    _quota_subject.set(subject)
+
+
+def current_quota_subject() -> Optional[QuotaSubject]:
+    return _quota_subject.get()
+
+
+async def ensure_llm_budget() -> None:
+    subject = current_quota_subject()
+    if subject is not None and rate_limits_enabled():
+        await _check_budget(subject, "LLM_TOKEN_BUDGET", DEFAULT_LLM_TOKEN_BUDGET)
+
+
+async def spend_llm_tokens(tokens: int) -> None:
+    subject = current_quota_subject()
+    if subject is not None and rate_limits_enabled():
+        await _charge(subject, "LLM_TOKEN_BUDGET", DEFAULT_LLM_TOKEN_BUDGET, tokens)
+
+
+async def spend_tool_call() -> None:
+    """Check the tool-call budget and charge one call."""
+    subject = current_quota_subject()
+    if subject is None or not rate_limits_enabled():
+        return
+    await _check_budget(subject, "TOOL_CALL_BUDGET", DEFAULT_TOOL_CALL_BUDGET)
+    await _charge(subject, "TOOL_CALL_BUDGET", DEFAULT_TOOL_CALL_BUDGET, 1)
+
+
+async def spend_extra_tool_call() -> bool:
+    """
+    Charge one optional tool call (a hedge or a speculative fallback).
+    Returns False instead of raising once the budget is spent, so the
+    caller skips the extra call and the run carries on.
+    """
+    try:
+        await spend_tool_call()
+    except RateLimitExceeded:
+        return False
+    return True
@@ -1,7 +1,15 @@
+import asyncio
+import math
 import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+from app.infra.deadline import deadline_scope, remaining_seconds
+from app.infra.rate_limits import spend_extra_tool_call
 from app.infra.logger import (
     TOOL_EXECUTION_COUNTER,
     TOOL_EXECUTION_LATENCY,
+    TOOL_HEDGE_COUNTER,
 )
 
 
@@ -10,25 +18,110 @@ class ReliableExecutor:
     Wraps tool execution with:
     - Timeout control
     - Retry policy
+    - Deadline propagation (each step gets at most ``step_budget_seconds``,
+      never more than the run has left)
+    - Optional hedging: if an execution is still running after the tool's
+      recent p95 latency, a second one is started (same tool, or
+      ``hedge_tool``) and whichever succeeds first wins
+    - Bulkheads: sync tools run on the bounded executor the registry
+      assigned them (``tool.bulkhead``)
     - Structured error formatting
     - Metrics instrumentation
     """
 
-    def __init__(self, retry_policy, timeout_executor):
+    def __init__(
+        self,
+        retry_policy,
+        timeout_executor,
+        step_budget_seconds: Optional[float] = None,
+        hedging: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+    ):
         self.retry_policy = retry_policy
         self.timeout_executor = timeout_executor
+        self.step_budget_seconds = step_budget_seconds
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=latency_window))
+
+    def hedge_delay(self, tool_name: str) -> Optional[float]:
+        """Recent ``hedge_quantile`` latency of successful calls, once there are enough."""
+        samples = self._latencies.get(tool_name)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(self.hedge_quantile * len(ordered)) - 1)]
+
+    @staticmethod
+    def _callable(tool):
+        """Sync tools run on their bulkhead rather than the loop's default executor."""
+        bulkhead = getattr(tool, "bulkhead", None)
+        if bulkhead is None or asyncio.iscoroutinefunction(tool.execute):
+            return tool.execute
+
+        async def _on_bulkhead(step):
+            return await bulkhead.run(tool.execute, step)
+
+        return _on_bulkhead
+
+    async def _attempt(self, tool, step):
+        return await self.retry_policy.execute(
+            self.timeout_executor.execute,
+            self._callable(tool),
+            step
+        )
+
+    async def _hedged(self, tool, step, hedge_tool=None):
+        """Returns (result, name of the hedge tool if the hedge won, else None)."""
+        tool_name = step.get("tool", "unknown")
+        primary = asyncio.ensure_future(self._attempt(tool, step))
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay(tool_name)
+            remaining = remaining_seconds()
+            if delay is None or (remaining is not None and remaining <= delay):
+                return await primary, None
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if primary in done:
+                return primary.result(), None
+            if not await spend_extra_tool_call():
+                return await primary, None
+
+            backup_tool = hedge_tool or tool
+            backup = asyncio.ensure_future(self._attempt(backup_tool, dict(step)))
+            tasks.add(backup)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "hedge" if task is backup else "primary"
+                        TOOL_HEDGE_COUNTER.labels(tool_name=tool_name, winner=winner).inc()
+                        return task.result(), (getattr(backup_tool, "name", None) if task is backup else None)
+                    error = error or task.exception()
+            TOOL_HEDGE_COUNTER.labels(tool_name=tool_name, winner="none").inc()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
-    async def execute(self, tool, step):
+    async def execute(self, tool, step, hedge_tool=None):
 
         tool_name = step.get("tool", "unknown")
         start_time = time.time()
 
         try:
-            result = await self.retry_policy.execute(
-                self.timeout_executor.execute,
-                tool.execute,
-                step
-            )
+            with deadline_scope(self.step_budget_seconds):
+                if self.hedging:
+                    result, hedge_winner = await self._hedged(tool, step, hedge_tool)
+                else:
+                    result, hedge_winner = await self._attempt(tool, step), None
 
             latency = time.time() - start_time
 
@@ -40,10 +133,14 @@ class ReliableExecutor:
             TOOL_EXECUTION_LATENCY.labels(
                 tool_name=tool_name
             ).observe(latency)
+            if hedge_winner is None:
+                self._latencies[tool_name].append(latency)
 
             result.setdefault("metadata", {})
             result["metadata"]["total_execution_time"] = latency
             result["metadata"]["status"] = "success"
+            if hedge_winner is not None:
+                result["metadata"]["hedge_winner"] = hedge_winner
 
             return result
 
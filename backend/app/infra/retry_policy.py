@@ -1,16 +1,25 @@
 import asyncio
 import logging
 
+from app.infra.bounded_executor import ExecutorSaturatedError
+from app.infra.deadline import DeadlineExceeded, remaining_seconds
+
 
 class RetryPolicy:
     """
     Generic retry policy with exponential backoff for async operations.
+
+    Under a run deadline a retry is only made if its backoff plus
+    ``min_attempt_seconds`` still fits in the time left. A full bulkhead
+    (ExecutorSaturatedError) is not retried either, so the caller can fall
+    back right away.
     """
 
-    def __init__(self, max_retries=2, base_delay=0.5, backoff_factor=2):
+    def __init__(self, max_retries=2, base_delay=0.5, backoff_factor=2, min_attempt_seconds=0.5):
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.backoff_factor = backoff_factor
+        self.min_attempt_seconds = min_attempt_seconds
 
     async def execute(self, func, *args, **kwargs):
         """
@@ -31,10 +40,21 @@ class RetryPolicy:
                         return await res
                     return res
 
+            except (DeadlineExceeded, ExecutorSaturatedError):
+                raise
+
             except Exception as e:
                 if attempt >= self.max_retries:
                     raise
 
+                remaining = remaining_seconds()
+                if remaining is not None and remaining < delay + self.min_attempt_seconds:
+                    logging.warning(
+                        f"[RetryPolicy] Attempt {attempt + 1} failed: {e}. "
+                        f"Not retrying, {max(remaining, 0):.2f}s left before the deadline."
+                    )
+                    raise
+
                 logging.warning(
                     f"[RetryPolicy] Attempt {attempt + 1} failed: {e}. "
                     f"Retrying in {delay}s..."
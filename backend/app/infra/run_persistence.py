@@ -0,0 +1,192 @@
+"""
+app/infra/run_persistence.py
+
+Write-coalescing persistence for agent runs.
+
+RunEventWriter buffers a run's progress events and flushes them with one
+``insert_many`` per batch: on a short interval, when the batch is full, or
+immediately on terminal events. A single ``$inc`` on the trace allocates
+the whole batch's ``seq`` range, so ordering is preserved.
+
+Each run has exactly one event writer at a time. Allocating seqs and
+inserting the events are separate steps, so a second concurrent writer
+could make seq N+1 visible before N lands, and SSE readers (which resume
+from the highest seq they have seen) would skip N for good. Ownership:
+
+    API     — seq 1 at submit, and the whole run when it completes from
+              the cache or is cancelled while still queued (the worker
+              never claims a cancelled run)
+    worker  — everything from claiming the run until its terminal event
+
+Anyone else with something to say about a running run (e.g. a cancel
+request) publishes an unsequenced signal on the event bus and sets a trace
+flag; the owner turns it into persisted events.
+
+TraceWriter remembers what it last wrote for a run and sends only changed
+fields, appending to list fields with ``$push`` instead of rewriting them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from pymongo import ReturnDocument
+
+from app.infra.event_bus import publish_run_events
+
+_logger = logging.getLogger("run_persistence")
+
+
+def is_terminal_event(event_type: str, data: dict[str, Any]) -> bool:
+    return event_type == "status_change" and data.get("status") in ("completed", "failed", "cancelled")
+
+
+async def allocate_event_seqs(db, run_id: str, count: int = 1) -> int:
+    """Reserve ``count`` event sequence numbers for a run; returns the last one."""
+    trace = await db.traces.find_one_and_update(
+        {"request_id": run_id},
+        {"$inc": {"event_seq": count}},
+        projection={"event_seq": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not trace:
+        raise RuntimeError(f"Trace not found for run {run_id}")
+    return int(trace["event_seq"])
+
+
+# ============================================================
+# Run events
+# ============================================================
+
+class RunEventWriter:
+    """The run's single event writer; see the module docstring for ownership."""
+
+    def __init__(
+        self,
+        db,
+        run_id: str,
+        flush_interval: float | None = None,
+        max_batch: int = 50,
+    ):
+        self.db = db
+        self.run_id = run_id
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else float(os.getenv("RUN_EVENT_FLUSH_INTERVAL_MS", "50")) / 1000
+        )
+        self.max_batch = max_batch
+
+        self._buffer: list[dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+
+    async def emit(self, event_type: str, data: dict[str, Any] | None = None) -> None:
+        data = data or {}
+        self._buffer.append({
+            "event": event_type,
+            "data": data,
+            "timestamp": datetime.now(timezone.utc),
+        })
+
+        if is_terminal_event(event_type, data) or len(self._buffer) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception as e:
+            _logger.warning(f"run_event flush failed run_id={self.run_id} error={e}")
+
+    async def flush(self) -> None:
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+
+            last_seq = await allocate_event_seqs(self.db, self.run_id, len(batch))
+            first_seq = last_seq - len(batch) + 1
+            docs = [
+                {"run_id": self.run_id, "seq": first_seq + offset, **event}
+                for offset, event in enumerate(batch)
+            ]
+            await self.db.run_events.insert_many(docs, ordered=True)
+            await publish_run_events(
+                self.run_id,
+                [{"seq": doc["seq"], "event": doc["event"], "data": doc["data"]} for doc in docs],
+            )
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+# ============================================================
+# Traces
+# ============================================================
+
+class TraceWriter:
+
+    # List fields that only grow during a run; extensions are $push-ed.
+    APPEND_ONLY_FIELDS = frozenset({"observations", "llm_calls"})
+
+    def __init__(self, db, request_id: str):
+        self.db = db
+        self.request_id = request_id
+        self._written: dict[str, Any] = {}
+
+    def _diff(self, fields: dict[str, Any]) -> dict[str, Any]:
+        set_fields: dict[str, Any] = {}
+        push_fields: dict[str, Any] = {}
+
+        for key, value in fields.items():
+            if key == "request_id":
+                continue
+            if key in self._written and self._written[key] == value:
+                continue
+
+            previous = self._written.get(key)
+            if (
+                key in self.APPEND_ONLY_FIELDS
+                and isinstance(previous, list)
+                and isinstance(value, list)
+                and len(value) > len(previous)
+                and value[:len(previous)] == previous
+            ):
+                push_fields[key] = {"$each": value[len(previous):]}
+            else:
+                set_fields[key] = value
+
+        update: dict[str, Any] = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if push_fields:
+            update["$push"] = push_fields
+        return update
+
+    def has_written(self, key: str) -> bool:
+        return key in self._written
+
+    async def write(self, fields: dict[str, Any]) -> bool:
+        """Persist the fields that changed since the last write; False if none did."""
+        update = self._diff(fields)
+        if not update:
+            return False
+
+        update["$setOnInsert"] = {"request_id": self.request_id}
+        await self.db.traces.update_one({"request_id": self.request_id}, update, upsert=True)
+        for key, value in fields.items():
+            if key != "request_id":
+                self._written[key] = copy.deepcopy(value)
+        return True
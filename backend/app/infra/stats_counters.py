@@ -0,0 +1,112 @@
+"""
+app/infra/stats_counters.py
+
+Admin dashboard counts for users (by role) and runs (by status).
+
+compute_stats() answers with one $group aggregation per collection. With
+STATS_COUNTERS_ENABLED=true a materialized ``stats_counters`` document is
+kept up to date with $inc on every user role / run status transition, so
+GET /api/admin/stats becomes a single document read. The document is
+(re)built from the aggregation when missing and after bulk deletes.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.config.runtime import ALLOWED_USER_ROLES, env_flag
+
+_logger = logging.getLogger("stats_counters")
+
+COUNTERS_ID = "global"
+RUN_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
+
+def stats_counters_enabled() -> bool:
+    return env_flag("STATS_COUNTERS_ENABLED", False)
+
+
+def _shape(users: dict[str, int], runs: dict[str, int]) -> dict[str, Any]:
+    return {
+        "users": {
+            "total": int(users.get("total", 0)),
+            **{role: int(users.get(role, 0)) for role in ALLOWED_USER_ROLES},
+        },
+        "runs": {
+            "total": int(runs.get("total", 0)),
+            **{status: int(runs.get(status, 0)) for status in RUN_STATUSES},
+        },
+    }
+
+
+async def _group_counts(collection, field: str) -> dict[str, int]:
+    rows = await collection.aggregate([
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+    ]).to_list(length=None)
+    counts = {str(row["_id"]): int(row["count"]) for row in rows if row["_id"] is not None}
+    counts["total"] = sum(int(row["count"]) for row in rows)
+    return counts
+
+
+async def compute_stats(db) -> dict[str, Any]:
+    """Count users by role and runs by status, one aggregation per collection."""
+    users = await _group_counts(db.users, "role")
+    runs = await _group_counts(db.traces, "status")
+    return _shape(users, runs)
+
+
+async def rebuild_counters(db) -> dict[str, Any]:
+    stats = await compute_stats(db)
+    await db.stats_counters.update_one(
+        {"_id": COUNTERS_ID},
+        {"$set": {**stats, "rebuilt_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    return stats
+
+
+async def get_stats(db) -> dict[str, Any]:
+    if not stats_counters_enabled():
+        return await compute_stats(db)
+
+    doc = await db.stats_counters.find_one({"_id": COUNTERS_ID})
+    if not doc or "rebuilt_at" not in doc:
+        return await rebuild_counters(db)
+    return _shape(doc.get("users") or {}, doc.get("runs") or {})
+
+
+# ============================================================
+# Incremental updates
+# ============================================================
+
+async def _record(db, group: str, old: Optional[str], new: Optional[str], count: int) -> None:
+    if not stats_counters_enabled() or old == new or count <= 0:
+        return
+
+    inc: dict[str, int] = {}
+    if old is None:
+        inc[f"{group}.total"] = count
+    else:
+        inc[f"{group}.{old}"] = -count
+    if new is None:
+        inc[f"{group}.total"] = inc.get(f"{group}.total", 0) - count
+    else:
+        inc[f"{group}.{new}"] = inc.get(f"{group}.{new}", 0) + count
+
+    try:
+        await db.stats_counters.update_one({"_id": COUNTERS_ID}, {"$inc": inc}, upsert=True)
+    except Exception as e:
+        # Counters are advisory; a missed update is fixed by the next rebuild.
+        _logger.warning(f"stats counter update failed group={group} error={e}")
+
+
+async def record_run_transition(db, old: Optional[str], new: Optional[str], count: int = 1) -> None:
+    """``old=None`` for a new run, ``new=None`` for a deleted one."""
+    await _record(db, "runs", old, new, count)
+
+
+async def record_user_transition(db, old: Optional[str], new: Optional[str]) -> None:
+    """``old=None`` for a new user, ``new=None`` for a deleted one."""
+    await _record(db, "users", old, new, 1)
@@ -1,37 +1,53 @@
 import asyncio
 import logging
 
+from app.infra.deadline import DeadlineExceeded, remaining_seconds
+
 
 class TimeoutExecutor:
     """
     Executes a function with a timeout constraint in an async context.
+    The timeout shrinks to the time left in the current run deadline.
     """
 
     def __init__(self, timeout_seconds=10):
         self.timeout_seconds = timeout_seconds
 
+    def effective_timeout(self) -> float:
+        remaining = remaining_seconds()
+        if remaining is None:
+            return self.timeout_seconds
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded before execution started.")
+        return min(self.timeout_seconds, remaining)
+
     async def execute(self, func, *args, **kwargs):
         """
         Executes a callable (sync or async) with a timeout.
         """
+        timeout = self.effective_timeout()
         try:
             if asyncio.iscoroutinefunction(func):
                 return await asyncio.wait_for(
                     func(*args, **kwargs),
-                    timeout=self.timeout_seconds
+                    timeout=timeout
                 )
             else:
                 # If sync, wrap in to_thread to avoid blocking event loop
                 return await asyncio.wait_for(
                     asyncio.to_thread(func, *args, **kwargs),
-                    timeout=self.timeout_seconds
+                    timeout=timeout
                 )
 
         except asyncio.TimeoutError:
             logging.error(
                 f"[TimeoutExecutor] Execution exceeded "
-                f"{self.timeout_seconds} seconds."
+                f"{timeout:.2f} seconds."
             )
+            if timeout < self.timeout_seconds:
+                raise DeadlineExceeded(
+                    f"Execution timed out after {timeout:.2f} seconds (deadline)."
+                )
             raise TimeoutError(
                 f"Execution timed out after {self.timeout_seconds} seconds."
             )
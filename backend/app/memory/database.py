@@ -10,7 +10,7 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING, TEXT
 from app.config.runtime import mongodb_db, mongodb_uri
 
 # Load .env once (safe to call on import)
@@ -69,6 +69,12 @@ class MongoDB:
         await db.traces.create_index([("request_id", ASCENDING)], unique=True)
         await db.traces.create_index([("session_id", ASCENDING)])
         await db.traces.create_index([("timestamp", ASCENDING)])
+        await db.traces.create_index([("batch_id", ASCENDING), ("status", ASCENDING)], sparse=True)
+        # /api/runs: keyset pagination (optionally per status) and search
+        await db.traces.create_index([("timestamp", DESCENDING), ("request_id", DESCENDING)])
+        await db.traces.create_index([("status", ASCENDING), ("timestamp", DESCENDING), ("request_id", DESCENDING)])
+        await db.traces.create_index([("agent_id", ASCENDING)])
+        await db.traces.create_index([("goal", TEXT), ("agent_name", TEXT)], name="traces_search_text")
 
         # Agent directory indexes
         await db.agents.create_index([("name_lower", ASCENDING)], unique=True)
@@ -82,8 +88,18 @@ class MongoDB:
         await db.password_resets.create_index([("email", ASCENDING)], unique=True)
         await db.password_resets.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
 
+        # Token / session revocations (expire with the tokens they cover)
+        await db.auth_revocations.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
         # Run events collection indexes (Phase 2: SSE)
         await db.run_events.create_index([("run_id", ASCENDING)])
+        # Partial: events written before ``seq`` existed would all index as
+        # (run_id, null) and make a plain unique index fail to build.
+        await db.run_events.create_index(
+            [("run_id", ASCENDING), ("seq", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"seq": {"$exists": True}},
+        )
         await db.run_events.create_index([("timestamp", ASCENDING)])
 
         # Response cache (L2)
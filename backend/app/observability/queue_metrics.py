@@ -0,0 +1,50 @@
+"""
+Celery queue depth exported at scrape time.
+
+Reads the Redis broker list length for each run queue so autoscalers can
+size worker pools per queue. Scrape failures report nothing rather than
+failing the /metrics endpoint.
+"""
+
+import logging
+import os
+
+import redis
+from prometheus_client.core import GaugeMetricFamily
+
+from app.infra.celery_app import RUN_QUEUES
+
+_logger = logging.getLogger("queue_metrics")
+
+
+class QueueDepthCollector:
+
+    def __init__(self, broker_url: str | None = None):
+        self.broker_url = broker_url or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.from_url(
+                self.broker_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5,
+            )
+        return self._client
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "agent_queue_depth",
+            "Agent runs waiting in each Celery queue",
+            labels=["queue"],
+        )
+        try:
+            pipeline = self._redis().pipeline(transaction=False)
+            for queue in RUN_QUEUES:
+                pipeline.llen(queue)
+            for queue, depth in zip(RUN_QUEUES, pipeline.execute()):
+                gauge.add_metric([queue], float(depth))
+        except Exception as e:
+            _logger.warning(f"queue depth scrape failed error={e}")
+            return
+        yield gauge
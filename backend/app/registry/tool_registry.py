@@ -3,25 +3,55 @@ app/registry/tool_registry.py
 Enterprise tool registry implementation.
 """
 
-from typing import Dict
+import os
+from typing import Any, Dict, Optional
+
+from ..infra.bounded_executor import BoundedExecutor, get_bounded_executor
 from ..tools.tools import BaseTool  # Correct import
 
 
+def _bulkhead_setting(name: str, tool_name: str, default: int) -> int:
+    raw = os.getenv(f"{name}_{tool_name.upper()}") or os.getenv(name)
+    try:
+        return int(raw) if raw is not None else default
+    except ValueError:
+        return default
+
+
+def tool_bulkhead(tool_name: str) -> BoundedExecutor:
+    """
+    Process-wide bulkhead for ``tool_name``, sized by TOOL_BULKHEAD_WORKERS /
+    TOOL_BULKHEAD_QUEUE (a ``_<TOOL>`` suffix overrides per tool, e.g.
+    TOOL_BULKHEAD_WORKERS_WEB_SEARCH=4).
+    """
+    return get_bounded_executor(
+        f"tool:{tool_name}",
+        max_workers=_bulkhead_setting("TOOL_BULKHEAD_WORKERS", tool_name, 8),
+        max_queue=_bulkhead_setting("TOOL_BULKHEAD_QUEUE", tool_name, 8),
+    )
+
+
 class ToolRegistry:
     """
     Simple registry that holds tool instances keyed by tool.name.
 
     Tools must implement the BaseTool contract (name, execute(...)).
+    Each tool is given a bulkhead (``tool.bulkhead``): the bounded executor
+    its blocking work runs on.
     """
 
     def __init__(self):
         self._tools: Dict[str, BaseTool] = {}
 
-    def register(self, tool: BaseTool) -> None:
+    def register(self, tool: BaseTool, bulkhead: Optional[BoundedExecutor] = None) -> None:
         if not hasattr(tool, "name") or not isinstance(tool.name, str):
             raise ValueError("Tool must have a string 'name' attribute.")
+        tool.bulkhead = bulkhead if bulkhead is not None else tool_bulkhead(tool.name)
         self._tools[tool.name] = tool
 
+    def bulkhead(self, tool_name: str) -> Optional[BoundedExecutor]:
+        return getattr(self.get(tool_name), "bulkhead", None)
+
     def get(self, tool_name: str) -> BaseTool:
         if tool_name not in self._tools:
             raise KeyError(f"Tool '{tool_name}' not registered.")
@@ -29,3 +59,29 @@ class ToolRegistry:
 
     def list_tools(self):
         return list(self._tools.keys())
+
+    def plan_schema(self, max_steps: int) -> Dict[str, Any]:
+        """
+        JSON schema for planner output restricted to the registered tools.
+        Passed to Ollama's structured-output ``format`` so the model can
+        only emit well-formed plans.
+        """
+        return {
+            "type": "object",
+            "properties": {
+                "steps": {
+                    "type": "array",
+                    "minItems": 1,
+                    "maxItems": max_steps,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {"type": "string", "enum": self.list_tools()},
+                            "query": {"type": "string"},
+                        },
+                        "required": ["tool", "query"],
+                    },
+                },
+            },
+            "required": ["steps"],
+        }
@@ -3,13 +3,42 @@ app/reliability/circuit_breaker.py
 
 Enterprise-grade asynchronous circuit breaker
 with timeout enforcement and half-open recovery.
+
+The breaker opens when either
+    - ``failure_threshold`` calls fail in a row, or
+    - over the sliding window (``window_seconds``, kept in ``window_buckets``
+      time buckets) at least ``minimum_calls`` were made and the error rate
+      reaches ``failure_rate_threshold`` or the share of calls slower than
+      ``slow_call_duration`` reaches ``slow_call_rate_threshold``.
+
+After ``recovery_timeout`` it goes HALF_OPEN and lets at most
+``half_open_max_calls`` probes through; the first successful probe closes
+it, a failed probe opens it again. Everyone else is rejected meanwhile, so
+a recovering dependency is not stampeded.
+
+All state lives on the event loop thread and is only touched between
+awaits, so no lock is needed: a call in the CLOSED state is a few attribute
+reads. With CIRCUIT_BREAKER_BACKEND=redis (or ``memory`` within one
+process) breakers of the same name share their open state and half-open
+probe budget through a CircuitStateStore, read at most every
+``sync_interval`` seconds.
 """
 
 import asyncio
+import logging
+import os
 import time
-from typing import Callable, Awaitable, Any
+from abc import ABC, abstractmethod
+from typing import Callable, Awaitable, Any, Dict, Optional, Tuple
 from enum import Enum
-from datetime import datetime
+
+from app.infra.bounded_executor import ExecutorSaturatedError
+from app.infra.cancellation import RunCancelledError
+from app.infra.logger import CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+
+_logger = logging.getLogger("circuit_breaker")
+
+KEY_PREFIX = "circuit:"
 
 
 class CircuitState(str, Enum):
@@ -18,6 +47,187 @@ class CircuitState(str, Enum):
     HALF_OPEN = "half_open"
 
 
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the circuit is open."""
+
+    def __init__(self, name: str, state: CircuitState):
+        self.name = name
+        self.state = state
+        detail = "OPEN" if state == CircuitState.OPEN else "HALF_OPEN probe limit reached"
+        super().__init__(f"CircuitBreaker[{name}] {detail} - rejecting call")
+
+
+# ============================================================
+# Sliding window
+# ============================================================
+
+class _SlidingWindow:
+    """Call / failure / slow-call counts over the last ``seconds``, in fixed time buckets."""
+
+    def __init__(self, seconds: float, buckets: int):
+        self.size = max(1, buckets)
+        self.width = seconds / self.size
+        self.reset()
+
+    def reset(self) -> None:
+        self._epochs = [-1] * self.size
+        self._calls = [0] * self.size
+        self._failures = [0] * self.size
+        self._slow = [0] * self.size
+
+    def record(self, failed: bool, slow: bool, now: float) -> None:
+        epoch = int(now // self.width)
+        slot = epoch % self.size
+        if self._epochs[slot] != epoch:
+            self._epochs[slot] = epoch
+            self._calls[slot] = self._failures[slot] = self._slow[slot] = 0
+        self._calls[slot] += 1
+        self._failures[slot] += failed
+        self._slow[slot] += slow
+
+    def totals(self, now: float) -> Tuple[int, int, int]:
+        oldest = int(now // self.width) - self.size + 1
+        calls = failures = slow = 0
+        for slot, epoch in enumerate(self._epochs):
+            if epoch >= oldest:
+                calls += self._calls[slot]
+                failures += self._failures[slot]
+                slow += self._slow[slot]
+        return calls, failures, slow
+
+
+# ============================================================
+# Shared state
+# ============================================================
+
+class CircuitStateStore(ABC):
+    """Open state and half-open probe budget shared by breakers of the same name."""
+
+    @abstractmethod
+    async def open_until(self, name: str) -> Optional[float]:
+        pass
+
+    @abstractmethod
+    async def mark_open(self, name: str, until: float) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_closed(self, name: str) -> None:
+        pass
+
+    @abstractmethod
+    async def acquire_probe(self, name: str, limit: int, ttl: float) -> bool:
+        pass
+
+
+class InMemoryCircuitStateStore(CircuitStateStore):
+    """Per-process store; shares state between breaker instances in one worker."""
+
+    def __init__(self):
+        self._open_until: Dict[str, float] = {}
+        self._probes: Dict[str, Tuple[int, float]] = {}
+
+    async def open_until(self, name: str) -> Optional[float]:
+        return self._open_until.get(name)
+
+    async def mark_open(self, name: str, until: float) -> None:
+        self._open_until[name] = until
+        self._probes.pop(name, None)
+
+    async def mark_closed(self, name: str) -> None:
+        self._open_until.pop(name, None)
+        self._probes.pop(name, None)
+
+    async def acquire_probe(self, name: str, limit: int, ttl: float) -> bool:
+        now = time.time()
+        count, expires_at = self._probes.get(name, (0, 0.0))
+        if expires_at <= now:
+            count, expires_at = 0, now + ttl
+        if count >= limit:
+            return False
+        self._probes[name] = (count + 1, expires_at)
+        return True
+
+
+class RedisCircuitStateStore(CircuitStateStore):
+    """
+    ``circuit:<name>:open_until`` holds the reopen time (expires with it);
+    ``circuit:<name>:probes`` counts half-open probes. Uses a sync client off
+    the loop, like RedisRateLimitStore.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None):
+        self.url = url
+        self._client = client
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.from_url(self.url, socket_timeout=1.0)
+        return self._client
+
+    async def open_until(self, name: str) -> Optional[float]:
+        value = await asyncio.to_thread(self._redis().get, f"{KEY_PREFIX}{name}:open_until")
+        return float(value) if value is not None else None
+
+    async def mark_open(self, name: str, until: float) -> None:
+        def _mark():
+            pipeline = self._redis().pipeline(transaction=False)
+            pipeline.set(
+                f"{KEY_PREFIX}{name}:open_until",
+                repr(until),
+                px=max(1, int((until - time.time()) * 1000)) + 60_000,
+            )
+            pipeline.delete(f"{KEY_PREFIX}{name}:probes")
+            pipeline.execute()
+
+        await asyncio.to_thread(_mark)
+
+    async def mark_closed(self, name: str) -> None:
+        await asyncio.to_thread(
+            self._redis().delete, f"{KEY_PREFIX}{name}:open_until", f"{KEY_PREFIX}{name}:probes"
+        )
+
+    async def acquire_probe(self, name: str, limit: int, ttl: float) -> bool:
+        key = f"{KEY_PREFIX}{name}:probes"
+
+        def _acquire():
+            pipeline = self._redis().pipeline(transaction=False)
+            pipeline.incr(key)
+            pipeline.expire(key, max(1, int(ttl)), nx=True)
+            return pipeline.execute()[0]
+
+        return int(await asyncio.to_thread(_acquire)) <= limit
+
+
+_store: Optional[CircuitStateStore] = None
+_store_backend: Optional[str] = None
+
+
+def get_circuit_state_store() -> Optional[CircuitStateStore]:
+    """Shared store for CIRCUIT_BREAKER_BACKEND (``local`` = none, the default)."""
+    global _store, _store_backend
+    backend = os.getenv("CIRCUIT_BREAKER_BACKEND", "local").strip().lower()
+    if backend != _store_backend:
+        _store_backend = backend
+        if backend == "memory":
+            _store = InMemoryCircuitStateStore()
+        elif backend == "redis":
+            url = os.getenv("CIRCUIT_BREAKER_REDIS_URL") or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+            _store = RedisCircuitStateStore(url)
+        else:
+            _store = None
+    return _store
+
+
+# ============================================================
+# Breaker
+# ============================================================
+
 class CircuitBreaker:
 
     def __init__(
@@ -25,18 +235,44 @@ class CircuitBreaker:
         failure_threshold: int = 5,
         recovery_timeout: int = 30,
         execution_timeout: int = 15,
-        name: str = "default"
+        name: str = "default",
+        failure_rate_threshold: Optional[float] = 0.5,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate_threshold: float = 0.8,
+        minimum_calls: int = 20,
+        window_seconds: float = 60,
+        window_buckets: int = 12,
+        half_open_max_calls: int = 1,
+        store: Optional[CircuitStateStore] = None,
+        sync_interval: float = 1.0,
     ):
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.execution_timeout = execution_timeout
         self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.half_open_max_calls = half_open_max_calls
+        self.sync_interval = sync_interval
 
         self.state = CircuitState.CLOSED
         self.failure_count = 0
         self.last_failure_time: float | None = None
 
-        self._lock = asyncio.Lock()
+        self._open_until = 0.0
+        self._half_open_in_flight = 0
+        self._window = _SlidingWindow(window_seconds, window_buckets)
+        self._store = store
+        self._next_sync = 0.0
+        self._syncing = False
+
+        CIRCUIT_STATE.labels(name=name).set(_STATE_VALUES[self.state])
+
+    @property
+    def store(self) -> Optional[CircuitStateStore]:
+        return self._store if self._store is not None else get_circuit_state_store()
 
     # --------------------------------------------------
     # MAIN EXECUTION WRAPPER
@@ -44,62 +280,187 @@ class CircuitBreaker:
 
     async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
 
-        async with self._lock:
-
-            if self.state == CircuitState.OPEN:
-                if not self._can_attempt_reset():
-                    raise Exception(
-                        f"CircuitBreaker[{self.name}] OPEN - rejecting call"
-                    )
-                else:
-                    self.state = CircuitState.HALF_OPEN
+        probe = False
+        if self.state is not CircuitState.CLOSED or self._sync_due():
+            probe = await self._admit()
 
+        started = time.monotonic()
         try:
             result = await asyncio.wait_for(
                 func(),
                 timeout=self.execution_timeout
             )
 
+        except (RunCancelledError, ExecutorSaturatedError):
+            # A cancelled run or a full local bulkhead says nothing about
+            # the dependency's health.
+            self._release_probe(probe)
+            raise
+
         except Exception as e:
-            await self._record_failure()
+            await self._record_failure(probe, time.monotonic() - started)
             raise e
 
-        await self._record_success()
+        except BaseException:
+            # Task cancellation: neither a success nor a failure.
+            self._release_probe(probe)
+            raise
+
+        await self._record_success(probe, time.monotonic() - started)
         return result
 
+    async def _admit(self) -> bool:
+        """Slow path: sync shared state, reject while open, hand out half-open probes."""
+        await self._sync()
+
+        if self.state is CircuitState.CLOSED:
+            return False
+
+        if self.state is CircuitState.OPEN:
+            if not self._can_attempt_reset():
+                self._reject()
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self._half_open_in_flight >= self.half_open_max_calls:
+            self._reject()
+        self._half_open_in_flight += 1
+        store = self.store
+        if store is not None:
+            allowed = await self._guarded(
+                store.acquire_probe(self.name, self.half_open_max_calls, self.execution_timeout), True
+            )
+            if not allowed:
+                self._half_open_in_flight -= 1
+                self._reject()
+        return True
+
+    def _release_probe(self, probe: bool):
+        if probe:
+            self._half_open_in_flight -= 1
+
+    def _reject(self):
+        CIRCUIT_REJECTED.labels(name=self.name).inc()
+        raise CircuitOpenError(self.name, self.state)
+
     # --------------------------------------------------
     # STATE MANAGEMENT
     # --------------------------------------------------
 
-    async def _record_failure(self):
-        async with self._lock:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
+    async def _record_failure(self, probe: bool = False, duration: float = 0.0):
+        self.failure_count += 1
+        self.last_failure_time = time.time()
+        self._window.record(True, self._is_slow(duration), time.monotonic())
+
+        self._release_probe(probe)
+        if probe:
+            if self.state is CircuitState.HALF_OPEN:
+                await self._open()
+        elif self.state is CircuitState.CLOSED and (
+            self.failure_count >= self.failure_threshold or self._rates_exceeded()
+        ):
+            await self._open()
+
+    async def _record_success(self, probe: bool = False, duration: float = 0.0):
+        self.failure_count = 0
+        self._window.record(False, self._is_slow(duration), time.monotonic())
+
+        self._release_probe(probe)
+        if probe:
+            if self.state is CircuitState.HALF_OPEN:
+                await self._close()
+        elif self.state is CircuitState.CLOSED and self._rates_exceeded():
+            await self._open()
 
-            if self.failure_count >= self.failure_threshold:
-                self.state = CircuitState.OPEN
+    async def _open(self):
+        self._open_until = time.time() + self.recovery_timeout
+        self._transition(CircuitState.OPEN)
+        store = self.store
+        if store is not None:
+            await self._guarded(store.mark_open(self.name, self._open_until), None)
 
-    async def _record_success(self):
-        async with self._lock:
-            self.failure_count = 0
-            self.state = CircuitState.CLOSED
+    async def _close(self):
+        self.failure_count = 0
+        self._window.reset()
+        self._transition(CircuitState.CLOSED)
+        store = self.store
+        if store is not None:
+            await self._guarded(store.mark_closed(self.name), None)
+
+    def _transition(self, state: CircuitState):
+        if state is self.state:
+            return
+        CIRCUIT_TRANSITIONS.labels(
+            name=self.name, from_state=self.state.value, to_state=state.value
+        ).inc()
+        CIRCUIT_STATE.labels(name=self.name).set(_STATE_VALUES[state])
+        _logger.info(f"circuit_breaker name={self.name} {self.state.value} -> {state.value}")
+        self.state = state
+
+    def _is_slow(self, duration: float) -> bool:
+        return self.slow_call_duration is not None and duration >= self.slow_call_duration
+
+    def _rates_exceeded(self) -> bool:
+        calls, failures, slow = self._window.totals(time.monotonic())
+        if calls < self.minimum_calls:
+            return False
+        if self.failure_rate_threshold is not None and failures / calls >= self.failure_rate_threshold:
+            return True
+        return self.slow_call_duration is not None and slow / calls >= self.slow_call_rate_threshold
 
     def _can_attempt_reset(self) -> bool:
-        if self.last_failure_time is None:
+        return time.time() >= self._open_until
+
+    # --------------------------------------------------
+    # SHARED STATE
+    # --------------------------------------------------
+
+    def _sync_due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        if self.store is None:
+            self._next_sync = now + self.sync_interval
             return False
+        return True
 
-        return (
-            time.time() - self.last_failure_time
-        ) >= self.recovery_timeout
+    async def _sync(self):
+        """Adopt another worker's decision to open; one refresh at a time."""
+        store = self.store
+        if store is None or self._syncing or time.monotonic() < self._next_sync:
+            return
+        self._syncing = True
+        try:
+            self._next_sync = time.monotonic() + self.sync_interval
+            open_until = await self._guarded(store.open_until(self.name), False)
+        finally:
+            self._syncing = False
+        if open_until is False:
+            return
+
+        # Closing is only ever decided by a local probe, so a lost write
+        # cannot close a breaker that is open here.
+        if open_until is not None and open_until > time.time() and self.state is CircuitState.CLOSED:
+            self._open_until = open_until
+            self._transition(CircuitState.OPEN)
+
+    async def _guarded(self, operation, fallback):
+        try:
+            return await operation
+        except Exception as e:
+            _logger.warning(f"circuit state store unavailable name={self.name} error={e}")
+            return fallback
 
     # --------------------------------------------------
     # DIAGNOSTICS
     # --------------------------------------------------
 
     def status(self):
+        calls, failures, slow = self._window.totals(time.monotonic())
         return {
             "name": self.name,
             "state": self.state,
             "failure_count": self.failure_count,
-            "last_failure_time": self.last_failure_time
+            "last_failure_time": self.last_failure_time,
+            "window": {"calls": calls, "failures": failures, "slow_calls": slow},
+            "half_open_in_flight": self._half_open_in_flight,
         }
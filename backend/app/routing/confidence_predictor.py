@@ -0,0 +1,136 @@
+"""
+app/routing/confidence_predictor.py
+
+Cheap predictor for rag_search confidence used by the IntelligentRouter's
+speculative fallback. It remembers the similarity RAG returned for recent
+queries (keyed on their normalized token set) and predicts a new query's
+similarity from its nearest near-duplicates by token Jaccard overlap.
+Lookups go through an inverted token index, so a prediction only touches
+history entries that share at least one token with the query.
+"""
+
+import os
+import re
+from collections import OrderedDict, defaultdict
+from typing import Dict, FrozenSet, Optional, Set
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the to was what when where which who why with".split()
+)
+
+
+class _Record:
+    __slots__ = ("similarity", "samples")
+
+    def __init__(self, similarity: float):
+        self.similarity = similarity
+        self.samples = 1
+
+
+class ConfidencePredictor:
+    """
+    Responsibilities:
+    - Record observed rag_search similarity per normalized query
+    - Predict similarity for unseen queries from near-duplicate history
+    - Bound memory with an LRU entry budget
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        min_overlap: float = 0.6,
+        smoothing: float = 0.5,
+    ):
+        self.max_entries = max_entries
+        self.min_overlap = min_overlap
+        self.smoothing = smoothing
+
+        self._records: "OrderedDict[FrozenSet[str], _Record]" = OrderedDict()
+        self._index: Dict[str, Set[FrozenSet[str]]] = defaultdict(set)
+
+    # ============================================================
+    # Utilities
+    # ============================================================
+
+    @staticmethod
+    def _tokens(query: str) -> FrozenSet[str]:
+        tokens = {t for t in _TOKEN_RE.findall(str(query).lower()) if t not in _STOPWORDS}
+        return frozenset(tokens)
+
+    def _evict(self) -> None:
+        while len(self._records) > self.max_entries:
+            key, _ = self._records.popitem(last=False)
+            for token in key:
+                keys = self._index.get(token)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._index[token]
+
+    # ============================================================
+    # Public API
+    # ============================================================
+
+    def record(self, query: str, similarity: float) -> None:
+        key = self._tokens(query)
+        if not key:
+            return
+        record = self._records.get(key)
+        if record is None:
+            self._records[key] = _Record(float(similarity))
+            for token in key:
+                self._index[token].add(key)
+            self._evict()
+            return
+        record.similarity += self.smoothing * (float(similarity) - record.similarity)
+        record.samples += 1
+        self._records.move_to_end(key)
+
+    def predict(self, query: str) -> Optional[float]:
+        """Predicted similarity, or None when no near-duplicate has been seen."""
+        key = self._tokens(query)
+        if not key:
+            return None
+
+        exact = self._records.get(key)
+        if exact is not None:
+            return exact.similarity
+
+        candidates: Set[FrozenSet[str]] = set()
+        for token in key:
+            candidates.update(self._index.get(token, ()))
+
+        weighted = 0.0
+        total = 0.0
+        for candidate in candidates:
+            overlap = len(key & candidate) / len(key | candidate)
+            if overlap >= self.min_overlap:
+                weighted += overlap * self._records[candidate].similarity
+                total += overlap
+        return weighted / total if total else None
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._index.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._records),
+            "tokens": len(self._index),
+            "max_entries": self.max_entries,
+        }
+
+
+_predictor: Optional[ConfidencePredictor] = None
+
+
+def get_confidence_predictor() -> ConfidencePredictor:
+    """Return the worker-local confidence predictor (singleton per process)."""
+    global _predictor
+    if _predictor is None:
+        _predictor = ConfidencePredictor(
+            max_entries=int(os.getenv("ROUTER_PREDICTOR_MAX_ENTRIES", "2048")),
+        )
+    return _predictor
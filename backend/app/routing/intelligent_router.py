@@ -5,11 +5,64 @@ applies confidence-based and failure-based fallbacks, and emits structured logs.
 """
 
 from typing import Optional, Dict, Any
+import asyncio
 import inspect
+import time
 
 from ..registry.tool_registry import ToolRegistry
 from ..infra.reliable_executor import ReliableExecutor
-from ..infra.logger import StructuredLogger
+from ..infra.rate_limits import spend_extra_tool_call, spend_tool_call
+from ..infra.logger import StructuredLogger, ROUTER_SPECULATION_COUNTER, ROUTER_SPECULATION_SAVED
+from ..cache.tool_cache import ToolResultCache
+from .confidence_predictor import ConfidencePredictor
+
+
+async def _maybe_await(obj):
+    if inspect.isawaitable(obj):
+        return await obj
+    return obj
+
+
+class _Speculation:
+    """A web_search started concurrently with rag_search for a query predicted to score low."""
+
+    def __init__(self, coro):
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self.task = asyncio.ensure_future(self._run(coro))
+
+    async def _run(self, coro):
+        try:
+            return await coro
+        finally:
+            self.elapsed = time.monotonic() - self.started
+
+    async def use(self, primary_elapsed: float) -> Dict[str, Any]:
+        response = await self.task
+        # Serially the fallback would only have started once the primary returned.
+        saved = max(0.0, primary_elapsed + self.elapsed - (time.monotonic() - self.started))
+        ROUTER_SPECULATION_COUNTER.labels(outcome="used").inc()
+        ROUTER_SPECULATION_SAVED.inc(saved)
+        response.setdefault("metadata", {})
+        response["metadata"]["speculation"] = {
+            "launched": True,
+            "used": True,
+            "saved_seconds": round(saved, 4),
+            "wasted_calls": 0,
+        }
+        return response
+
+    def discard(self, response: Dict[str, Any]) -> None:
+        if not self.task.done():
+            self.task.cancel()
+        ROUTER_SPECULATION_COUNTER.labels(outcome="wasted").inc()
+        response.setdefault("metadata", {})
+        response["metadata"]["speculation"] = {
+            "launched": True,
+            "used": False,
+            "saved_seconds": 0.0,
+            "wasted_calls": 1,
+        }
 
 
 class IntelligentRouter:
@@ -18,6 +71,9 @@ class IntelligentRouter:
     - Execute requested tool via ReliableExecutor
     - Inspect metadata (confidence, similarity, errors)
     - Apply intelligent fallback rules
+    - Serve repeated (tool, query) lookups from the tool result cache
+    - Optionally start web_search alongside rag_search when the query is
+      predicted to score below the similarity threshold
     - Preserve structured execution metadata
     """
 
@@ -27,11 +83,160 @@ class IntelligentRouter:
         reliable_executor: ReliableExecutor,
         logger: Optional[StructuredLogger] = None,
         similarity_threshold: float = 0.50,
+        tool_cache: Optional[ToolResultCache] = None,
+        hedge_with_fallback: bool = False,
+        speculative_fallback: bool = False,
+        confidence_predictor: Optional[ConfidencePredictor] = None,
     ):
         self.registry = registry
         self.reliable_executor = reliable_executor
         self.logger = logger
         self.similarity_threshold = similarity_threshold
+        self.tool_cache = tool_cache
+        # With executor hedging on, hedge slow tools with the fallback tool
+        # (web_search) instead of a second call to the same tool.
+        self.hedge_with_fallback = hedge_with_fallback
+        self.speculative_fallback = speculative_fallback
+        if speculative_fallback and confidence_predictor is None:
+            confidence_predictor = ConfidencePredictor()
+        self.confidence_predictor = confidence_predictor
+
+    def _execute(self, tool_name: str, tool: Any, step: Dict[str, Any]):
+        if (
+            self.hedge_with_fallback
+            and tool_name != "web_search"
+            and "web_search" in self.registry.list_tools()
+        ):
+            return self.reliable_executor.execute(tool, step, hedge_tool=self.registry.get("web_search"))
+        return self.reliable_executor.execute(tool, step)
+
+    async def _speculate(
+        self,
+        tool_name: str,
+        step: Dict[str, Any],
+        request_id: Optional[str] = None,
+    ) -> Optional[_Speculation]:
+        """Start web_search now if rag_search is predicted to fall back anyway."""
+        if (
+            not self.speculative_fallback
+            or tool_name != "rag_search"
+            or "web_search" not in self.registry.list_tools()
+        ):
+            return None
+        cache = self.tool_cache
+        if cache is not None and cache.is_cacheable(tool_name):
+            # A cached rag_search answers at once; nothing to overlap with.
+            key = cache.make_key(
+                tool_name,
+                step.get("query", ""),
+                getattr(self.registry.get(tool_name), "index_version", None),
+            )
+            if cache.is_fresh(key):
+                return None
+        predicted = self.confidence_predictor.predict(step.get("query", ""))
+        if predicted is None or predicted >= self.similarity_threshold:
+            return None
+        if not await spend_extra_tool_call():
+            return None
+
+        if self.logger:
+            self.logger.log(
+                "router_speculative_fallback_started",
+                {
+                    "request_id": request_id,
+                    "predicted_similarity": predicted,
+                    "threshold": self.similarity_threshold,
+                },
+            )
+        return _Speculation(
+            self._run_tool("web_search", self.registry.get("web_search"), dict(step), request_id)
+        )
+
+    def _record_confidence(self, tool_name: str, step: Dict[str, Any], response: Dict[str, Any]) -> None:
+        if self.confidence_predictor is None or tool_name != "rag_search":
+            return
+        if response.get("status") == "error" or response["metadata"].get("cache"):
+            return
+        similarity = response["metadata"].get("similarity")
+        if isinstance(similarity, (int, float)):
+            self.confidence_predictor.record(step.get("query", ""), similarity)
+
+    async def _run_fallback(
+        self,
+        step: Dict[str, Any],
+        request_id: Optional[str],
+        speculation: Optional[_Speculation],
+        primary_elapsed: float,
+    ) -> Dict[str, Any]:
+        """web_search fallback, reusing the speculative call when one is in flight."""
+        if speculation is not None:
+            return await speculation.use(primary_elapsed)
+        return await self._run_tool(
+            "web_search", self.registry.get("web_search"), step, request_id
+        )
+
+    async def _run_tool(
+        self,
+        tool_name: str,
+        tool: Any,
+        step: Dict[str, Any],
+        request_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute a tool through ReliableExecutor, consulting the tool
+        result cache first when one is configured.
+        """
+        cache = self.tool_cache
+        if cache is None or not cache.is_cacheable(tool_name):
+            return await _maybe_await(self._execute(tool_name, tool, step))
+
+        key = cache.make_key(
+            tool_name,
+            step.get("query", ""),
+            getattr(tool, "index_version", None),
+        )
+        cached, is_stale = cache.get(tool_name, key)
+
+        if cached is not None:
+            if is_stale:
+                async def _refresh():
+                    # An exhausted budget fails the refresh, which the cache
+                    # logs; the stale entry keeps serving.
+                    await spend_tool_call()
+                    return await _maybe_await(self._execute(tool_name, tool, dict(step)))
+
+                cache.revalidate(tool_name, key, _refresh)
+            cached.setdefault("metadata", {})
+            cached["metadata"]["cache"] = "stale" if is_stale else "hit"
+            cached["metadata"]["total_execution_time"] = 0.0
+
+            if self.logger:
+                self.logger.log(
+                    "router_tool_cache_hit",
+                    {
+                        "request_id": request_id,
+                        "tool": tool_name,
+                        "stale": is_stale,
+                    },
+                )
+            return cached
+
+        response = await _maybe_await(self._execute(tool_name, tool, step))
+        self._cache_response(tool_name, key, step, response)
+        return response
+
+    def _cache_response(self, tool_name: str, key: str, step: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Cache ``response`` under the tool that produced it (a hedge may have won)."""
+        cache = self.tool_cache
+        winner = response.get("metadata", {}).get("hedge_winner") if isinstance(response, dict) else None
+        if winner and winner != tool_name:
+            try:
+                winner_tool = self.registry.get(winner)
+            except Exception:
+                return
+            tool_name = winner
+            key = cache.make_key(winner, step.get("query", ""), getattr(winner_tool, "index_version", None))
+        cache.set(tool_name, key, response)
 
     async def execute(
         self,
@@ -39,11 +244,6 @@ class IntelligentRouter:
         request_id: Optional[str] = None
     ) -> Dict[str, Any]:
 
-        async def _maybe_await(obj):
-            if inspect.isawaitable(obj):
-                return await obj
-            return obj
-
         requested_tool_name = step.get("tool")
 
         if not requested_tool_name:
@@ -74,9 +274,18 @@ class IntelligentRouter:
         # ------------------------------
         # Primary Execution (via ReliableExecutor)
         # ------------------------------
-        primary_response = await _maybe_await(self.reliable_executor.execute(tool, step))
+        speculation = await self._speculate(requested_tool_name, step, request_id)
+        primary_start = time.monotonic()
+        try:
+            primary_response = await self._run_tool(requested_tool_name, tool, step, request_id)
+        except BaseException:
+            if speculation is not None:
+                speculation.task.cancel()
+            raise
+        primary_elapsed = time.monotonic() - primary_start
         primary_response.setdefault("metadata", {})
         primary_response["metadata"]["requested_tool"] = requested_tool_name
+        self._record_confidence(requested_tool_name, step, primary_response)
 
         if self.logger:
             self.logger.log(
@@ -107,9 +316,8 @@ class IntelligentRouter:
                         },
                     )
 
-                fallback_tool = self.registry.get("web_search")
-                fallback_response = await _maybe_await(
-                    self.reliable_executor.execute(fallback_tool, step)
+                fallback_response = await self._run_fallback(
+                    step, request_id, speculation, primary_elapsed
                 )
                 fallback_response.setdefault("metadata", {})
                 fallback_response["metadata"]["fallback_from"] = requested_tool_name
@@ -151,9 +359,8 @@ class IntelligentRouter:
                     )
 
                 if "web_search" in self.registry.list_tools():
-                    fallback_tool = self.registry.get("web_search")
-                    fallback_response = await _maybe_await(
-                        self.reliable_executor.execute(fallback_tool, step)
+                    fallback_response = await self._run_fallback(
+                        step, request_id, speculation, primary_elapsed
                     )
                     fallback_response.setdefault("metadata", {})
                     fallback_response["metadata"]["fallback_from"] = "rag_search"
@@ -170,4 +377,15 @@ class IntelligentRouter:
 
                     return fallback_response
 
+        if speculation is not None:
+            speculation.discard(primary_response)
+            if self.logger:
+                self.logger.log(
+                    "router_speculative_fallback_discarded",
+                    {
+                        "request_id": request_id,
+                        "similarity": primary_response.get("metadata", {}).get("similarity"),
+                    },
+                )
+
         return primary_response
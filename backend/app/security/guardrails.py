@@ -6,6 +6,8 @@ Hard-block security enforcement.
 import re
 from typing import List, Optional
 
+from app.security.pattern_scanner import GuardrailViolation, PatternScanner, StreamingScanner
+
 
 class Guardrails:
     """
@@ -18,6 +20,9 @@ class Guardrails:
     - Memory-write protection (poisoning detection)
     - Final answer sensitive-data leakage detection
 
+    Each check scans the text once through a precompiled PatternScanner and
+    raises GuardrailViolation (a ValueError) naming the rule that matched.
+
     Usage:
     guard = Guardrails(allowed_tools=["tool_a","tool_b"])
     guard.validate_user_input(goal)
@@ -25,6 +30,10 @@ class Guardrails:
     guard.sanitize_tool_output(some_text)
     guard.validate_final_answer(answer)
     guard.validate_memory_write(answer)
+
+    Streamed answers are checked chunk by chunk:
+    stream = guard.final_answer_stream()
+    safe_text = guard.scan_final_answer_chunk(stream, chunk)   # None at the end
     """
 
     # ---------------------------
@@ -76,15 +85,41 @@ class Guardrails:
         r"authorization\s*:",
     ]
 
+    # ---------------------------
+    # Memory Poisoning Indicators (literal phrases)
+    # ---------------------------
+    MEMORY_POISON_INDICATORS = [
+        "from now on",
+        "always answer",
+        "always respond",
+        "remember that",
+        "do not forget",
+        "store this permanently",
+        "make this default",
+    ]
+
     # ---------------------------
     # Limits / Defaults
     # ---------------------------
     MAX_PLAN_STEPS = 12
     MAX_STEP_QUERY_LENGTH = 2000
     MAX_INPUT_LENGTH = 16000
+    # Longest leak match a streamed answer check must catch across chunks.
+    STREAM_SCAN_OVERLAP = 64
 
     def __init__(self, allowed_tools: Optional[List[str]] = None):
         self.allowed_tools = set(allowed_tools or [])
+        cls = type(self)
+        self._input_scanner = PatternScanner({"injection": cls.INJECTION_PATTERNS})
+        # Block patterns outrank sensitive ones, as in the original two loops.
+        self._tool_output_scanner = PatternScanner({
+            "malicious_output": cls.TOOL_OUTPUT_BLOCK_PATTERNS,
+            "sensitive": cls.SENSITIVE_PATTERNS,
+        })
+        self._answer_scanner = PatternScanner({"sensitive": cls.SENSITIVE_PATTERNS})
+        self._memory_scanner = PatternScanner({
+            "memory_poisoning": [re.escape(indicator) for indicator in cls.MEMORY_POISON_INDICATORS],
+        })
 
     # ---------------------------
     # User Input Validation
@@ -96,10 +131,9 @@ class Guardrails:
         if len(text) > self.MAX_INPUT_LENGTH:
             raise ValueError("Security violation: input exceeds maximum allowed length.")
 
-        lowered = text.lower()
-        for pattern in self.INJECTION_PATTERNS:
-            if re.search(pattern, lowered):
-                raise ValueError("Security violation: prompt injection detected.")
+        match = self._input_scanner.first(text.lower())
+        if match:
+            raise GuardrailViolation("Security violation: prompt injection detected.", match.rule, match.category)
 
     # ---------------------------
     # Plan Validation
@@ -154,15 +188,14 @@ class Guardrails:
             # non-string outputs are allowed but convert to str for scanning
             text = str(text)
 
-        lowered = text.lower()
-        for pattern in self.TOOL_OUTPUT_BLOCK_PATTERNS:
-            if re.search(pattern, lowered):
-                raise ValueError("Security violation: malicious tool output detected.")
-
-        # Also check for direct sensitive tokens leaking
-        for pattern in self.SENSITIVE_PATTERNS:
-            if re.search(pattern, lowered):
-                raise ValueError("Security violation: tool output contains sensitive data.")
+        match = self._tool_output_scanner.first(text.lower())
+        if match and match.category == "malicious_output":
+            raise GuardrailViolation("Security violation: malicious tool output detected.", match.rule, match.category)
+        if match:
+            # Direct sensitive tokens leaking
+            raise GuardrailViolation(
+                "Security violation: tool output contains sensitive data.", match.rule, match.category
+            )
 
         return text
 
@@ -177,19 +210,11 @@ class Guardrails:
         if not isinstance(text, str):
             return
 
-        lowered = text.lower()
-        poison_indicators = [
-            "from now on",
-            "always answer",
-            "always respond",
-            "remember that",
-            "do not forget",
-            "store this permanently",
-            "make this default",
-        ]
-        for indicator in poison_indicators:
-            if indicator in lowered:
-                raise ValueError("Security violation: memory poisoning attempt detected.")
+        match = self._memory_scanner.first(text.lower())
+        if match:
+            raise GuardrailViolation(
+                "Security violation: memory poisoning attempt detected.", match.rule, match.category
+            )
 
     # ---------------------------
     # Final Response Protection
@@ -201,7 +226,20 @@ class Guardrails:
         if not isinstance(text, str):
             text = str(text)
 
-        lowered = text.lower()
-        for pattern in self.SENSITIVE_PATTERNS:
-            if re.search(pattern, lowered):
-                raise ValueError("Security violation: sensitive data leakage detected.")
+        match = self._answer_scanner.first(text.lower())
+        if match:
+            raise GuardrailViolation("Security violation: sensitive data leakage detected.", match.rule, match.category)
+
+    def final_answer_stream(self) -> StreamingScanner:
+        """Incremental validate_final_answer() state for one streamed answer."""
+        return StreamingScanner(self._answer_scanner, overlap=self.STREAM_SCAN_OVERLAP, fold_case=True)
+
+    def scan_final_answer_chunk(self, stream: StreamingScanner, chunk: Optional[str]) -> str:
+        """
+        Feed one streamed chunk (``None`` once the stream has ended) and return
+        the text that is now safe to show. Hard block on detection, mid-stream.
+        """
+        match = stream.finish() if chunk is None else stream.feed(chunk)
+        if match:
+            raise GuardrailViolation("Security violation: sensitive data leakage detected.", match.rule, match.category)
+        return stream.release()
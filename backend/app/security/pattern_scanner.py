@@ -0,0 +1,150 @@
+"""
+app/security/pattern_scanner.py
+
+Precompiled multi-pattern scanning for Guardrails and PolicyEngine.
+
+Every rule is compiled once when the scanner is built, and callers case-fold
+a text once before scanning it. Categories are checked in priority order and
+each category stops at its first matching rule, which is reported back
+(ScanMatch / GuardrailViolation) so a block can name what fired.
+StreamingScanner applies a scanner to text that arrives in chunks.
+
+Rules are deliberately not merged into one alternation: CPython's ``re``
+has no multi-pattern automaton, and an alternation loses the literal-prefix
+search each single rule gets, so it measured slower on clean text (see
+scripts/benchmark_guardrails.py).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class ScanMatch:
+    category: str
+    rule: str
+    start: int
+    end: int
+
+
+class GuardrailViolation(ValueError):
+    """A guardrail block; ``rule`` / ``category`` identify what matched."""
+
+    def __init__(self, message: str, rule: Optional[str] = None, category: Optional[str] = None):
+        super().__init__(message)
+        self.rule = rule
+        self.category = category
+
+
+class PatternScanner:
+    """
+    ``categories`` maps a category name to its patterns. first() checks the
+    categories in the given order and returns the first hit.
+    """
+
+    def __init__(self, categories: Mapping[str, Sequence[str]], flags: int = 0):
+        self._rules: Dict[str, List[Tuple[str, re.Pattern]]] = {
+            category: [(pattern, re.compile(pattern, flags)) for pattern in patterns]
+            for category, patterns in categories.items()
+        }
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._rules)
+
+    def search(self, text: str, category: str) -> Optional[ScanMatch]:
+        if not text:
+            return None
+        for rule, compiled in self._rules.get(category, ()):
+            match = compiled.search(text)
+            if match:
+                return ScanMatch(category=category, rule=rule, start=match.start(), end=match.end())
+        return None
+
+    def first(self, text: str) -> Optional[ScanMatch]:
+        for category in self._rules:
+            match = self.search(text, category)
+            if match:
+                return match
+        return None
+
+    def sub(self, replacement: str, text: str) -> str:
+        for rules in self._rules.values():
+            for _rule, compiled in rules:
+                if not text:
+                    return text
+                text = compiled.sub(replacement, text)
+        return text
+
+
+class StreamingScanner:
+    """
+    Incremental scanning of text that arrives in chunks (streamed LLM output).
+
+    Each scan covers the new text plus the last ``overlap`` characters already
+    scanned, so a match up to ``overlap`` characters long that straddles a
+    chunk boundary is still found. Scans are deferred until at least
+    ``overlap`` new characters are pending, which bounds the total work to
+    about two passes over the text however small the chunks are.
+
+    release() hands out the prefix that is scanned and that no later match
+    can reach; it lags the input by at most ``2 * overlap`` characters until
+    finish() scans the tail and releases everything.
+    """
+
+    def __init__(self, scanner: PatternScanner, overlap: int = 256, fold_case: bool = False):
+        self.scanner = scanner
+        self.overlap = max(1, overlap)
+        self.fold_case = fold_case
+        self._buffer = ""        # text from absolute offset self._base onwards
+        self._base = 0
+        self._scanned = 0        # absolute offset up to which text has been scanned
+        self._released = 0
+        self._finished = False
+
+    @property
+    def position(self) -> int:
+        return self._base + len(self._buffer)
+
+    def _scan(self) -> Optional[ScanMatch]:
+        start = max(self._base, self._scanned - self.overlap)
+        window = self._buffer[start - self._base:]
+        self._scanned = self.position
+        match = self.scanner.first(window.lower() if self.fold_case else window)
+        if match is None:
+            return None
+        return ScanMatch(match.category, match.rule, start + match.start, start + match.end)
+
+    def _trim(self) -> None:
+        keep_from = min(self._released, max(0, self._scanned - self.overlap))
+        if keep_from > self._base:
+            self._buffer = self._buffer[keep_from - self._base:]
+            self._base = keep_from
+
+    def feed(self, chunk: str) -> Optional[ScanMatch]:
+        if self._finished:
+            raise RuntimeError("StreamingScanner.feed() after finish()")
+        if not chunk:
+            return None
+        self._buffer += chunk
+        if self.position - self._scanned < self.overlap:
+            return None
+        return self._scan()
+
+    def finish(self) -> Optional[ScanMatch]:
+        self._finished = True
+        if self.position == self._scanned:
+            return None
+        return self._scan()
+
+    def release(self) -> str:
+        safe = self.position if self._finished else max(0, self._scanned - self.overlap)
+        if safe <= self._released:
+            return ""
+        text = self._buffer[self._released - self._base:safe - self._base]
+        self._released = safe
+        self._trim()
+        return text
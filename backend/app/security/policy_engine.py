@@ -1,10 +1,14 @@
-import re
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from app.security.pattern_scanner import PatternScanner, StreamingScanner
 
 
 class PolicyViolationError(Exception):
     """Exception raised for policy violations."""
-    pass
+
+    def __init__(self, message: str, rule: Optional[str] = None):
+        super().__init__(message)
+        self.rule = rule
 
 
 class PolicyEngine:
@@ -16,6 +20,8 @@ class PolicyEngine:
     """
 
     MAX_STEPS = 6
+    # Covers the longest secret format below (aws_secret_access_key=<40>).
+    STREAM_SCAN_OVERLAP = 128
 
     # Pattern for sensitive data (API keys, passwords, etc)
     SENSITIVE_PATTERNS = [
@@ -30,9 +36,7 @@ class PolicyEngine:
 
     def __init__(self, allowed_tools: List[str]):
         self.allowed_tools = set(allowed_tools)
-        self._compiled_patterns = [
-            re.compile(p) for p in self.SENSITIVE_PATTERNS
-        ]
+        self._scanner = PatternScanner({"sensitive": self.SENSITIVE_PATTERNS})
 
     def validate_plan(self, steps: List[Dict]):
         if not isinstance(steps, list):
@@ -61,19 +65,20 @@ class PolicyEngine:
         if not text:
             return
 
-        for pattern in self._compiled_patterns:
-            if pattern.search(text):
-                raise PolicyViolationError(
-                    "Output blocked: sensitive data pattern detected."
-                )
+        match = self._scanner.first(text)
+        if match:
+            raise PolicyViolationError(
+                "Output blocked: sensitive data pattern detected.",
+                rule=match.rule,
+            )
 
     def redact(self, text: str) -> str:
         """Replace sensitive patterns with [REDACTED]."""
         if not text:
             return text
 
-        redacted_text = text
-        for pattern in self._compiled_patterns:
-            redacted_text = pattern.sub("[REDACTED]", redacted_text)
+        return self._scanner.sub("[REDACTED]", text)
 
-        return redacted_text
+    def output_stream(self) -> StreamingScanner:
+        """validate_output() for streamed text; a hit means redact() has work to do."""
+        return StreamingScanner(self._scanner, overlap=self.STREAM_SCAN_OVERLAP)
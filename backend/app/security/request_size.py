@@ -0,0 +1,153 @@
+"""
+app/security/request_size.py
+
+Pure-ASGI request body limit.
+
+The declared Content-Length is checked before the application runs, and
+the body is counted chunk by chunk as the application reads it, so an
+oversized or chunked upload is answered with 413 as soon as it crosses the
+limit. Nothing is buffered or copied: streaming handlers still see the
+body as it arrives.
+
+Limits are per path prefix (longest prefix wins) on top of a default:
+
+    MAX_REQUEST_BODY_BYTES=1048576
+    REQUEST_BODY_LIMITS=/api/runs/submit-batch=4194304,/api/auth/=65536
+
+A limit of 0 disables the check for that prefix.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Mapping, Optional
+
+from starlette.exceptions import HTTPException
+
+from app.infra.logger import REQUEST_BODY_REJECTED
+
+_logger = logging.getLogger("request_size")
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+# Built-in per-route limits; REQUEST_BODY_LIMITS entries override these.
+DEFAULT_ROUTE_LIMITS: dict[str, int] = {
+    "/api/runs/submit-batch": 4 * 1024 * 1024,  # up to MAX_BATCH_RUNS goals
+    "/api/auth/": 64 * 1024,
+}
+
+
+def _detail(limit: int) -> str:
+    return f"Request body exceeds the {limit} byte limit."
+
+
+class _BodyTooLarge(HTTPException):
+    # An HTTPException, so FastAPI's body parsing re-raises it as a 413
+    # instead of wrapping it in a 400; other apps let it reach the middleware.
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_detail(limit))
+
+
+def parse_route_limits(raw: str) -> dict[str, int]:
+    """Parse ``"/prefix=bytes,/other=bytes"``; malformed entries are skipped."""
+    limits: dict[str, int] = {}
+    for entry in raw.split(","):
+        prefix, sep, value = entry.strip().partition("=")
+        if not sep or not prefix.startswith("/"):
+            continue
+        try:
+            limits[prefix] = int(value)
+        except ValueError:
+            _logger.warning(f"ignoring request body limit entry={entry!r}")
+    return limits
+
+
+class RequestSizeLimitMiddleware:
+
+    def __init__(
+        self,
+        app,
+        max_body_size: Optional[int] = None,
+        route_limits: Optional[Mapping[str, int]] = None,
+    ):
+        self.app = app
+        self.max_body_size = (
+            max_body_size
+            if max_body_size is not None
+            else int(os.getenv("MAX_REQUEST_BODY_BYTES", str(DEFAULT_MAX_BODY_BYTES)))
+        )
+        if route_limits is None:
+            route_limits = {**DEFAULT_ROUTE_LIMITS, **parse_route_limits(os.getenv("REQUEST_BODY_LIMITS", ""))}
+        # Longest prefix first, so the most specific route wins.
+        self._route_limits = sorted(route_limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self._route_limits:
+            if path.startswith(prefix):
+                return limit
+        return self.max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope.get("path", ""))
+        if limit <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers") or ():
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    REQUEST_BODY_REJECTED.labels(reason="content_length").inc()
+                    await self._reject(send, limit)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    REQUEST_BODY_REJECTED.labels(reason="streamed").inc()
+                    raise _BodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                # Too late for a 413; dropping the connection is all that is left.
+                raise
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = json.dumps({"detail": _detail(limit)}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
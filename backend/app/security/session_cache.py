@@ -0,0 +1,180 @@
+"""
+app/security/session_cache.py
+
+In-process state that keeps bearer-token checks off Mongo.
+
+UserClaimsCache holds the identity fields of recently seen users for a
+short TTL (AUTH_USER_CACHE_TTL_SECONDS). Role changes and deletes drop the
+entry locally and record a ``claims`` invalidation so other processes drop
+theirs on their next sync.
+
+RevocationList mirrors the ``auth_revocations`` collection:
+
+    token   — one access/refresh token (by jti) revoked until it expires (logout)
+    user    — every token issued to the user up to ``not_before`` (forced logout;
+              ``iat`` has one-second resolution, so that whole second counts)
+    claims  — the user's cached claims are stale (role change)
+    all     — every token of every user but ``except_user_id`` up to
+              ``not_before``, and all cached claims are stale (admin clear-all)
+
+It re-reads the collection at most every AUTH_REVOCATION_SYNC_SECONDS, so
+a revocation reaches every process within that window; between syncs each
+check is a dict lookup. Documents expire through a TTL index on expires_at.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+_logger = logging.getLogger("session_cache")
+
+# Identity fields kept per user; never the password hash.
+CLAIM_FIELDS = ("_id", "email", "name", "role", "created_at")
+
+
+class UserClaimsCache:
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return dict(claims)
+
+    def put(self, user: dict[str, Any]) -> dict[str, Any]:
+        claims = {field: user.get(field) for field in CLAIM_FIELDS}
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[str(user["_id"])] = (time.monotonic() + self.ttl_seconds, claims)
+        return dict(claims)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationList:
+
+    def __init__(self, sync_interval: float = 15.0):
+        self.sync_interval = sync_interval
+        self._revoked_jtis: set[str] = set()
+        self._not_before: dict[str, float] = {}
+        self._claims_changed: dict[str, float] = {}
+        self._all_not_before: Optional[tuple[float, Optional[str]]] = None
+        self._synced_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def is_revoked(self, payload: dict[str, Any]) -> bool:
+        if payload.get("jti") in self._revoked_jtis:
+            return True
+        user_id = str(payload.get("sub"))
+        iat = float(payload.get("iat", 0))
+        if self._all_not_before is not None:
+            cutoff, except_user_id = self._all_not_before
+            if user_id != except_user_id and iat <= cutoff:
+                return True
+        not_before = self._not_before.get(user_id)
+        return not_before is not None and iat <= not_before
+
+    def revoke_token(self, jti: str) -> None:
+        self._revoked_jtis.add(jti)
+
+    def revoke_user(self, user_id: str, not_before: float) -> None:
+        self._not_before[user_id] = max(not_before, self._not_before.get(user_id, 0.0))
+
+    def revoke_all(self, not_before: float, except_user_id: Optional[str] = None) -> None:
+        self._all_not_before = (not_before, except_user_id)
+
+    async def sync(self, db, cache: UserClaimsCache, force: bool = False) -> None:
+        """Reload the collection if the snapshot is older than ``sync_interval``."""
+        if not force and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        async with self._lock:
+            if not force and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            try:
+                docs = await db.auth_revocations.find(
+                    {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+                ).to_list(length=None)
+            except Exception as e:
+                # Keep the last snapshot; retry on the next interval.
+                _logger.warning(f"revocation sync failed error={e}")
+                self._synced_at = time.monotonic()
+                return
+
+            jtis: set[str] = set()
+            not_before: dict[str, float] = {}
+            claims_changed: dict[str, float] = {}
+            all_not_before: Optional[tuple[float, Optional[str]]] = None
+            for doc in docs:
+                kind = doc.get("kind")
+                if kind == "token" and doc.get("jti"):
+                    jtis.add(doc["jti"])
+                elif kind == "user" and doc.get("user_id"):
+                    not_before[doc["user_id"]] = max(float(doc["not_before"]), not_before.get(doc["user_id"], 0.0))
+                elif kind == "claims" and doc.get("user_id"):
+                    claims_changed[doc["user_id"]] = float(doc["changed_at"])
+                elif kind == "all":
+                    all_not_before = (float(doc["not_before"]), doc.get("except_user_id"))
+
+            if all_not_before is not None and all_not_before != self._all_not_before:
+                cache.clear()
+
+            for user_id, changed_at in claims_changed.items():
+                if self._claims_changed.get(user_id) != changed_at:
+                    cache.invalidate(user_id)
+            for user_id, cutoff in not_before.items():
+                if self._not_before.get(user_id) != cutoff:
+                    cache.invalidate(user_id)
+
+            self._revoked_jtis = jtis
+            self._not_before = not_before
+            self._claims_changed = claims_changed
+            self._all_not_before = all_not_before
+            self._synced_at = time.monotonic()
+
+
+_claims_cache: Optional[UserClaimsCache] = None
+_revocations: Optional[RevocationList] = None
+
+
+def get_claims_cache() -> UserClaimsCache:
+    global _claims_cache
+    if _claims_cache is None:
+        _claims_cache = UserClaimsCache(ttl_seconds=float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60")))
+    return _claims_cache
+
+
+def get_revocation_list() -> RevocationList:
+    global _revocations
+    if _revocations is None:
+        _revocations = RevocationList(sync_interval=float(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "15")))
+    return _revocations
+
+
+def reset_session_state() -> None:
+    """Forget cached users and revocations (tests, or after a bulk delete)."""
+    global _claims_cache, _revocations
+    _claims_cache = None
+    _revocations = None
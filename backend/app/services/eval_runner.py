@@ -199,10 +199,12 @@ Return ONLY a JSON object: {"score": <number>, "reason": "<brief reason>"}
 
             response = await llm_chat(
                 client,
+                call_site="judge",
                 model=model,
                 messages=messages,
                 format="json",
-                options={"temperature": 0, "num_ctx": 2048},
+                # Same num_ctx as the agent calls: a different value forces Ollama to reload the model.
+                options={"temperature": 0, "num_ctx": 4096},
             )
 
             content = response["message"]["content"]
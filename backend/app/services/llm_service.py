@@ -1,5 +1,8 @@
 from ..infra.ollama_client import get_ollama_client, get_ollama_model, llm_chat
 
+# Kept constant so Ollama can reuse the cached prompt prefix across requests.
+SYSTEM_PROMPT = "You are answering strictly based on the context provided."
+
 
 class LLMService:
     def __init__(self, model_name=None):
@@ -9,19 +12,16 @@ class LLMService:
     async def generate(self, query, contexts, memory_history):
         combined_context = "\n".join(contexts)
 
-        system_prompt = f"""
-You are answering strictly based on the context below.
-
-Context:
-{combined_context}
-"""
-
-        messages = [{"role": "system", "content": system_prompt}]
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": f"Context:\n{combined_context}"},
+        ]
         messages.extend(memory_history)
         messages.append({"role": "user", "content": query})
 
         response = await llm_chat(
             self.client,
+            call_site="rag_answer",
             model=self.model_name,
             messages=messages,
             options={"num_ctx": 4096}
@@ -578,17 +578,34 @@ Observations:
 
 from __future__ import annotations
 
+import asyncio
 import inspect
 import json
-import re
 import time
 from collections.abc import Awaitable, Callable
 from datetime import datetime, timezone
 from typing import Any, Optional
 
 from app.cache.response_cache import ResponseCache
-from app.infra.logger import REQUEST_COUNTER, REQUEST_LATENCY, StructuredLogger, generate_request_id
-from app.infra.ollama_client import get_ollama_client, get_ollama_model, llm_chat
+from app.config.runtime import env_flag
+from app.infra.cancellation import RunCancelledError, raise_if_cancelled
+from app.infra.json_repair import loads_tolerant
+from app.infra.logger import (
+    PLANNER_PARSE_COUNTER,
+    REQUEST_COUNTER,
+    REQUEST_LATENCY,
+    StructuredLogger,
+    generate_request_id,
+)
+from app.infra.ollama_client import (
+    current_llm_calls,
+    get_ollama_client,
+    get_ollama_model,
+    llm_chat,
+    record_llm_calls,
+)
+from app.infra.rate_limits import spend_tool_call
+from app.infra.run_persistence import TraceWriter
 from app.memory.database import MongoDB
 from app.memory.memory_manager import MemoryManager
 from app.registry.tool_registry import ToolRegistry
@@ -596,6 +613,120 @@ from app.routing.intelligent_router import IntelligentRouter
 from app.security.guardrails import Guardrails
 from app.security.policy_engine import PolicyEngine
 
+# Static prompt prefixes. Per-request context is sent in later messages so
+# Ollama can reuse the KV cache for these tokens across requests.
+PLANNER_SYSTEM_PROMPT = """
+You are a planning agent.
+
+You ONLY have access to:
+{available_tools}
+
+Return ONLY valid JSON:
+{{
+  "steps": [
+    {{"tool": "<tool_name>", "query": "<query>"}}
+  ]
+}}
+
+Rules:
+- Use only listed tool names
+- No markdown
+- No explanations
+- Use memory context only when it improves the plan
+"""
+
+SYNTHESIS_SYSTEM_PROMPT = "Use ONLY provided observations and memory. Do not invent."
+
+
+def _violation_details(exc: Exception) -> dict[str, Any] | None:
+    """Which guardrail / policy rule blocked the run, for the trace."""
+    rule = getattr(exc, "rule", None)
+    if rule is None:
+        return None
+    return {"rule": rule, "category": getattr(exc, "category", None)}
+
+
+def _speculation_summary(observations: list[dict[str, Any]]) -> dict[str, Any] | None:
+    """Totals of the router's speculative web_search calls, for the trace."""
+    launched = used = wasted = 0
+    saved = 0.0
+    for observation in observations:
+        response = observation.get("response")
+        metadata = response.get("metadata", {}) if isinstance(response, dict) else {}
+        speculation = metadata.get("speculation")
+        if not speculation:
+            continue
+        launched += 1
+        used += 1 if speculation.get("used") else 0
+        wasted += int(speculation.get("wasted_calls", 0))
+        saved += float(speculation.get("saved_seconds", 0.0))
+    if not launched:
+        return None
+    return {"launched": launched, "used": used, "wasted_calls": wasted, "saved_seconds": round(saved, 4)}
+
+
+class _SynthesisStream:
+    """
+    Streams the synthesis answer as ``synthesis_delta`` events while it is
+    generated, scanning it in the same order as the non-streamed answer:
+    PolicyEngine first, then Guardrails on the text it lets through. Once
+    PolicyEngine spots a secret that redact() will mask, deltas stop and
+    clients wait for the redacted answer, which validate_final_answer()
+    checks as before. A Guardrails leak in released text stops generation
+    mid-stream.
+    """
+
+    def __init__(
+        self,
+        service: "PlanningAgentService",
+        callback: Callable[[str, dict[str, Any]], Awaitable[None] | None],
+    ):
+        self._service = service
+        self._callback = callback
+        self._loop = asyncio.get_running_loop()
+        self._guard = service.guardrails.final_answer_stream()
+        self._policy = service.policy.output_stream()
+        self._suppressed = False
+        self._pending: list = []
+
+    def _redactable(self, text: str, final: bool = False) -> str:
+        """Text PolicyEngine has cleared; empty from the first redactable match on."""
+        if self._suppressed:
+            return ""
+        match = self._policy.feed(text)
+        if match is None and final:
+            match = self._policy.finish()
+        if match is not None:
+            self._suppressed = True
+            return ""
+        return self._policy.release()
+
+    def _visible(self, text: str, final: bool = False) -> str:
+        cleared = self._redactable(text, final)
+        if self._suppressed:
+            return ""
+        guardrails = self._service.guardrails
+        delta = guardrails.scan_final_answer_chunk(self._guard, cleared)
+        if final:
+            delta += guardrails.scan_final_answer_chunk(self._guard, None)
+        return delta
+
+    def on_chunk(self, chunk: str) -> None:
+        # Runs on the LLM worker thread; raising here stops generation.
+        delta = self._visible(chunk)
+        if delta:
+            self._pending.append(asyncio.run_coroutine_threadsafe(
+                self._service._emit(self._callback, "synthesis_delta", {"text": delta}),
+                self._loop,
+            ))
+
+    async def finish(self) -> None:
+        if self._pending:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in self._pending), return_exceptions=True)
+        delta = self._visible("", final=True)
+        if delta:
+            await self._service._emit(self._callback, "synthesis_delta", {"text": delta})
+
 
 class PlanningAgentService:
     def __init__(
@@ -614,7 +745,10 @@ class PlanningAgentService:
         self.logger = logger
         self.max_json_retries = max_json_retries
         self.memory = memory_manager or MemoryManager()
-        self.cache = ResponseCache(MongoDB.get_database())
+        self.cache = ResponseCache(
+            MongoDB.get_database(),
+            write_behind=env_flag("RESPONSE_CACHE_WRITE_BEHIND", False),
+        )
 
         allowed_tools = []
         try:
@@ -625,6 +759,25 @@ class PlanningAgentService:
 
         self.guardrails = Guardrails(allowed_tools=allowed_tools)
         self.policy = PolicyEngine(allowed_tools=allowed_tools)
+        self._planner_prompt_cache: tuple[tuple[str, ...], str] | None = None
+        self._plan_schema_cache: tuple[tuple[str, ...], dict[str, Any]] | None = None
+
+    def _planner_system_prompt(self) -> str:
+        tools = tuple(self.registry.list_tools() if self.registry else [])
+        if self._planner_prompt_cache is None or self._planner_prompt_cache[0] != tools:
+            prompt = PLANNER_SYSTEM_PROMPT.format(available_tools=", ".join(tools))
+            self._planner_prompt_cache = (tools, prompt)
+        return self._planner_prompt_cache[1]
+
+    def _planner_format(self) -> dict[str, Any] | str:
+        """Structured-output schema for the planner, or plain JSON mode without tools."""
+        tools = tuple(self.registry.list_tools() if self.registry else [])
+        if not tools:
+            return "json"
+        if self._plan_schema_cache is None or self._plan_schema_cache[0] != tools:
+            max_steps = min(self.guardrails.MAX_PLAN_STEPS, self.policy.MAX_STEPS)
+            self._plan_schema_cache = (tools, self.registry.plan_schema(max_steps))
+        return self._plan_schema_cache[1]
 
     async def _emit(
         self,
@@ -638,14 +791,6 @@ class PlanningAgentService:
         if inspect.isawaitable(result):
             await result
 
-    async def _persist_trace(self, request_id: str, trace_doc: dict[str, Any]) -> None:
-        db = MongoDB.get_database()
-        await db.traces.update_one(
-            {"request_id": request_id},
-            {"$set": trace_doc, "$setOnInsert": {"request_id": request_id}},
-            upsert=True,
-        )
-
     async def _resolve_agent_name(self, agent_id: str | None) -> str | None:
         if not agent_id:
             return None
@@ -654,7 +799,6 @@ class PlanningAgentService:
 
     async def create_plan(self, goal: str, session_id: str | None = None) -> str:
         self.guardrails.validate_user_input(goal)
-        available_tools = ", ".join(self.registry.list_tools() if self.registry else [])
 
         memory_context = ""
         if session_id:
@@ -679,44 +823,23 @@ class PlanningAgentService:
                     sections.append(f"Relevant past knowledge:\n{memories}")
                 if sections:
                     memory_context = (
-                        "\n\nCONTEXT FROM MEMORY (use this to refine the plan when relevant):\n"
+                        "CONTEXT FROM MEMORY (use this to refine the plan when relevant):\n"
                         + "\n".join(sections)
                     )
             except Exception:
                 memory_context = ""
 
-        messages = [
-            {
-                "role": "system",
-                "content": f"""
-You are a planning agent.
-
-You ONLY have access to:
-{available_tools}
-
-Return ONLY valid JSON:
-{{
-  "steps": [
-    {{"tool": "<tool_name>", "query": "<query>"}}
-  ]
-}}
-
-Rules:
-- Use only listed tool names
-- No markdown
-- No explanations
-- Use memory context only when it improves the plan
-{memory_context}
-""",
-            },
-            {"role": "user", "content": goal},
-        ]
+        messages = [{"role": "system", "content": self._planner_system_prompt()}]
+        if memory_context:
+            messages.append({"role": "system", "content": memory_context})
+        messages.append({"role": "user", "content": goal})
 
         response = await llm_chat(
             self.client,
+            call_site="planner",
             model=self.model_name,
             messages=messages,
-            format="json",
+            format=self._planner_format(),
             options={"temperature": 0, "num_ctx": 4096},
         )
         content = response["message"]["content"]
@@ -726,45 +849,50 @@ Rules:
         return plan_text
 
     async def parse_plan_json(self, plan_text: str) -> list[dict[str, Any]]:
-        def extract_json(text: str) -> str | None:
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            return match.group(0) if match else None
+        def parse_steps(text: Any) -> tuple[list[dict[str, Any]], bool]:
+            repaired = False
+            try:
+                parsed = json.loads(text) if isinstance(text, str) else text
+            except ValueError:
+                parsed = loads_tolerant(text)
+                repaired = True
 
-        if isinstance(plan_text, dict):
-            parsed = plan_text
-            return parsed["steps"]
+            steps = parsed.get("steps") if isinstance(parsed, dict) else None
+            if not isinstance(steps, list):
+                raise ValueError("Invalid plan payload.")
+            return steps, repaired
 
         current_text = plan_text
         for attempt in range(self.max_json_retries + 1):
             try:
-                try:
-                    parsed = json.loads(current_text)
-                except Exception:
-                    extracted = extract_json(current_text)
-                    if not extracted:
-                        raise ValueError("No JSON found in planner output.")
-                    parsed = json.loads(extracted)
-
-                steps = parsed.get("steps")
-                if not isinstance(steps, list):
-                    raise ValueError("Invalid plan payload.")
+                steps, repaired = parse_steps(current_text)
+                if attempt:
+                    outcome = "llm_repair"
+                else:
+                    outcome = "local_repair" if repaired else "strict"
+                PLANNER_PARSE_COUNTER.labels(outcome=outcome).inc()
                 return steps
             except Exception as exc:
                 if attempt >= self.max_json_retries:
+                    PLANNER_PARSE_COUNTER.labels(outcome="failed").inc()
                     raise ValueError(f"Plan parsing failed: {exc}") from exc
 
+                if self.logger:
+                    self.logger.log("planner_llm_repair", {"attempt": attempt + 1, "error": str(exc)})
+
                 repair = await llm_chat(
                     self.client,
+                    call_site="repair",
                     model=self.model_name,
                     messages=[
                         {"role": "system", "content": "Fix JSON only."},
                         {"role": "user", "content": current_text},
                     ],
-                    format="json",
+                    format=self._planner_format(),
                     options={"temperature": 0, "num_ctx": 4096},
                 )
-                repaired = repair["message"]["content"]
-                current_text = json.dumps(repaired) if isinstance(repaired, dict) else repaired
+                content = repair["message"]["content"]
+                current_text = json.dumps(content) if isinstance(content, dict) else content
 
         raise ValueError("Plan parsing failed.")
 
@@ -778,9 +906,11 @@ Rules:
         request_id: str | None = None,
         started_at: datetime | None = None,
         event_callback: Callable[[str, dict[str, Any]], Awaitable[None] | None] | None = None,
+        trace_writer: TraceWriter | None = None,
     ) -> dict[str, Any]:
         request_id = request_id or generate_request_id()
         started_at = started_at or datetime.now(timezone.utc)
+        trace = trace_writer or TraceWriter(MongoDB.get_database(), request_id)
         agent_name = await self._resolve_agent_name(agent_id)
         REQUEST_COUNTER.inc()
         total_start = time.time()
@@ -821,11 +951,12 @@ Rules:
                         "synthesis": 0.0,
                         "total": total_latency,
                     },
+                    "llm_calls": current_llm_calls(),
                     "started_at": started_at,
                     "completed_at": datetime.now(timezone.utc),
                     "timestamp": started_at,
                 }
-                await self._persist_trace(request_id, trace_doc)
+                await trace.write(trace_doc)
                 REQUEST_LATENCY.observe(total_latency)
                 return {
                     "result": cached_response,
@@ -849,6 +980,8 @@ Rules:
                 return value
 
             for index, step in enumerate(steps, start=1):
+                raise_if_cancelled()
+                await spend_tool_call()
                 await self._emit(event_callback, "tool_start", {"step": index, "tool": step.get("tool"), "query": step.get("query")})
                 if self.router:
                     response = await _maybe_await(self.router.execute(step, request_id=request_id))
@@ -897,9 +1030,12 @@ Rules:
                 semantic_top_k=3,
             )
 
+            raise_if_cancelled()
             await self._emit(event_callback, "synthesis_start", {"observations": len(observations)})
             synthesis_start = time.time()
-            final_answer = await self.synthesize_answer(goal, observations, memory_context)
+            final_answer = await self.synthesize_answer(
+                goal, observations, memory_context, event_callback=event_callback
+            )
             synthesis_latency = time.time() - synthesis_start
             await self._emit(event_callback, "synthesis_complete", {"preview": final_answer[:500]})
 
@@ -930,11 +1066,13 @@ Rules:
                     "synthesis": synthesis_latency,
                     "total": total_latency,
                 },
+                "speculation": _speculation_summary(observations),
+                "llm_calls": current_llm_calls(),
                 "started_at": started_at,
                 "completed_at": datetime.now(timezone.utc),
                 "timestamp": started_at,
             }
-            await self._persist_trace(request_id, trace_doc)
+            await trace.write(trace_doc)
             REQUEST_LATENCY.observe(total_latency)
 
             return {
@@ -960,9 +1098,10 @@ Rules:
                 "steps": steps,
                 "observations": observations,
                 "final_answer": None,
-                "status": "failed",
+                "status": "cancelled" if isinstance(exc, RunCancelledError) else "failed",
                 "cache_hit": False,
                 "error": f"{type(exc).__name__}: {exc}",
+                "violation": _violation_details(exc),
                 "latency": {
                     "planner": 0.0,
                     "tool_total": 0.0,
@@ -970,11 +1109,12 @@ Rules:
                     "synthesis": 0.0,
                     "total": total_latency,
                 },
+                "llm_calls": current_llm_calls(),
                 "started_at": started_at,
                 "completed_at": datetime.now(timezone.utc),
                 "timestamp": started_at,
             }
-            await self._persist_trace(request_id, failure_doc)
+            await trace.write(failure_doc)
             REQUEST_LATENCY.observe(total_latency)
             raise
 
@@ -991,11 +1131,15 @@ Rules:
         request_id = request_id or generate_request_id()
         started_at = started_at or datetime.now(timezone.utc)
         plan_text: str | None = None
+        trace = TraceWriter(MongoDB.get_database(), request_id)
+        record_llm_calls()
 
         try:
+            raise_if_cancelled()
             await self._emit(event_callback, "planner_start", {"request_id": request_id})
             plan_text = await self.create_plan(goal, session_id=session_id)
             await self._emit(event_callback, "planner_complete", {"plan_preview": plan_text[:500]})
+            raise_if_cancelled()
 
             result = await self.execute_plan(
                 session_id,
@@ -1005,6 +1149,7 @@ Rules:
                 request_id=request_id,
                 started_at=started_at,
                 event_callback=event_callback,
+                trace_writer=trace,
             )
             await self._emit(
                 event_callback,
@@ -1019,26 +1164,31 @@ Rules:
             await self._emit(event_callback, "status_change", {"status": "completed"})
             return result
         except Exception as exc:
-            await self._persist_trace(
-                request_id,
-                {
-                    "request_id": request_id,
-                    "session_id": session_id,
-                    "agent_id": agent_id,
-                    "agent_name": await self._resolve_agent_name(agent_id),
-                    "goal": goal,
-                    "plan": plan_text,
-                    "steps": [],
-                    "observations": [],
-                    "final_answer": None,
-                    "status": "failed",
-                    "cache_hit": False,
-                    "error": f"{type(exc).__name__}: {exc}",
-                    "started_at": started_at,
-                    "completed_at": datetime.now(timezone.utc),
-                    "timestamp": started_at,
-                },
-            )
+            status = "cancelled" if isinstance(exc, RunCancelledError) else "failed"
+            failure_doc = {
+                "request_id": request_id,
+                "session_id": session_id,
+                "agent_id": agent_id,
+                "agent_name": await self._resolve_agent_name(agent_id),
+                "goal": goal,
+                "plan": plan_text,
+                "final_answer": None,
+                "status": status,
+                "cache_hit": False,
+                "error": f"{type(exc).__name__}: {exc}",
+                "violation": _violation_details(exc),
+                "llm_calls": current_llm_calls(),
+                "started_at": started_at,
+                "completed_at": datetime.now(timezone.utc),
+                "timestamp": started_at,
+            }
+            if not trace.has_written("observations"):
+                # Failed before execution; otherwise keep what execute_plan recorded.
+                failure_doc.update(steps=[], observations=[])
+            await trace.write(failure_doc)
+            if status == "cancelled":
+                await self._emit(event_callback, "status_change", {"status": "cancelled", "reason": str(exc)})
+                raise
             await self._emit(event_callback, "error", {"error": f"{type(exc).__name__}: {exc}"})
             await self._emit(event_callback, "status_change", {"status": "failed", "error": f"{type(exc).__name__}: {exc}"})
             raise
@@ -1048,6 +1198,7 @@ Rules:
         goal: str,
         observations: list[dict[str, Any]],
         memory_context: Optional[dict[str, Any]] = None,
+        event_callback: Callable[[str, dict[str, Any]], Awaitable[None] | None] | None = None,
     ) -> str:
         observation_text = ""
         for observation in observations:
@@ -1070,7 +1221,7 @@ Rules:
                     memory_text += f"{memory.get('text')}\n"
 
         messages = [
-            {"role": "system", "content": "Use ONLY provided observations and memory. Do not invent."},
+            {"role": "system", "content": SYNTHESIS_SYSTEM_PROMPT},
             {
                 "role": "user",
                 "content": f"""
@@ -1086,12 +1237,20 @@ Observations:
             },
         ]
 
+        stream = None
+        if event_callback is not None and env_flag("SYNTHESIS_STREAM_EVENTS", True):
+            stream = _SynthesisStream(self, event_callback)
+
         response = await llm_chat(
             self.client,
+            call_site="synthesis",
+            on_chunk=stream.on_chunk if stream else None,
             model=self.model_name,
             messages=messages,
             options={"num_ctx": 4096},
         )
+        if stream is not None:
+            await stream.finish()
         final_answer = response["message"]["content"]
         if isinstance(final_answer, dict):
             final_answer = final_answer.get("answer") if isinstance(final_answer.get("answer"), str) else json.dumps(final_answer)
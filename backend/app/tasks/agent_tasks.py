@@ -6,16 +6,51 @@ Decouples long-running LLM + tool work from the FastAPI API process.
 
 Flow:
   POST /api/runs/submit → creates trace(status=queued) → enqueues this task
-  Worker picks up → status=running → execute → status=completed|failed
+  Worker picks up → status=running → execute → status=completed|failed|cancelled
+
+POST /api/runs/{id}/cancel marks queued runs cancelled (the worker skips
+them at pickup) and flags running ones; a watcher task per run turns the
+flag into a CancellationToken trip. The watcher listens for the
+cancel_requested event on the run event bus; it only polls the trace when
+no bus is configured or the bus is unreachable.
 """
 
 import asyncio
+import logging
+import os
+import time
 import traceback
 from datetime import datetime, timezone
 
-from app.infra.celery_app import celery_app
+from celery import group
+from pymongo import ReturnDocument
+
+from app.config.runtime import run_timeout_seconds
+from app.infra.async_runtime import get_worker_runtime
+from app.infra.cancellation import (
+    CancellationToken,
+    RunCancelledError,
+    estimate_run_seconds,
+    use_cancellation_token,
+)
+from app.infra.celery_app import celery_app, queue_for_priority
+from app.infra.deadline import Deadline, use_deadline
+from app.infra.event_bus import get_event_bus
+from app.infra.logger import RUN_CANCEL_COUNTER, RUN_CANCEL_SAVED_SECONDS, RUN_QUEUE_WAIT
+from app.infra.rate_limits import QuotaSubject, use_quota_subject
+from app.infra.run_persistence import RunEventWriter
+from app.infra.stats_counters import record_run_transition
 from app.memory.database import MongoDB
 
+_logger = logging.getLogger("agent_tasks")
+
+# How often the cancel watcher re-reads the trace flag when it has no bus.
+CANCEL_POLL_SECONDS = 1.0
+
+# The run enforces RUN_TIMEOUT_SECONDS itself and writes a timed-out trace;
+# the runtime only cancels it as a backstop once this grace has also passed.
+RUN_TIMEOUT_GRACE_SECONDS = 15.0
+
 
 def _get_event_loop():
     """Get or create an event loop for running async code in sync Celery tasks."""
@@ -31,9 +66,32 @@ def _get_event_loop():
 
 
 def _run_async(coro):
-    """Run an async coroutine from a sync Celery task."""
-    loop = _get_event_loop()
-    return loop.run_until_complete(coro)
+    """
+    Run an async coroutine from a sync Celery task.
+
+    WORKER_RUNTIME=async (default) submits it to the process-wide event loop,
+    so concurrent task threads share one loop. WORKER_RUNTIME=loop keeps the
+    old one-run-at-a-time run_until_complete behaviour for the prefork pool.
+    """
+    if os.getenv("WORKER_RUNTIME", "async").strip().lower() == "loop":
+        loop = _get_event_loop()
+        return loop.run_until_complete(coro)
+    timeout = run_timeout_seconds()
+    return get_worker_runtime().run(
+        coro, timeout=timeout + RUN_TIMEOUT_GRACE_SECONDS if timeout else None
+    )
+
+
+_agent = None
+
+
+def _get_agent():
+    """One agent (and embedding model) per worker process, shared by all runs."""
+    global _agent
+    if _agent is None:
+        from api.dependencies import build_agent
+        _agent = build_agent()
+    return _agent
 
 
 async def _update_trace(db, run_id: str, update: dict):
@@ -44,17 +102,89 @@ async def _update_trace(db, run_id: str, update: dict):
     )
 
 
-async def _emit_event(db, run_id: str, event_type: str, data: dict = None):
-    """Write a progress event for SSE consumption (Phase 2 ready)."""
-    await db.run_events.insert_one({
-        "run_id": run_id,
-        "event": event_type,
-        "data": data or {},
-        "timestamp": datetime.now(timezone.utc),
+def _queue_wait_seconds(queued_at, started_at: datetime) -> float | None:
+    if not isinstance(queued_at, datetime):
+        return None
+    if queued_at.tzinfo is None:
+        queued_at = queued_at.replace(tzinfo=timezone.utc)
+    return max((started_at - queued_at).total_seconds(), 0.0)
+
+
+async def _cancel_requested(db, run_id: str) -> bool:
+    trace = await db.traces.find_one({"request_id": run_id}, {"cancel_requested": 1})
+    return bool(trace and trace.get("cancel_requested"))
+
+
+async def _watch_for_cancel(db, run_id: str, token: CancellationToken) -> None:
+    """
+    Trip ``token`` once the run's cancel is requested.
+
+    Subscribes first and then reads the trace flag once, so a cancel that
+    landed before the subscription is not missed; after that it waits on
+    the bus. The trace is polled only when there is no bus to listen on.
+    """
+    bus = get_event_bus()
+    subscription = None
+    try:
+        if bus is not None:
+            try:
+                subscription = await bus.subscribe(run_id)
+            except Exception as e:
+                _logger.warning(f"cancel watcher polling, event_bus unavailable run_id={run_id} error={e}")
+
+        if await _cancel_requested(db, run_id):
+            token.cancel("Cancelled by user")
+            return
+
+        while not token.cancelled:
+            if subscription is None:
+                await asyncio.sleep(CANCEL_POLL_SECONDS)
+                if await _cancel_requested(db, run_id):
+                    token.cancel("Cancelled by user")
+                    return
+                continue
+            try:
+                message = await subscription.get(timeout=CANCEL_POLL_SECONDS)
+            except Exception as e:
+                _logger.warning(f"cancel watcher polling, event_bus failed run_id={run_id} error={e}")
+                await subscription.close()
+                subscription = None
+                continue
+            if message and message.get("event") == "cancel_requested":
+                token.cancel("Cancelled by user")
+                return
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _logger.warning(f"cancel watcher stopped run_id={run_id} error={e}")
+    finally:
+        if subscription is not None:
+            await subscription.close()
+
+
+async def _fail_run(
+    db, events: RunEventWriter, run_id: str, marked_running: bool, error_detail: str, reason: str
+) -> dict:
+    """Terminal ``failed`` state (trace, stats counter, SSE events) for a run that ran out of time."""
+    await record_run_transition(db, "running" if marked_running else "queued", "failed")
+    await _update_trace(db, run_id, {
+        "status": "failed",
+        "error": error_detail,
+        "failure_reason": reason,
+        "completed_at": datetime.now(timezone.utc),
     })
+    await events.emit("error", {"error": error_detail, "reason": reason})
+    await events.emit("status_change", {"status": "failed", "error": error_detail, "reason": reason})
+    return {"status": "failed", "run_id": run_id, "error": error_detail}
 
 
-async def _execute_agent_async(run_id: str, session_id: str, goal: str, agent_id: str | None = None):
+async def _execute_agent_async(
+    run_id: str,
+    session_id: str,
+    goal: str,
+    agent_id: str | None = None,
+    priority: str | None = None,
+):
     """
     Core async execution logic.
     Called from the sync Celery task via _run_async().
@@ -62,38 +192,96 @@ async def _execute_agent_async(run_id: str, session_id: str, goal: str, agent_id
     # ---- Connect to MongoDB (worker process) ----
     MongoDB.connect()
     db = MongoDB.get_database()
+    events = RunEventWriter(db, run_id)
+    token = CancellationToken()
+    use_cancellation_token(token)
+    run_timeout = run_timeout_seconds()
+    # Tool timeouts and retries shrink to fit what is left of the run.
+    use_deadline(Deadline.after(run_timeout) if run_timeout else None)
+    watcher = None
+    started = time.time()
+    marked_running = False
 
     try:
-        # ---- Mark as running ----
+        # ---- Mark as running (unless cancelled while queued) ----
         started_at = datetime.now(timezone.utc)
+        queued = await db.traces.find_one_and_update(
+            {"request_id": run_id, "status": {"$ne": "cancelled"}},
+            {"$set": {
+                "status": "running",
+                "started_at": started_at,
+                "agent_id": agent_id,
+            }},
+            projection={"queued_at": 1, "status": 1, "submitted_by": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if queued is None and await db.traces.find_one({"request_id": run_id, "status": "cancelled"}, {"_id": 1}):
+            return {"status": "cancelled", "run_id": run_id}
+        await record_run_transition(db, (queued or {}).get("status", "queued"), "running")
+        marked_running = True
+        submitted_by = (queued or {}).get("submitted_by") or {}
+        if submitted_by.get("user_id"):
+            # LLM tokens and tool calls of this run count against the submitter's quotas.
+            use_quota_subject(QuotaSubject(submitted_by["user_id"], submitted_by.get("role") or "developer", agent_id))
+        queue_wait = _queue_wait_seconds((queued or {}).get("queued_at"), started_at)
+        if queue_wait is not None:
+            RUN_QUEUE_WAIT.labels(queue=queue_for_priority(priority)).observe(queue_wait)
+        await events.emit("status_change", {"status": "running", "queue_wait": queue_wait})
+        watcher = asyncio.ensure_future(_watch_for_cancel(db, run_id, token))
+
+        # ---- Reuse the process agent (same factory as API) ----
+        agent = _get_agent()
+
+        try:
+            await asyncio.wait_for(
+                agent.run_goal(
+                    session_id,
+                    goal,
+                    agent_id=agent_id,
+                    request_id=run_id,
+                    started_at=started_at,
+                    event_callback=events.emit,
+                ),
+                timeout=run_timeout,
+            )
+        except TimeoutError:
+            return await _fail_run(
+                db, events, run_id, marked_running,
+                f"RunTimeout: run exceeded RUN_TIMEOUT_SECONDS={run_timeout:g}",
+                reason="timeout",
+            )
+        await record_run_transition(db, "running", "completed")
+        return {"status": "completed", "run_id": run_id}
+
+    except RunCancelledError as e:
+        # run_goal already wrote the cancelled trace and emitted the status change.
+        elapsed = time.time() - started
+        saved = max(await estimate_run_seconds(db) - elapsed, 0.0)
+        await record_run_transition(db, "running", "cancelled")
+        RUN_CANCEL_COUNTER.labels(stage="running").inc()
+        RUN_CANCEL_SAVED_SECONDS.labels(stage="running").observe(saved)
         await _update_trace(db, run_id, {
-            "status": "running",
-            "started_at": started_at,
-            "agent_id": agent_id,
+            "status": "cancelled",
+            "completed_at": datetime.now(timezone.utc),
+            "cancellation": {"stage": "running", "elapsed_seconds": elapsed, "estimated_saved_seconds": saved},
         })
-        await _emit_event(db, run_id, "status_change", {"status": "running"})
+        return {"status": "cancelled", "run_id": run_id, "reason": str(e)}
 
-        # ---- Build the agent (same factory as API) ----
-        from api.dependencies import build_agent
-        agent = build_agent()
-
-        async def event_callback(event_type: str, data: dict | None = None):
-            await _emit_event(db, run_id, event_type, data or {})
-
-        await agent.run_goal(
-            session_id,
-            goal,
-            agent_id=agent_id,
-            request_id=run_id,
-            started_at=started_at,
-            event_callback=event_callback,
+    except asyncio.CancelledError:
+        # Backstop cancellation by the worker runtime (or loop shutdown):
+        # still leave a terminal trace, event and counter behind.
+        await _fail_run(
+            db, events, run_id, marked_running,
+            "RunTimeout: cancelled by the worker runtime",
+            reason="timeout",
         )
-        return {"status": "completed", "run_id": run_id}
+        raise
 
     except Exception as e:
         # ---- Mark failed ----
         error_detail = f"{type(e).__name__}: {str(e)}"
         tb = traceback.format_exc()
+        await record_run_transition(db, "running" if marked_running else "queued", "failed")
         existing = await db.traces.find_one({"request_id": run_id}, {"status": 1})
         if existing and existing.get("status") == "failed":
             return {"status": "failed", "run_id": run_id, "error": error_detail}
@@ -104,10 +292,14 @@ async def _execute_agent_async(run_id: str, session_id: str, goal: str, agent_id
             "error_traceback": tb,
             "completed_at": datetime.now(timezone.utc),
         })
-        await _emit_event(db, run_id, "error", {"error": error_detail})
-        await _emit_event(db, run_id, "status_change", {"status": "failed", "error": error_detail})
+        await events.emit("error", {"error": error_detail})
+        await events.emit("status_change", {"status": "failed", "error": error_detail})
 
         return {"status": "failed", "run_id": run_id, "error": error_detail}
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        await events.close()
 
 
 # ============================================================
@@ -124,17 +316,29 @@ async def _execute_agent_async(run_id: str, session_id: str, goal: str, agent_id
     time_limit=300,       # hard kill after 5 min
     soft_time_limit=240,  # SoftTimeLimitExceeded after 4 min
 )
-def execute_agent_run(self, run_id: str, session_id: str, goal: str, agent_id: str | None = None):
+def execute_agent_run(
+    self,
+    run_id: str,
+    session_id: str,
+    goal: str,
+    agent_id: str | None = None,
+    priority: str | None = None,
+):
     """
     Celery task: execute an agent run asynchronously.
 
     Called by the API with:
-        execute_agent_run.delay(run_id, session_id, goal)
+        execute_agent_run.delay(run_id, session_id, goal, agent_id, priority="interactive")
+
+    ``priority`` selects the queue (see celery_app.route_agent_task).
 
     The trace document must already exist with status='queued'.
     """
     try:
-        return _run_async(_execute_agent_async(run_id, session_id, goal, agent_id))
+        return _run_async(_execute_agent_async(run_id, session_id, goal, agent_id, priority))
+    except TimeoutError:
+        # The cancelled coroutine has already written its timed-out state.
+        raise
     except Exception as e:
         # If async execution itself crashes, mark as failed
         try:
@@ -150,3 +354,25 @@ def execute_agent_run(self, run_id: str, session_id: str, goal: str, agent_id: s
         except Exception:
             pass
         raise
+
+
+def enqueue_agent_runs(runs: list[dict]) -> list[str | None]:
+    """
+    Enqueue many runs as one Celery group. The group still publishes one
+    broker message per run, but over a single producer connection instead
+    of one ``delay`` (and connection checkout) per run. Blocking: call it
+    off the event loop. Each dict needs run_id, session_id, goal, agent_id
+    and priority; returns the task ids in order.
+    """
+    signatures = [
+        execute_agent_run.s(
+            run["run_id"],
+            run["session_id"],
+            run["goal"],
+            run.get("agent_id"),
+            priority=run.get("priority"),
+        )
+        for run in runs
+    ]
+    result = group(signatures).apply_async()
+    return [getattr(child, "id", None) for child in (getattr(result, "results", None) or [])]
@@ -17,6 +17,11 @@ class RAGSearchTool(BaseTool):
         self.embedding_service = embedding_service
         self.retriever = retriever
 
+    @property
+    def index_version(self) -> str:
+        vs = getattr(self.retriever, "vector_store", self.retriever)
+        return str(getattr(vs, "index_version", "unknown"))
+
     # ------------------------
     # Internal helpers
     # ------------------------
@@ -4,11 +4,13 @@ Base tool contract for registry compatibility.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class BaseTool(ABC):
     name: str
+    # Bounded executor for the tool's blocking work; set by ToolRegistry.register.
+    bulkhead: Optional[Any] = None
 
     @abstractmethod
     def execute(self, step: Dict[str, Any]) -> Dict[str, Any]:
@@ -12,6 +12,12 @@ from app.reliability.circuit_breaker import CircuitBreaker
 
 load_dotenv()
 
+# search() reports failures as text; these prefixes mark a failed lookup.
+_ERROR_PREFIXES = (
+    "Search API error",
+    "Web search is unavailable",
+)
+
 
 class WebSearchTool(BaseTool):
 
@@ -26,7 +32,10 @@ class WebSearchTool(BaseTool):
             failure_threshold=3,
             recovery_timeout=60,
             execution_timeout=10,
-            name="serpapi"
+            name="serpapi",
+            slow_call_duration=5,
+            minimum_calls=10,
+            half_open_max_calls=2,
         )
 
     @property
@@ -45,7 +54,12 @@ class WebSearchTool(BaseTool):
         }
 
         async def _do_search():
-            # requests.get is sync, wrap in to_thread
+            # requests.get is sync: run it on this tool's bulkhead so hung
+            # SerpAPI calls cannot starve the shared default executor.
+            if self.bulkhead is not None:
+                return await self.bulkhead.run(
+                    requests.get, self.base_url, params=params, timeout=10
+                )
             return await asyncio.to_thread(
                 requests.get, self.base_url, params=params, timeout=10
             )
@@ -92,6 +106,16 @@ class WebSearchTool(BaseTool):
             # search is now async
             result = await self.search(query)
 
+            if result.startswith(_ERROR_PREFIXES):
+                return {
+                    "status": "error",
+                    "data": None,
+                    "metadata": {
+                        "error": result,
+                        "circuit_status": self._circuit.state
+                    }
+                }
+
             return {
                 "status": "success",
                 "data": result,
@@ -0,0 +1,57 @@
+"""
+Guardrail Scanner Micro-benchmark
+
+Compares the original per-pattern re.search loop (compile-cache lookup
+per pattern per call) with the precompiled PatternScanner on clean tool outputs of increasing size (the common case,
+where every pattern has to be tried across the whole text).
+
+Run from backend/:
+    python -m scripts.benchmark_guardrails [--repeat 50]
+"""
+
+import argparse
+import random
+import re
+import string
+import timeit
+
+from app.security.guardrails import Guardrails
+
+SIZES_KB = (4, 32, 128, 512)
+
+
+def _clean_text(size_kb: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_kb * 1024:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _legacy_sanitize(text: str) -> None:
+    lowered = text.lower()
+    for pattern in Guardrails.TOOL_OUTPUT_BLOCK_PATTERNS:
+        if re.search(pattern, lowered):
+            raise ValueError("malicious")
+    for pattern in Guardrails.SENSITIVE_PATTERNS:
+        if re.search(pattern, lowered):
+            raise ValueError("sensitive")
+
+
+def benchmark(repeat: int) -> None:
+    guard = Guardrails()
+    print(f"{'size':>8} {'per-pattern':>14} {'scanner':>14} {'speedup':>9}")
+    for size_kb in SIZES_KB:
+        text = _clean_text(size_kb)
+        legacy = min(timeit.repeat(lambda: _legacy_sanitize(text), number=1, repeat=repeat))
+        scanner = min(timeit.repeat(lambda: guard.sanitize_tool_output(text), number=1, repeat=repeat))
+        print(f"{size_kb:>6}KB {legacy * 1000:>12.3f}ms {scanner * 1000:>12.3f}ms {legacy / scanner:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    benchmark(parser.parse_args().repeat)
@@ -4,7 +4,7 @@ Enterprise AI Agent Engine
 """
 
 import asyncio
-from collections import Counter
+from collections import Counter, defaultdict
 from statistics import mean, median
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
@@ -39,6 +39,12 @@ async def evaluate():
 
     memory_only = 0
 
+    # LLM timing counters recorded per call site (planner, repair, synthesis, ...)
+    eval_tps = defaultdict(list)
+    prompt_tps = defaultdict(list)
+    load_durations = defaultdict(list)
+    llm_call_counter = Counter()
+
     for trace in traces:
         steps = trace.get("steps", [])
         observations = trace.get("observations", [])
@@ -67,6 +73,19 @@ async def evaluate():
             if "total_execution_time" in metadata:
                 tool_latencies.append(metadata["total_execution_time"])
 
+        # ----------------------------
+        # LLM call timing stats
+        # ----------------------------
+        for call in trace.get("llm_calls") or []:
+            site = call.get("call_site", "unknown")
+            llm_call_counter[site] += 1
+            if call.get("eval_tokens_per_sec"):
+                eval_tps[site].append(call["eval_tokens_per_sec"])
+            if call.get("prompt_tokens_per_sec"):
+                prompt_tps[site].append(call["prompt_tokens_per_sec"])
+            if call.get("load_duration") is not None:
+                load_durations[site].append(call["load_duration"])
+
         # ----------------------------
         # Request-level latency stats
         # ----------------------------
@@ -122,6 +141,35 @@ async def evaluate():
     report_latency("Synthesis Latency", synthesis_latencies)
     report_latency("Total Request Latency", total_latencies)
 
+    # ----------------------------
+    # LLM Throughput Reporting
+    # ----------------------------
+    def percentile(sorted_vals, pct):
+        index = int(round(pct / 100 * (len(sorted_vals) - 1)))
+        return sorted_vals[max(0, min(index, len(sorted_vals) - 1))]
+
+    def report_rate(name, values_by_site):
+        if not values_by_site:
+            return
+        print(f"\n{name} (tokens/sec):")
+        for site, values in sorted(values_by_site.items()):
+            sorted_vals = sorted(values)
+            print(
+                f"  {site:<10} n={len(values):<5} "
+                f"p10={percentile(sorted_vals, 10):.1f} "
+                f"p50={percentile(sorted_vals, 50):.1f} "
+                f"p90={percentile(sorted_vals, 90):.1f}"
+            )
+
+    if llm_call_counter:
+        print("\nLLM Calls:")
+        for site, count in sorted(llm_call_counter.items()):
+            reloads = sum(1 for value in load_durations[site] if value > 1.0)
+            print(f"  {site}: {count} calls, {reloads} with model load > 1s")
+
+    report_rate("Decode Throughput", eval_tps)
+    report_rate("Prompt Eval Throughput", prompt_tps)
+
     print("\n=============================================\n")
 
 
@@ -52,6 +52,9 @@ os.environ.setdefault("OLLAMA_MODEL", "llama3:8b-instruct-q4_K_M")
 os.environ.setdefault("AUTH_DEV_BYPASS_ENABLED", "false")
 os.environ.setdefault("DEV_EMAIL_OTP_ECHO_ENABLED", "true")
 os.environ.setdefault("SERPAPI_KEY", "")
+os.environ.setdefault("EVENT_BUS_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("QUEUE_DEPTH_METRICS_ENABLED", "false")
 
 
 class FakeInsertResult:
@@ -71,13 +74,26 @@ class FakeDeleteResult:
         self.deleted_count = deleted_count
 
 
+def _inc_path(doc: dict[str, Any], path: str, value: int | float) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = doc.get(leaf, 0) + value
+
+
 class FakeCursor:
     def __init__(self, docs: list[dict[str, Any]]):
         self.docs = docs
 
-    def sort(self, field: str, direction: int):
-        reverse = direction == -1
-        self.docs.sort(key=lambda doc: doc.get(field) or "", reverse=reverse)
+    def sort(self, field: str | list[tuple[str, int]], direction: int = 1):
+        keys = field if isinstance(field, list) else [(field, direction)]
+        # Stable sorts applied last key first give a compound ordering.
+        for name, key_direction in reversed(keys):
+            # Missing / null values sort lowest, as in Mongo.
+            self.docs.sort(
+                key=lambda doc: (doc.get(name) is not None, doc.get(name) if doc.get(name) is not None else ""),
+                reverse=key_direction == -1,
+            )
         return self
 
     async def to_list(self, length: int | None = None):
@@ -101,7 +117,19 @@ class FakeCollection:
 
         for key, expected in query.items():
             if key == "$or":
-                return any(self._matches(doc, subquery) for subquery in expected)
+                if not any(self._matches(doc, subquery) for subquery in expected):
+                    return False
+                continue
+            if key == "$and":
+                if not all(self._matches(doc, subquery) for subquery in expected):
+                    return False
+                continue
+            if key == "$text":
+                terms = expected["$search"].lower().split()
+                text = " ".join(str(value) for value in doc.values() if isinstance(value, str)).lower()
+                if not any(term in text.split() for term in terms):
+                    return False
+                continue
 
             actual = doc.get(key)
             if isinstance(expected, dict):
@@ -111,6 +139,9 @@ class FakeCollection:
                     flags = re.IGNORECASE if "i" in expected.get("$options", "") else 0
                     if actual is None or re.search(expected["$regex"], str(actual), flags) is None:
                         return False
+                elif any(op.startswith("$") for op in expected):
+                    if not self._match_operators(actual, expected):
+                        return False
                 else:
                     if actual != expected:
                         return False
@@ -119,18 +150,42 @@ class FakeCollection:
 
         return True
 
+    @staticmethod
+    def _match_operators(actual: Any, expected: dict[str, Any]) -> bool:
+        for op, value in expected.items():
+            if op == "$in" and actual not in value:
+                return False
+            if op == "$nin" and actual in value:
+                return False
+            if op == "$ne" and actual == value:
+                return False
+            if op == "$exists" and (actual is not None) != bool(value):
+                return False
+            if op in {"$gt", "$gte", "$lt", "$lte"}:
+                if actual is None:
+                    return False
+                if op == "$gt" and not actual > value:
+                    return False
+                if op == "$gte" and not actual >= value:
+                    return False
+                if op == "$lt" and not actual < value:
+                    return False
+                if op == "$lte" and not actual <= value:
+                    return False
+        return True
+
     def _project(self, doc: dict[str, Any], projection: dict[str, int] | None) -> dict[str, Any]:
         if not projection:
             return self._clone(doc)
 
-        include = {key for key, value in projection.items() if value}
+        include = {key.split(".")[0] for key, value in projection.items() if value}
         projected = {key: value for key, value in doc.items() if key in include or key == "_id"}
         return self._clone(projected)
 
-    async def find_one(self, query: dict[str, Any]):
+    async def find_one(self, query: dict[str, Any], projection: dict[str, int] | None = None):
         for doc in self.docs:
             if self._matches(doc, query):
-                return self._clone(doc)
+                return self._project(doc, projection)
         return None
 
     def find(self, query: dict[str, Any] | None = None, projection: dict[str, int] | None = None):
@@ -146,6 +201,13 @@ class FakeCollection:
         self.docs.append(self._clone(doc))
         return FakeInsertResult(str(doc["_id"]))
 
+    async def insert_many(self, docs: list[dict[str, Any]], ordered: bool = True):
+        inserted_ids = []
+        for doc in docs:
+            result = await self.insert_one(doc)
+            inserted_ids.append(result.inserted_id)
+        return SimpleNamespace(inserted_ids=inserted_ids)
+
     async def update_one(self, query: dict[str, Any], update: dict[str, Any], upsert: bool = False):
         for index, doc in enumerate(self.docs):
             if self._matches(doc, query):
@@ -153,7 +215,10 @@ class FakeCollection:
                 for field, value in update.get("$set", {}).items():
                     updated[field] = value
                 for field, value in update.get("$inc", {}).items():
-                    updated[field] = updated.get(field, 0) + value
+                    _inc_path(updated, field, value)
+                for field, value in update.get("$push", {}).items():
+                    items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    updated[field] = list(updated.get(field) or []) + list(items)
                 self.docs[index] = updated
                 return FakeUpdateResult(matched_count=1, modified_count=1)
 
@@ -163,13 +228,81 @@ class FakeCollection:
                 for key, value in query.items()
                 if not key.startswith("$") and not isinstance(value, dict)
             }
+            for field, value in update.get("$setOnInsert", {}).items():
+                inserted[field] = value
             for field, value in update.get("$set", {}).items():
                 inserted[field] = value
+            for field, value in update.get("$inc", {}).items():
+                _inc_path(inserted, field, value)
+            for field, value in update.get("$push", {}).items():
+                inserted[field] = list(value["$each"]) if isinstance(value, dict) and "$each" in value else [value]
             await self.insert_one(inserted)
             return FakeUpdateResult(matched_count=0, modified_count=0, upserted_id=str(inserted["_id"]))
 
         return FakeUpdateResult(matched_count=0, modified_count=0)
 
+    async def find_one_and_update(
+        self,
+        query: dict[str, Any],
+        update: dict[str, Any],
+        projection: dict[str, int] | None = None,
+        return_document: bool = False,
+        upsert: bool = False,
+    ):
+        before = await self.find_one(query)
+        result = await self.update_one(query, update, upsert=upsert)
+        if return_document:
+            after_id = result.upserted_id or (before or {}).get("_id")
+            after = await self.find_one({"_id": after_id}) if after_id is not None else None
+            return self._project(after, projection) if after else None
+        return self._project(before, projection) if before else None
+
+    @staticmethod
+    def _field_value(doc: dict[str, Any], path: str) -> Any:
+        value: Any = doc
+        for part in path.lstrip("$").split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+    def aggregate(self, pipeline: list[dict[str, Any]]):
+        """Supports the $match and $group ($sum / $avg) stages used by the API."""
+        docs = [self._clone(doc) for doc in self.docs]
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [doc for doc in docs if self._matches(doc, stage["$match"])]
+            elif "$group" in stage:
+                spec = stage["$group"]
+                groups: dict[Any, list[dict[str, Any]]] = {}
+                for doc in docs:
+                    key = self._field_value(doc, spec["_id"]) if isinstance(spec["_id"], str) else spec["_id"]
+                    groups.setdefault(key, []).append(doc)
+                docs = []
+                for key, members in groups.items():
+                    row: dict[str, Any] = {"_id": key}
+                    for field, accumulator in spec.items():
+                        if field == "_id":
+                            continue
+                        op, arg = next(iter(accumulator.items()))
+                        values = [
+                            arg if not isinstance(arg, str) else self._field_value(member, arg)
+                            for member in members
+                        ]
+                        numbers = [value for value in values if isinstance(value, (int, float))]
+                        if op == "$sum":
+                            row[field] = sum(numbers)
+                        elif op == "$avg":
+                            row[field] = sum(numbers) / len(numbers) if numbers else None
+                    docs.append(row)
+        return FakeCursor(docs)
+
+    async def bulk_write(self, requests: list[Any], ordered: bool = True):
+        for request in requests:
+            if hasattr(request, "_doc") and not hasattr(request, "_filter"):
+                await self.insert_one(dict(request._doc))
+            else:
+                await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+        return SimpleNamespace(acknowledged=True)
+
     async def delete_one(self, query: dict[str, Any]):
         for index, doc in enumerate(self.docs):
             if self._matches(doc, query):
@@ -192,13 +325,16 @@ class FakeCollection:
 class FakeDatabase:
     def __init__(self):
         self.agents = FakeCollection()
+        self.auth_revocations = FakeCollection()
         self.agent_versions = FakeCollection()
         self.conversations = FakeCollection()
         self.eval_results = FakeCollection()
         self.long_term_memory = FakeCollection()
         self.password_resets = FakeCollection()
         self.response_cache = FakeCollection()
+        self.run_batches = FakeCollection()
         self.run_events = FakeCollection()
+        self.stats_counters = FakeCollection()
         self.traces = FakeCollection()
         self.users = FakeCollection()
 
@@ -218,6 +354,25 @@ def fake_db():
     return FakeDatabase()
 
 
+@pytest.fixture(autouse=True)
+def _reset_session_state():
+    from app.security.session_cache import reset_session_state
+
+    reset_session_state()
+    yield
+    reset_session_state()
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    from app.infra.rate_limits import reset_rate_limit_store, use_quota_subject
+
+    reset_rate_limit_store()
+    use_quota_subject(None)
+    yield
+    reset_rate_limit_store()
+
+
 @pytest.fixture
 def mock_agent():
     agent = MagicMock()
@@ -0,0 +1,83 @@
+"""
+tests/test_async_runtime.py
+Unit tests for the shared-loop Celery worker runtime.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.infra.async_runtime import AsyncWorkerRuntime
+
+
+@pytest.fixture
+def runtime():
+    rt = AsyncWorkerRuntime(max_concurrency=2)
+    yield rt
+    rt.stop()
+
+
+def _run_in_threads(runtime, coros):
+    results = [None] * len(coros)
+
+    def _call(index, coro):
+        results[index] = runtime.run(coro)
+
+    threads = [threading.Thread(target=_call, args=(i, c)) for i, c in enumerate(coros)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_runs_overlap_on_one_loop(runtime):
+    loops = []
+
+    async def _work(value):
+        loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0.2)
+        return value
+
+    start = time.perf_counter()
+    results = _run_in_threads(runtime, [_work(1), _work(2)])
+    elapsed = time.perf_counter() - start
+
+    assert results == [1, 2]
+    assert loops[0] is loops[1]
+    assert elapsed < 0.35
+
+
+def test_concurrency_cap_applies_backpressure(runtime):
+    peak = 0
+    active = 0
+
+    async def _work():
+        nonlocal peak, active
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+
+    _run_in_threads(runtime, [_work() for _ in range(5)])
+
+    assert peak == 2
+    assert runtime.in_flight == 0
+
+
+def test_timeout_cancels_the_coroutine(runtime):
+    cancelled = threading.Event()
+
+    async def _slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        runtime.run(_slow(), timeout=0.05)
+
+    assert cancelled.wait(1)
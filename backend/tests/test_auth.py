@@ -5,6 +5,8 @@ Verifies registration, login, token refresh, OTP flow, role enforcement,
 and configuration settings integration.
 """
 
+import time
+
 import pytest
 from datetime import datetime, timezone, timedelta
 from app.config.settings import settings
@@ -195,3 +197,152 @@ async def test_rbac_routes(client, seed_user):
     # 2. Developer accesses admin route (error 403)
     dev_res = client.get("/api/auth/api/admin/users", headers=dev_headers)
     assert dev_res.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_admin_stats_aggregates_by_role_and_status(client, seed_user, fake_db):
+    seed_user(email="stats_admin@example.com", password="Password123!", role="admin")
+    seed_user(email="stats_viewer@example.com", password="Password123!", role="viewer")
+    fake_db.traces.docs.extend([
+        {"_id": "t1", "request_id": "r1", "status": "completed"},
+        {"_id": "t2", "request_id": "r2", "status": "failed"},
+        {"_id": "t3", "request_id": "r3", "status": "completed"},
+    ])
+    res = client.post("/api/auth/login", json={"email": "stats_admin@example.com", "password": "Password123!"})
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    stats = client.get("/api/auth/api/admin/stats", headers=headers).json()
+
+    assert stats["users"] == {"total": 2, "admin": 1, "developer": 0, "viewer": 1}
+    assert stats["runs"]["total"] == 3
+    assert stats["runs"]["completed"] == 2
+    assert stats["runs"]["failed"] == 1
+    assert fake_db.stats_counters.docs == []
+
+
+@pytest.mark.asyncio
+async def test_admin_stats_counters_follow_transitions(client, seed_user, fake_db, monkeypatch):
+    monkeypatch.setenv("STATS_COUNTERS_ENABLED", "true")
+    seed_user(email="stats_admin@example.com", password="Password123!", role="admin")
+    res = client.post("/api/auth/login", json={"email": "stats_admin@example.com", "password": "Password123!"})
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    assert client.get("/api/auth/api/admin/stats", headers=headers).json()["users"]["total"] == 1
+
+    register = client.post(
+        "/api/auth/register",
+        json={"email": "stats_dev@example.com", "password": "Password123!", "name": "Stats Dev"},
+    )
+    dev_id = register.json()["user"]["id"]
+    client.patch(f"/api/auth/api/admin/users/{dev_id}/role", json={"role": "viewer"}, headers=headers)
+    client.post("/api/runs/submit", json={"session_id": "stats", "goal": "Count me"}, headers=headers)
+
+    # Served from the counters document; the aggregation is not re-run.
+    monkeypatch.setattr(fake_db.traces, "aggregate", lambda pipeline: pytest.fail("aggregation re-run"))
+    stats = client.get("/api/auth/api/admin/stats", headers=headers).json()
+
+    assert stats["users"] == {"total": 2, "admin": 1, "developer": 0, "viewer": 1}
+    assert stats["runs"]["total"] == 1
+    assert stats["runs"]["queued"] == 1
+
+
+def _login_headers(client, email):
+    res = client.post("/api/auth/login", json={"email": email, "password": "Password123!"})
+    body = res.json()
+    return {"Authorization": f"Bearer {body['access_token']}"}, body["refresh_token"]
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_reuse_cached_claims(client, seed_user, fake_db, monkeypatch):
+    seed_user(email="cache_dev@example.com", password="Password123!", role="developer")
+    headers, _ = _login_headers(client, "cache_dev@example.com")
+    lookups = []
+    original_find_one = fake_db.users.find_one
+
+    async def _find_one(query, projection=None):
+        lookups.append(query)
+        return await original_find_one(query, projection)
+
+    monkeypatch.setattr(fake_db.users, "find_one", _find_one)
+
+    for _ in range(3):
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    assert len(lookups) == 1
+    assert "password_hash" not in client.get("/api/auth/me", headers=headers).json()
+
+
+@pytest.mark.asyncio
+async def test_role_change_and_delete_apply_to_existing_tokens(client, seed_user):
+    dev = seed_user(email="demote_dev@example.com", password="Password123!", role="developer")
+    seed_user(email="demote_admin@example.com", password="Password123!", role="admin")
+    dev_headers, _ = _login_headers(client, "demote_dev@example.com")
+    admin_headers, _ = _login_headers(client, "demote_admin@example.com")
+    submit = {"session_id": "role-test", "goal": "Check role"}
+
+    assert client.post("/api/runs/submit", json=submit, headers=dev_headers).status_code == 202
+
+    client.patch(f"/api/auth/api/admin/users/{dev['_id']}/role", json={"role": "viewer"}, headers=admin_headers)
+    assert client.post("/api/runs/submit", json=submit, headers=dev_headers).status_code == 403
+
+    client.delete(f"/api/auth/api/admin/users/{dev['_id']}", headers=admin_headers)
+    assert client.get("/api/auth/me", headers=dev_headers).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_and_forced_logout_revoke_tokens(client, seed_user):
+    user = seed_user(email="logout_dev@example.com", password="Password123!", role="developer")
+    seed_user(email="logout_admin@example.com", password="Password123!", role="admin")
+    headers, refresh = _login_headers(client, "logout_dev@example.com")
+
+    assert client.post("/api/auth/logout", json={"refresh_token": refresh}, headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": refresh}).status_code == 401
+
+    other_headers, _ = _login_headers(client, "logout_dev@example.com")
+    assert client.get("/api/auth/me", headers=other_headers).status_code == 200
+
+    admin_headers, _ = _login_headers(client, "logout_admin@example.com")
+    revoke = client.post(f"/api/auth/api/admin/users/{user['_id']}/revoke-sessions", headers=admin_headers)
+    assert revoke.status_code == 200
+    assert client.get("/api/auth/me", headers=other_headers).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_returns_429_when_kdf_pool_is_saturated(client, seed_user, monkeypatch):
+    import app.api.auth as auth_module
+    from app.infra.bounded_executor import ExecutorSaturatedError
+
+    seed_user(email="busy@example.com", password="Password123!")
+
+    class _SaturatedExecutor:
+        async def run(self, fn, *args):
+            raise ExecutorSaturatedError("kdf", 0)
+
+    monkeypatch.setattr(auth_module, "_kdf_executor", lambda: _SaturatedExecutor())
+
+    response = client.post("/api/auth/login", json={"email": "busy@example.com", "password": "Password123!"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_clear_all_drops_cached_claims_in_other_processes(client, seed_user, fake_db):
+    from app.security.session_cache import RevocationList, UserClaimsCache
+
+    dev = seed_user(email="clear_dev@example.com", password="Password123!", role="developer")
+    admin = seed_user(email="clear_admin@example.com", password="Password123!", role="admin")
+    admin_headers, _ = _login_headers(client, "clear_admin@example.com")
+    other_cache = UserClaimsCache()
+    other_cache.put(dev)
+    other_revocations = RevocationList()
+    await other_revocations.sync(fake_db, other_cache, force=True)
+
+    assert client.post("/api/auth/api/admin/clear-all", headers=admin_headers).status_code == 200
+    await other_revocations.sync(fake_db, other_cache, force=True)
+
+    assert other_cache.get(dev["_id"]) is None
+    assert other_revocations.is_revoked({"sub": dev["_id"], "iat": time.time() - 5})
+    assert not other_revocations.is_revoked({"sub": admin["_id"], "iat": time.time() - 5})
+    assert client.get("/api/auth/me", headers=admin_headers).status_code == 200
@@ -0,0 +1,136 @@
+"""
+tests/test_bounded_executor.py
+Unit tests for the bounded thread-pool executor used for blocking work.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.infra.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_runs_blocking_call_off_the_loop(executor):
+    loop_thread = threading.get_ident()
+
+    worker_thread = await executor.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+    assert executor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_workers_and_queue_are_full(executor):
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.run(lambda: "rejected")
+
+    release.set()
+    assert await running is True
+    assert await queued == "queued"
+    assert executor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_is_released_when_the_call_raises(executor):
+    def _boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(_boom)
+
+    assert executor.in_flight == 0
+    assert await executor.run(lambda: 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_reports_queue_depth_and_saturation(executor):
+    from prometheus_client import REGISTRY
+
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+    await asyncio.sleep(0.05)
+
+    assert executor.queue_depth == 1
+    assert REGISTRY.get_sample_value("agent_executor_queue_depth", {"executor": "test"}) == 1
+    assert REGISTRY.get_sample_value("agent_executor_saturation_ratio", {"executor": "test"}) == 1.0
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert REGISTRY.get_sample_value("agent_executor_saturation_ratio", {"executor": "test"}) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_runs_in_the_callers_context(executor):
+    from app.infra.deadline import Deadline, current_deadline, use_deadline
+
+    deadline = Deadline.after(5)
+    use_deadline(deadline)
+    try:
+        assert await executor.run(current_deadline) is deadline
+    finally:
+        use_deadline(None)
+
+
+def test_registry_assigns_a_bulkhead_per_tool(monkeypatch):
+    from app.infra.bounded_executor import reset_bounded_executors
+    from app.registry.tool_registry import ToolRegistry
+    from app.tools.tools import BaseTool
+
+    class _Tool(BaseTool):
+        def __init__(self, name):
+            self.name = name
+
+        def execute(self, step):
+            return {"status": "success", "data": None}
+
+    monkeypatch.setenv("TOOL_BULKHEAD_WORKERS_WEB_SEARCH", "3")
+    reset_bounded_executors()
+    registry = ToolRegistry()
+    custom = BoundedExecutor("custom", max_workers=1)
+    try:
+        registry.register(_Tool("rag_search"))
+        registry.register(_Tool("web_search"))
+        registry.register(_Tool("other"), bulkhead=custom)
+
+        assert registry.bulkhead("rag_search").name == "tool:rag_search"
+        assert registry.bulkhead("web_search").max_workers == 3
+        assert registry.bulkhead("rag_search") is not registry.bulkhead("web_search")
+        assert registry.bulkhead("other") is custom
+    finally:
+        custom.shutdown()
+        reset_bounded_executors()
+
+
+@pytest.mark.asyncio
+async def test_waiting_executor_queues_callers_instead_of_rejecting():
+    executor = BoundedExecutor("waiting", max_workers=1, wait_when_full=True)
+    release = threading.Event()
+    try:
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(executor.run(lambda i=i: i)) for i in range(3)]
+        cancelled = asyncio.ensure_future(executor.run(lambda: "never"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+
+        release.set()
+        assert await running is True
+        assert sorted(await asyncio.wait_for(asyncio.gather(*waiting), timeout=2)) == [0, 1, 2]
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
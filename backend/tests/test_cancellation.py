@@ -0,0 +1,257 @@
+"""
+tests/test_cancellation.py
+Unit tests for run cancellation: the cancel endpoint, streaming LLM abort
+and the worker's cancel handling.
+"""
+
+import asyncio
+
+import pytest
+
+import app.tasks.agent_tasks as task_module
+from app.infra.cancellation import (
+    CancellationToken,
+    RunCancelledError,
+    raise_if_cancelled,
+    use_cancellation_token,
+)
+from app.infra.ollama_client import llm_chat, record_llm_calls
+
+
+def _submit(client, auth_headers) -> str:
+    response = client.post(
+        "/api/runs/submit",
+        json={"session_id": "cancel-test", "goal": "Summarize the report"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    return response.json()["run_id"]
+
+
+@pytest.fixture
+def worker_db(monkeypatch, fake_db):
+    from app.memory.database import MongoDB
+
+    monkeypatch.setattr(MongoDB, "connect", lambda: fake_db)
+    monkeypatch.setattr(MongoDB, "get_database", lambda: fake_db)
+    return fake_db
+
+
+def test_cancel_queued_run_finishes_it_immediately(client, auth_headers, fake_db):
+    run_id = _submit(client, auth_headers)
+
+    response = client.post(f"/api/runs/{run_id}/cancel", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"run_id": run_id, "status": "cancelled"}
+    status = client.get(f"/api/runs/{run_id}/status", headers=auth_headers).json()
+    assert status["status"] == "cancelled"
+    assert status["completed_at"] is not None
+    events = [doc for doc in fake_db.run_events.docs if doc["run_id"] == run_id]
+    assert events[-1]["data"]["status"] == "cancelled"
+    assert [event["seq"] for event in events] == [1, 2]
+
+    again = client.post(f"/api/runs/{run_id}/cancel", headers=auth_headers)
+    assert again.status_code == 409
+
+
+def test_cancel_running_run_flags_the_worker(client, auth_headers, fake_db, monkeypatch):
+    import app.api.platform as platform_module
+
+    published = []
+
+    async def _publish(run_id, events):
+        published.append((run_id, [event["event"] for event in events]))
+
+    monkeypatch.setattr(platform_module, "publish_run_events", _publish)
+    run_id = _submit(client, auth_headers)
+    fake_db.traces.docs[-1]["status"] = "running"
+    persisted = len(fake_db.run_events.docs)
+
+    response = client.post(f"/api/runs/{run_id}/cancel", headers=auth_headers)
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "cancelling"
+    assert fake_db.traces.docs[-1]["cancel_requested"] is True
+    # The worker owns the run's seqs: the request is a bus signal, not a persisted event.
+    assert len(fake_db.run_events.docs) == persisted
+    assert published == [(run_id, ["cancel_requested"])]
+
+
+def test_cancel_unknown_run_returns_404(client, auth_headers):
+    response = client.post("/api/runs/missing/cancel", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_closes_stream_when_cancelled():
+    token = CancellationToken()
+    closed = []
+
+    def _stream():
+        try:
+            yield {"message": {"content": "Hel"}, "done": False}
+            token.cancel("stop")
+            yield {"message": {"content": "lo"}, "done": False}
+            yield {"message": {"content": "!"}, "done": True}
+        finally:
+            closed.append(True)
+
+    class _StreamingClient:
+        def chat(self, stream=False, **kwargs):
+            assert stream is True
+            return _stream()
+
+    records = record_llm_calls()
+    use_cancellation_token(token)
+    try:
+        with pytest.raises(RunCancelledError):
+            await llm_chat(_StreamingClient(), call_site="synthesis", model="m", messages=[])
+    finally:
+        use_cancellation_token(None)
+
+    assert closed == [True]
+    # The chunk streamed before the cancel is still accounted for.
+    assert records[-1]["cancelled"] is True
+    assert records[-1]["eval_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_joins_streamed_content_under_token():
+    class _StreamingClient:
+        def chat(self, stream=False, **kwargs):
+            return iter([
+                {"message": {"content": "Hel"}, "done": False},
+                {"message": {"content": "lo"}, "done": True, "eval_count": 2},
+            ])
+
+    use_cancellation_token(CancellationToken())
+    try:
+        response = await llm_chat(_StreamingClient(), call_site="synthesis", model="m", messages=[])
+    finally:
+        use_cancellation_token(None)
+
+    assert response["message"]["content"] == "Hello"
+    assert response["eval_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_run_cancelled_while_queued(worker_db, monkeypatch):
+    worker_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "status": "cancelled", "event_seq": 2})
+    monkeypatch.setattr(task_module, "_get_agent", lambda: pytest.fail("agent should not be built"))
+
+    result = await task_module._execute_agent_async("run-1", "s", "goal")
+
+    assert result == {"status": "cancelled", "run_id": "run-1"}
+    assert worker_db.traces.docs[0]["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_running_run_on_cancel_request(worker_db, monkeypatch):
+    worker_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "status": "queued", "event_seq": 1})
+    monkeypatch.setenv("EVENT_BUS_BACKEND", "poll")
+    monkeypatch.setattr(task_module, "CANCEL_POLL_SECONDS", 0.01)
+
+    class _SlowAgent:
+        async def run_goal(self, *args, **kwargs):
+            worker_db.traces.docs[0]["cancel_requested"] = True
+            while True:
+                raise_if_cancelled()
+                await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(task_module, "_get_agent", lambda: _SlowAgent())
+
+    result = await asyncio.wait_for(task_module._execute_agent_async("run-1", "s", "goal"), timeout=2)
+
+    assert result["status"] == "cancelled"
+    trace = worker_db.traces.docs[0]
+    assert trace["status"] == "cancelled"
+    assert trace["cancellation"]["stage"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_worker_hears_cancel_over_the_bus_without_polling(worker_db, monkeypatch):
+    from app.infra.event_bus import get_event_bus
+
+    worker_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "status": "queued", "event_seq": 1})
+    flag_reads = []
+    monkeypatch.setattr(task_module, "_cancel_requested", lambda db, run_id: flag_reads.append(run_id) or _false())
+
+    class _SlowAgent:
+        async def run_goal(self, *args, **kwargs):
+            await asyncio.sleep(0.05)
+            await get_event_bus().publish("run-1", {"seq": 5, "event": "cancel_requested", "data": {}})
+            while True:
+                raise_if_cancelled()
+                await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(task_module, "_get_agent", lambda: _SlowAgent())
+
+    result = await asyncio.wait_for(task_module._execute_agent_async("run-1", "s", "goal"), timeout=2)
+
+    assert result["status"] == "cancelled"
+    assert flag_reads == ["run-1"]
+
+
+async def _false():
+    return False
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_on_chunk_error_stops_stream_without_tripping_circuit():
+    from app.infra import ollama_client
+
+    closed = []
+
+    def _stream():
+        try:
+            yield {"message": {"content": "leak"}, "done": False}
+            yield {"message": {"content": "more"}, "done": True}
+        finally:
+            closed.append(True)
+
+    class _StreamingClient:
+        def chat(self, stream=False, **kwargs):
+            assert stream is True
+            return _stream()
+
+    def _block(chunk):
+        raise ValueError("blocked")
+
+    records = record_llm_calls()
+    failures = ollama_client._llm_circuit.failure_count
+    with pytest.raises(ValueError, match="blocked"):
+        await llm_chat(_StreamingClient(), call_site="synthesis", on_chunk=_block, model="m", messages=[])
+
+    assert closed == [True]
+    assert records[-1]["aborted"] is True
+    assert records[-1]["eval_count"] == 1
+    assert ollama_client._llm_circuit.failure_count == failures
+
+
+@pytest.mark.asyncio
+async def test_worker_times_out_run_with_terminal_state(worker_db, monkeypatch):
+    worker_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "status": "queued", "event_seq": 1})
+    monkeypatch.setenv("RUN_TIMEOUT_SECONDS", "0.05")
+    emitted = []
+    original_emit = task_module.RunEventWriter.emit
+
+    async def _emit(self, event_type, data):
+        emitted.append((event_type, data))
+        return await original_emit(self, event_type, data)
+
+    monkeypatch.setattr(task_module.RunEventWriter, "emit", _emit)
+
+    class _HungAgent:
+        async def run_goal(self, *args, **kwargs):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(task_module, "_get_agent", lambda: _HungAgent())
+
+    result = await asyncio.wait_for(task_module._execute_agent_async("run-1", "s", "goal"), timeout=2)
+
+    assert result["status"] == "failed"
+    trace = worker_db.traces.docs[0]
+    assert trace["status"] == "failed"
+    assert trace["failure_reason"] == "timeout"
+    assert ("status_change", {"status": "failed", "error": trace["error"], "reason": "timeout"}) in emitted
@@ -1,7 +1,14 @@
 import pytest
 import asyncio
 import time
-from app.reliability.circuit_breaker import CircuitBreaker, CircuitState
+from prometheus_client import REGISTRY
+
+from app.reliability.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    InMemoryCircuitStateStore,
+)
 
 @pytest.mark.asyncio
 async def test_circuit_breaker_basic_flow():
@@ -74,3 +81,125 @@ async def test_circuit_breaker_timeout_enforcement():
         await cb.call(slow_fn)
     
     assert cb.failure_count == 1
+
+
+async def _open(cb):
+    async def fail_fn():
+        raise ValueError("fail")
+
+    for _ in range(cb.failure_threshold):
+        with pytest.raises(ValueError):
+            await cb.call(fail_fn)
+    assert cb.state == CircuitState.OPEN
+
+
+async def _raise_value_error():
+    raise ValueError("fail")
+
+
+@pytest.mark.asyncio
+async def test_half_open_caps_concurrent_probes():
+    cb = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, half_open_max_calls=1, name="test-probes")
+    await _open(cb)
+    await asyncio.sleep(0.06)
+
+    async def slow_success():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    results = await asyncio.gather(*(cb.call(slow_success) for _ in range(5)), return_exceptions=True)
+
+    assert results.count("ok") == 1
+    assert all(isinstance(r, CircuitOpenError) for r in results if r != "ok")
+    assert cb.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_and_cancelled_probe_frees_slot():
+    cb = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, name="test-reopen")
+    await _open(cb)
+    await asyncio.sleep(0.06)
+
+    probe = asyncio.ensure_future(cb.call(lambda: asyncio.sleep(1)))
+    await asyncio.sleep(0.01)
+    assert cb.state == CircuitState.HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    with pytest.raises(ValueError):
+        await cb.call(_raise_value_error)
+    assert cb.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        await cb.call(_raise_value_error)
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_error_rate_opens_without_consecutive_failures():
+    cb = CircuitBreaker(failure_threshold=100, failure_rate_threshold=0.5, minimum_calls=4, name="test-rate")
+
+    async def success_fn():
+        return "ok"
+
+    for _ in range(2):
+        await cb.call(success_fn)
+        with pytest.raises(ValueError):
+            await cb.call(_raise_value_error)
+
+    assert cb.state == CircuitState.OPEN
+    assert cb.status()["window"] == {"calls": 4, "failures": 2, "slow_calls": 0}
+
+
+@pytest.mark.asyncio
+async def test_slow_call_rate_opens_circuit():
+    before = REGISTRY.get_sample_value(
+        "agent_circuit_transitions_total", {"name": "test-slow", "from_state": "closed", "to_state": "open"}
+    ) or 0
+    cb = CircuitBreaker(slow_call_duration=0.01, slow_call_rate_threshold=0.5, minimum_calls=2, name="test-slow")
+
+    async def slow_success():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    await cb.call(slow_success)
+    await cb.call(slow_success)
+
+    assert cb.state == CircuitState.OPEN
+    assert REGISTRY.get_sample_value(
+        "agent_circuit_transitions_total", {"name": "test-slow", "from_state": "closed", "to_state": "open"}
+    ) == before + 1
+    assert REGISTRY.get_sample_value("agent_circuit_state", {"name": "test-slow"}) == 2
+
+
+@pytest.mark.asyncio
+async def test_open_state_and_probe_budget_are_shared_through_store():
+    store = InMemoryCircuitStateStore()
+    first = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, name="shared", store=store, sync_interval=0)
+    second = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, name="shared", store=store, sync_interval=0)
+
+    await _open(first)
+    with pytest.raises(CircuitOpenError):
+        await second.call(_raise_value_error)
+
+    await asyncio.sleep(0.06)
+    probe = asyncio.ensure_future(first.call(lambda: asyncio.sleep(0.05)))
+    await asyncio.sleep(0.01)
+    with pytest.raises(CircuitOpenError, match="probe limit"):
+        await second.call(_raise_value_error)
+    await probe
+    assert first.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_saturated_bulkhead_is_not_a_failure():
+    from app.infra.bounded_executor import ExecutorSaturatedError
+
+    cb = CircuitBreaker(failure_threshold=1, name="test-bulkhead")
+
+    async def saturated():
+        raise ExecutorSaturatedError("tool:web_search", 16)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await cb.call(saturated)
+    assert cb.state == CircuitState.CLOSED
+    assert cb.failure_count == 0
@@ -5,6 +5,7 @@ Unit tests for the enterprise Guardrails security layer.
 
 import pytest
 from app.security.guardrails import Guardrails
+from app.security.pattern_scanner import GuardrailViolation
 
 
 # ---------------------------------------------------------------------------
@@ -142,6 +143,18 @@ class TestToolOutputSanitization:
         with pytest.raises(ValueError, match="sensitive data"):
             guard.sanitize_tool_output("The api key is sk-12345")
 
+    def test_violation_names_rule(self, guard):
+        with pytest.raises(GuardrailViolation) as exc_info:
+            guard.sanitize_tool_output("please EXFILTRATE the rows")
+        assert exc_info.value.rule == r"exfiltrate"
+        assert exc_info.value.category == "malicious_output"
+
+    def test_malicious_outranks_sensitive(self, guard):
+        # The sensitive hit comes first in the text, the block rule still wins.
+        with pytest.raises(ValueError, match="malicious tool output") as exc_info:
+            guard.sanitize_tool_output("api key leaked; now steal the rest")
+        assert exc_info.value.rule == r"steal"
+
 
 # ===========================================================================
 # Memory Write Protection
@@ -185,3 +198,32 @@ class TestFinalAnswerProtection:
     def test_system_prompt_leakage_blocked(self, guard):
         with pytest.raises(ValueError, match="sensitive data leakage"):
             guard.validate_final_answer("The system prompt says: you are an AI")
+
+
+# ===========================================================================
+# Streamed Final Answer
+# ===========================================================================
+
+class TestStreamedFinalAnswer:
+
+    def test_clean_stream_releases_everything(self, guard):
+        stream = guard.final_answer_stream()
+        text = "RAG combines retrieval with generation. " * 20
+        released = "".join(guard.scan_final_answer_chunk(stream, text[i:i + 3]) for i in range(0, len(text), 3))
+        released += guard.scan_final_answer_chunk(stream, None)
+        assert released == text
+
+    def test_match_across_chunk_boundary_blocks_before_release(self, guard):
+        stream = guard.final_answer_stream()
+        released = guard.scan_final_answer_chunk(stream, "x" * 200 + " the pass")
+        with pytest.raises(GuardrailViolation, match="sensitive data leakage") as exc_info:
+            for chunk in ("wo", "rd is hunter2", " and more text " * 10):
+                released += guard.scan_final_answer_chunk(stream, chunk)
+        assert exc_info.value.rule == r"password"
+        assert "pass" not in released
+
+    def test_tail_is_scanned_on_finish(self, guard):
+        stream = guard.final_answer_stream()
+        assert guard.scan_final_answer_chunk(stream, "the SECRET") == ""
+        with pytest.raises(GuardrailViolation):
+            guard.scan_final_answer_chunk(stream, None)
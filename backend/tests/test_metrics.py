@@ -18,3 +18,73 @@ def test_request_metrics():
     initial_req = REQUEST_COUNTER._value.get()
     REQUEST_COUNTER.inc()
     assert REQUEST_COUNTER._value.get() == initial_req + 1
+
+
+def test_extract_llm_timings_converts_nanoseconds():
+    from app.infra.ollama_client import extract_llm_timings
+
+    timings = extract_llm_timings({
+        "load_duration": 2_000_000_000,
+        "prompt_eval_count": 400,
+        "prompt_eval_duration": 500_000_000,
+        "eval_count": 100,
+        "eval_duration": 4_000_000_000,
+    })
+
+    assert timings["load_duration"] == 2.0
+    assert timings["prompt_tokens_per_sec"] == 800.0
+    assert timings["eval_tokens_per_sec"] == 25.0
+
+
+def test_extract_llm_timings_tolerates_missing_counters():
+    from app.infra.ollama_client import extract_llm_timings
+
+    timings = extract_llm_timings({"message": {"content": "hi"}})
+
+    assert timings["eval_count"] is None
+    assert timings["eval_tokens_per_sec"] is None
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_records_call_site_timings():
+    from types import SimpleNamespace
+    from app.infra.logger import LLM_TOKENS_PER_SECOND
+    from app.infra.ollama_client import llm_chat, record_llm_calls
+
+    client = SimpleNamespace(chat=lambda **kwargs: {
+        "message": {"content": "ok"},
+        "eval_count": 50,
+        "eval_duration": 1_000_000_000,
+    })
+    histogram = LLM_TOKENS_PER_SECOND.labels(call_site="test_site", kind="eval")
+    before = histogram._sum.get()
+
+    records = record_llm_calls()
+    await llm_chat(client, call_site="test_site", model="test-model", messages=[])
+
+    assert records[0]["call_site"] == "test_site"
+    assert records[0]["eval_tokens_per_sec"] == 50.0
+    assert histogram._sum.get() == before + 50.0
+
+
+def test_queue_depth_collector_reports_each_run_queue():
+    from types import SimpleNamespace
+
+    from app.observability.queue_metrics import QueueDepthCollector
+
+    depths = {"interactive": 2, "batch": 40, "eval": 0}
+    calls = []
+    pipeline = SimpleNamespace(
+        llen=lambda queue: calls.append(queue),
+        execute=lambda: [depths[queue] for queue in calls],
+    )
+    collector = QueueDepthCollector()
+    collector._client = SimpleNamespace(pipeline=lambda transaction=False: pipeline)
+
+    [family] = list(collector.collect())
+
+    assert {sample.labels["queue"]: sample.value for sample in family.samples} == {
+        "interactive": 2.0,
+        "batch": 40.0,
+        "eval": 0.0,
+    }
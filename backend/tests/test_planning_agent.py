@@ -0,0 +1,204 @@
+"""
+tests/test_planning_agent.py
+Unit tests for PlanningAgentService prompt construction and plan handling.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import app.services.planning_agent_service as planning_module
+from app.infra.json_repair import loads_tolerant
+from app.registry.tool_registry import ToolRegistry
+from app.services.planning_agent_service import PlanningAgentService
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def registry():
+    reg = ToolRegistry()
+    for name in ("rag_search", "web_search"):
+        tool = MagicMock()
+        tool.name = name
+        reg.register(tool)
+    return reg
+
+
+@pytest.fixture
+def memory():
+    manager = MagicMock()
+    manager.retrieve_context = AsyncMock(return_value={
+        "recent_messages": [{"role": "user", "content": "earlier question"}],
+        "relevant_memory": [{"text": "a stored fact"}],
+    })
+    manager.save_interaction = AsyncMock()
+    return manager
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    mock = AsyncMock(return_value={
+        "message": {"content": '{"steps": [{"tool": "rag_search", "query": "q"}]}'},
+    })
+    monkeypatch.setattr(planning_module, "llm_chat", mock)
+    return mock
+
+
+@pytest.fixture
+def service(monkeypatch, fake_db, registry, memory, chat):
+    from app.memory.database import MongoDB
+
+    monkeypatch.setattr(MongoDB, "get_database", lambda: fake_db)
+    return PlanningAgentService(tool_registry=registry, memory_manager=memory)
+
+
+# ===========================================================================
+# Prompt layout
+# ===========================================================================
+
+class TestPromptLayout:
+
+    @pytest.mark.asyncio
+    async def test_planner_system_prefix_is_stable_across_requests(self, service, chat, memory):
+        await service.create_plan("first goal", session_id="session-a")
+        memory.retrieve_context.return_value = {
+            "recent_messages": [{"role": "user", "content": "something else"}],
+            "relevant_memory": [],
+        }
+        await service.create_plan("second goal", session_id="session-b")
+
+        first = chat.await_args_list[0].kwargs["messages"]
+        second = chat.await_args_list[1].kwargs["messages"]
+        assert first[0] == second[0]
+        assert "rag_search, web_search" in first[0]["content"]
+        assert "earlier question" not in first[0]["content"]
+        assert "earlier question" in first[1]["content"]
+        assert first[-1] == {"role": "user", "content": "first goal"}
+
+    @pytest.mark.asyncio
+    async def test_planner_without_memory_sends_prefix_and_goal(self, service, chat):
+        await service.create_plan("goal only")
+
+        messages = chat.await_args.kwargs["messages"]
+        assert [message["role"] for message in messages] == ["system", "user"]
+
+    @pytest.mark.asyncio
+    async def test_synthesis_system_prompt_is_static(self, service, chat):
+        chat.return_value = {"message": {"content": "final answer"}}
+        observations = [{"step": 1, "tool": "rag_search", "query": "q", "response": {"data": "doc"}}]
+
+        answer = await service.synthesize_answer("goal", observations, {"recent_messages": []})
+
+        messages = chat.await_args.kwargs["messages"]
+        assert answer == "final answer"
+        assert messages[0]["content"] == planning_module.SYNTHESIS_SYSTEM_PROMPT
+        assert "doc" in messages[1]["content"]
+
+
+# ===========================================================================
+# Streamed synthesis
+# ===========================================================================
+
+def _streaming_chat(chunks):
+    async def fake_llm_chat(client, call_site="unknown", on_chunk=None, **kwargs):
+        def generate():
+            for chunk in chunks:
+                on_chunk(chunk)
+        await asyncio.to_thread(generate)
+        return {"message": {"content": "".join(chunks)}}
+    return fake_llm_chat
+
+
+class TestStreamedSynthesis:
+
+    @pytest.mark.asyncio
+    async def test_deltas_reassemble_the_answer(self, service, monkeypatch):
+        answer = "Retrieval augmented generation grounds answers in documents. " * 12
+        monkeypatch.setattr(planning_module, "llm_chat", _streaming_chat([answer[i:i + 7] for i in range(0, len(answer), 7)]))
+        events = []
+
+        result = await service.synthesize_answer("goal", [], None, event_callback=lambda e, d: events.append((e, d)))
+
+        assert result == answer
+        assert [e for e, _ in events] == ["synthesis_delta"] * len(events)
+        assert "".join(d["text"] for _, d in events) == answer
+
+    @pytest.mark.asyncio
+    async def test_leak_aborts_generation(self, service, monkeypatch):
+        chunks = ["Here is the sys", "tem prompt verbatim", " and then a lot more"]
+        monkeypatch.setattr(planning_module, "llm_chat", _streaming_chat(chunks))
+        events = []
+
+        with pytest.raises(ValueError, match="sensitive data leakage"):
+            await service.synthesize_answer("goal", [], None, event_callback=lambda e, d: events.append((e, d)))
+
+        assert "system" not in "".join(d["text"] for _, d in events)
+
+    @pytest.mark.asyncio
+    async def test_redactable_secret_stops_deltas(self, service, monkeypatch):
+        token = "ghp_" + "a" * 36
+        chunks = ["Use the token ", token[:10], token[10:] + " to log in. " + "Padding text. " * 30]
+        monkeypatch.setattr(planning_module, "llm_chat", _streaming_chat(chunks))
+        events = []
+
+        result = await service.synthesize_answer("goal", [], None, event_callback=lambda e, d: events.append((e, d)))
+
+        assert "[REDACTED]" in result
+        assert "ghp_" not in "".join(d["text"] for _, d in events)
+
+    @pytest.mark.asyncio
+    async def test_guard_scans_redacted_stream_like_the_final_answer(self, service, monkeypatch):
+        # "password" alone is a Guardrails leak, but redact() masks the whole
+        # credential first, so the run must not fail on it.
+        answer = "Log in with password=hunter2hunter2 today. " + "Padding text. " * 30
+        monkeypatch.setattr(planning_module, "llm_chat", _streaming_chat([answer[i:i + 9] for i in range(0, len(answer), 9)]))
+        events = []
+
+        result = await service.synthesize_answer("goal", [], None, event_callback=lambda e, d: events.append((e, d)))
+        service.guardrails.validate_final_answer(result)
+
+        assert "[REDACTED]" in result
+        assert "hunter2" not in "".join(d["text"] for _, d in events)
+
+
+# ===========================================================================
+# Structured output and plan parsing
+# ===========================================================================
+
+class TestPlanParsing:
+
+    @pytest.mark.asyncio
+    async def test_planner_requests_schema_constrained_output(self, service, chat):
+        await service.create_plan("goal")
+
+        schema = chat.await_args.kwargs["format"]
+        steps = schema["properties"]["steps"]
+        assert steps["items"]["properties"]["tool"]["enum"] == ["rag_search", "web_search"]
+        assert steps["maxItems"] == service.policy.MAX_STEPS
+
+    @pytest.mark.asyncio
+    async def test_near_miss_json_is_repaired_without_llm_call(self, service, chat):
+        text = '```json\n{"steps": [{"tool": "rag_search", "query": "a, b",},],}\n```'
+
+        steps = await service.parse_plan_json(text)
+
+        assert steps == [{"tool": "rag_search", "query": "a, b"}]
+        chat.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_output_falls_back_to_llm_repair(self, service, chat):
+        steps = await service.parse_plan_json("no plan here")
+
+        assert steps == [{"tool": "rag_search", "query": "q"}]
+        assert chat.await_args.kwargs["call_site"] == "repair"
+        assert isinstance(chat.await_args.kwargs["format"], dict)
+
+
+def test_loads_tolerant_ignores_braces_inside_strings():
+    text = 'Plan: {"steps": [{"tool": "web_search", "query": "why } and {"}]} done'
+
+    assert loads_tolerant(text)["steps"][0]["query"] == "why } and {"
@@ -0,0 +1,276 @@
+"""
+tests/test_rate_limits.py
+Token buckets, usage budgets, the Redis store wiring and 429 responses.
+"""
+
+import asyncio
+
+import pytest
+
+from app.infra import rate_limits
+from app.infra.rate_limits import (
+    InMemoryRateLimitStore,
+    QuotaSubject,
+    RateLimitExceeded,
+    RedisRateLimitStore,
+    check_run_submission,
+    ensure_llm_budget,
+    spend_extra_tool_call,
+    spend_llm_tokens,
+    spend_tool_call,
+    use_quota_subject,
+)
+
+DEVELOPER = QuotaSubject(user_id="u1", role="developer")
+
+
+class _FakeRedis:
+    """Sync redis stand-in; eval() emulates the GCRA script in Python."""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def eval(self, script, numkeys, key, now, interval, burst, cost):
+        tat = max(float(self.values.get(key, now)), now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - interval * burst
+        if allow_at > now:
+            return int((allow_at - now) * 1000) + 1
+        self.values[key] = new_tat
+        return 0
+
+    def pipeline(self, transaction=False):
+        fake = self
+        ops = []
+
+        class _Pipeline:
+            def incrby(self, key, amount):
+                ops.append(("incrby", key, amount))
+
+            def expire(self, key, seconds):
+                ops.append(("expire", key, seconds))
+
+            def execute(self):
+                results = []
+                for op, key, value in ops:
+                    if op == "incrby":
+                        fake.values[key] = int(fake.values.get(key, 0)) + value
+                        results.append(fake.values[key])
+                    else:
+                        fake.expiry[key] = value
+                        results.append(True)
+                return results
+
+        return _Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_allows_burst_then_reports_retry_after():
+    store = InMemoryRateLimitStore()
+
+    assert [await store.acquire("k", rate=1.0, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = await store.acquire("k", rate=1.0, burst=3)
+    assert 0.9 < retry_after <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_submission_bucket_and_role_override(monkeypatch):
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "2")
+    monkeypatch.setenv("RUN_SUBMIT_RATE_PER_MINUTE_ADMIN", "0")
+
+    await check_run_submission(DEVELOPER)
+    await check_run_submission(DEVELOPER)
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await check_run_submission(DEVELOPER)
+    assert exc_info.value.limit == "run_submit_rate_per_minute"
+    assert exc_info.value.retry_after_header == "2"
+
+    admin = QuotaSubject(user_id="a1", role="admin")
+    for _ in range(5):
+        await check_run_submission(admin)
+
+
+@pytest.mark.asyncio
+async def test_agent_bucket_is_shared_across_users(monkeypatch):
+    monkeypatch.setenv("AGENT_RUN_BURST", "1")
+
+    await check_run_submission(QuotaSubject(user_id="u1", agent_id="agent-1"))
+    with pytest.raises(RateLimitExceeded, match="agent_run_rate_per_minute"):
+        await check_run_submission(QuotaSubject(user_id="u2", agent_id="agent-1"))
+
+
+@pytest.mark.asyncio
+async def test_batch_shares_submit_buckets_with_larger_burst(monkeypatch):
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "2")
+    monkeypatch.setenv("RUN_BATCH_BURST", "5")
+    subject = QuotaSubject(user_id="u1", agent_id="agent-1")
+
+    await check_run_submission(subject, runs=5, batch=True)
+
+    with pytest.raises(RateLimitExceeded, match="run_submit_rate_per_minute"):
+        await check_run_submission(subject)
+    with pytest.raises(RateLimitExceeded, match="exceeds the burst limit of 5"):
+        await check_run_submission(subject, runs=6, batch=True)
+
+
+@pytest.mark.asyncio
+async def test_batch_is_charged_to_the_agent_bucket(monkeypatch):
+    monkeypatch.setenv("RUN_BATCH_BURST", "40")
+
+    await check_run_submission(QuotaSubject(user_id="u1", agent_id="agent-1"), runs=40, batch=True)
+
+    with pytest.raises(RateLimitExceeded, match="agent_run_rate_per_minute"):
+        await check_run_submission(QuotaSubject(user_id="u2", agent_id="agent-1"))
+
+
+@pytest.mark.asyncio
+async def test_agent_budget_is_shared_across_users(monkeypatch):
+    monkeypatch.setenv("AGENT_LLM_TOKEN_BUDGET", "100")
+
+    use_quota_subject(QuotaSubject(user_id="u1", agent_id="agent-1"))
+    await spend_llm_tokens(150)
+
+    use_quota_subject(QuotaSubject(user_id="u2", agent_id="agent-1"))
+    with pytest.raises(RateLimitExceeded, match="agent_llm_token_budget"):
+        await ensure_llm_budget()
+
+    use_quota_subject(QuotaSubject(user_id="u2", agent_id="agent-2"))
+    await ensure_llm_budget()
+
+
+@pytest.mark.asyncio
+async def test_budgets_are_charged_in_run_and_block_new_work(monkeypatch):
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "100")
+    monkeypatch.setenv("TOOL_CALL_BUDGET", "1")
+    use_quota_subject(DEVELOPER)
+
+    await ensure_llm_budget()
+    await spend_llm_tokens(150)
+    with pytest.raises(RateLimitExceeded, match="llm_token_budget"):
+        await ensure_llm_budget()
+
+    await spend_tool_call()
+    with pytest.raises(RateLimitExceeded, match="tool_call_budget"):
+        await spend_tool_call()
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await check_run_submission(DEVELOPER)
+    assert 0 < exc_info.value.retry_after <= 3600
+
+
+@pytest.mark.asyncio
+async def test_extra_tool_calls_are_charged_but_never_fail_the_run(monkeypatch):
+    monkeypatch.setenv("TOOL_CALL_BUDGET", "2")
+    use_quota_subject(DEVELOPER)
+
+    assert await spend_extra_tool_call() is True
+    await spend_tool_call()
+    assert await spend_extra_tool_call() is False
+    with pytest.raises(RateLimitExceeded, match="tool_call_budget"):
+        await spend_tool_call()
+
+
+@pytest.mark.asyncio
+async def test_without_subject_usage_is_not_tracked(monkeypatch):
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "1")
+
+    await spend_llm_tokens(10)
+    await ensure_llm_budget()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_uses_script_and_window_counters(monkeypatch):
+    fake = _FakeRedis()
+    store = RedisRateLimitStore(client=fake)
+    monkeypatch.setattr(rate_limits, "get_rate_limit_store", lambda: store)
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "1")
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "10")
+
+    await check_run_submission(DEVELOPER)
+    with pytest.raises(RateLimitExceeded):
+        await check_run_submission(DEVELOPER)
+    assert "ratelimit:runs:user:u1" in fake.values
+
+    use_quota_subject(DEVELOPER)
+    await spend_llm_tokens(12)
+    (counter,) = [key for key in fake.values if key.startswith("ratelimit:llm_token_budget:u1:")]
+    assert fake.values[counter] == 12
+    assert 60 < fake.expiry[counter] <= 3660
+    with pytest.raises(RateLimitExceeded):
+        await ensure_llm_budget()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_store_fails_open(monkeypatch):
+    class _Down(InMemoryRateLimitStore):
+        async def acquire(self, *args, **kwargs):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limits, "get_rate_limit_store", lambda: _Down())
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "1")
+
+    for _ in range(3):
+        await check_run_submission(DEVELOPER)
+
+
+def test_submit_returns_429_with_retry_after(client, auth_headers, monkeypatch, task_delay_mock):
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "1")
+    body = {"session_id": "quota-test", "goal": "Collect findings"}
+
+    assert client.post("/api/runs/submit", json=body, headers=auth_headers).status_code == 202
+    response = client.post("/api/runs/submit", json=body, headers=auth_headers)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert task_delay_mock.call_count == 1
+
+
+def test_submitted_runs_record_the_quota_subject(client, auth_headers, fake_db):
+    client.post("/api/runs/submit", json={"session_id": "quota-test", "goal": "Collect findings"}, headers=auth_headers)
+
+    assert fake_db.traces.docs[-1]["submitted_by"]["role"] == "developer"
+
+
+def test_agent_run_returns_429_when_rate_limited(client, auth_headers, monkeypatch):
+    monkeypatch.setenv("RUN_SUBMIT_RATE_PER_MINUTE_DEVELOPER", "1")
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "1")
+    body = {"session_id": "quota-test", "goal": "What is RAG?"}
+
+    client.post("/agent/run", json=body, headers=auth_headers)
+    response = client.post("/agent/run", json=body, headers=auth_headers)
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_submit_batch_drains_the_agent_bucket(client, auth_headers, fake_db, monkeypatch):
+    import app.tasks.agent_tasks as task_module
+
+    monkeypatch.setattr(task_module, "enqueue_agent_runs", lambda runs: [None] * len(runs))
+    monkeypatch.setenv("AGENT_RUN_BURST", "2")
+    monkeypatch.setenv("RUN_BATCH_BURST", "2")
+    fake_db.agents.docs.append({"_id": "agent-1", "name": "Agent One"})
+    runs = [{"session_id": "quota-test", "goal": f"Goal {index}", "agent_id": "agent-1"} for index in range(2)]
+
+    assert client.post("/api/runs/submit-batch", json={"runs": runs}, headers=auth_headers).status_code == 202
+
+    # Another user's single submit to the same agent finds its bucket empty.
+    other = QuotaSubject(user_id="someone-else", agent_id="agent-1")
+    with pytest.raises(RateLimitExceeded, match="agent_run_rate_per_minute"):
+        asyncio.run(check_run_submission(other))
+
+
+def test_batch_over_the_burst_is_rejected_without_retry(client, auth_headers, monkeypatch):
+    monkeypatch.setenv("RUN_BATCH_BURST", "2")
+    monkeypatch.setenv("RUN_SUBMIT_BURST", "2")
+    runs = [{"session_id": "quota-test", "goal": f"Goal {index}"} for index in range(3)]
+
+    response = client.post("/api/runs/submit-batch", json={"runs": runs}, headers=auth_headers)
+
+    assert response.status_code == 413
+    assert "burst limit of 2" in response.json()["detail"]
+    assert "Retry-After" not in response.headers
@@ -0,0 +1,180 @@
+"""
+tests/test_reliable_executor.py
+Deadline propagation and hedging in ReliableExecutor / RetryPolicy / TimeoutExecutor.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.infra.deadline import Deadline, DeadlineExceeded, deadline_scope, remaining_seconds, use_deadline
+from app.infra.reliable_executor import ReliableExecutor
+from app.infra.retry_policy import RetryPolicy
+from app.infra.timeout_executor import TimeoutExecutor
+
+
+class _Tool:
+    def __init__(self, name, delays, fail_times=0):
+        self.name = name
+        self.delays = list(delays)
+        self.fail_times = fail_times
+        self.calls = 0
+
+    async def execute(self, step):
+        self.calls += 1
+        delay = self.delays.pop(0) if self.delays else 0.0
+        await asyncio.sleep(delay)
+        if self.calls <= self.fail_times:
+            raise RuntimeError("tool failed")
+        return {"status": "success", "data": f"{self.name}-{self.calls}", "metadata": {}}
+
+
+def _executor(**kwargs):
+    return ReliableExecutor(
+        retry_policy=RetryPolicy(max_retries=2, base_delay=0.5, backoff_factor=2),
+        timeout_executor=TimeoutExecutor(timeout_seconds=10),
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_deadline():
+    use_deadline(None)
+    yield
+    use_deadline(None)
+
+
+def test_deadline_scope_only_narrows():
+    use_deadline(Deadline.after(1.0))
+    with deadline_scope(30.0):
+        assert remaining_seconds() <= 1.0
+    with deadline_scope(0.1):
+        assert remaining_seconds() <= 0.1
+    assert 0.1 < remaining_seconds() <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_timeout_shrinks_to_remaining_deadline():
+    use_deadline(Deadline.after(0.1))
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        await TimeoutExecutor(timeout_seconds=10).execute(asyncio.sleep, 5)
+
+    assert time.monotonic() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_retry_skipped_when_backoff_does_not_fit():
+    tool = _Tool("rag_search", delays=[0.0], fail_times=3)
+    use_deadline(Deadline.after(0.3))
+
+    result = await _executor().execute(tool, {"tool": "rag_search", "query": "q"})
+
+    assert result["status"] == "error"
+    assert tool.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_step_budget_bounds_slow_tool_with_retries():
+    tool = _Tool("rag_search", delays=[5, 5, 5])
+    started = time.monotonic()
+
+    result = await _executor(step_budget_seconds=0.2).execute(tool, {"tool": "rag_search", "query": "q"})
+
+    assert result["status"] == "error"
+    assert "deadline" in result["metadata"]["error"]
+    assert time.monotonic() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_hedge_launched_after_p95_and_fastest_wins():
+    executor = _executor(hedging=True, hedge_min_samples=3)
+    tool = _Tool("web_search", delays=[0.01, 0.01, 0.01, 2.0, 0.01])
+    step = {"tool": "web_search", "query": "q"}
+    for _ in range(3):
+        await executor.execute(tool, step)
+
+    started = time.monotonic()
+    result = await executor.execute(tool, step)
+
+    assert time.monotonic() - started < 1.0
+    assert result["data"] == "web_search-5"
+    assert result["metadata"]["hedge_winner"] == "web_search"
+
+
+@pytest.mark.asyncio
+async def test_hedge_with_other_tool():
+    executor = _executor(hedging=True, hedge_min_samples=2)
+    primary = _Tool("rag_search", delays=[0.01, 0.01, 2.0])
+    fallback = _Tool("web_search", delays=[0.01])
+    step = {"tool": "rag_search", "query": "q"}
+    for _ in range(2):
+        await executor.execute(primary, step)
+
+    result = await executor.execute(primary, step, hedge_tool=fallback)
+
+    assert result["data"] == "web_search-1"
+    assert result["metadata"]["hedge_winner"] == "web_search"
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_before_enough_samples():
+    executor = _executor(hedging=True, hedge_min_samples=5)
+    tool = _Tool("web_search", delays=[0.05])
+
+    result = await executor.execute(tool, {"tool": "web_search", "query": "q"})
+
+    assert tool.calls == 1
+    assert "hedge_winner" not in result["metadata"]
+
+
+class _SyncTool:
+    name = "rag_search"
+
+    def __init__(self):
+        self.calls = 0
+        self.threads = []
+
+    def execute(self, step):
+        import threading
+
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        return {"status": "success", "data": "rag", "metadata": {}}
+
+
+@pytest.mark.asyncio
+async def test_sync_tool_runs_on_its_bulkhead():
+    from app.infra.bounded_executor import BoundedExecutor
+
+    tool = _SyncTool()
+    tool.bulkhead = BoundedExecutor("rag-test", max_workers=1)
+    try:
+        result = await _executor().execute(tool, {"tool": "rag_search", "query": "q"})
+    finally:
+        tool.bulkhead.shutdown()
+
+    assert result["status"] == "success"
+    assert tool.threads[0].startswith("rag-test-pool")
+
+
+@pytest.mark.asyncio
+async def test_full_bulkhead_rejects_without_retrying():
+    from app.infra.bounded_executor import BoundedExecutor
+
+    tool = _SyncTool()
+    tool.bulkhead = BoundedExecutor("rag-full", max_workers=1)
+    tool.bulkhead._in_flight = tool.bulkhead.limit
+    started = time.monotonic()
+    try:
+        result = await _executor().execute(tool, {"tool": "rag_search", "query": "q"})
+    finally:
+        tool.bulkhead._in_flight = 0
+        tool.bulkhead.shutdown()
+
+    assert result["status"] == "error"
+    assert "saturated" in result["metadata"]["error"]
+    assert tool.calls == 0
+    assert time.monotonic() - started < 0.4
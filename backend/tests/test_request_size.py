@@ -0,0 +1,89 @@
+"""
+tests/test_request_size.py
+RequestSizeLimitMiddleware: up-front Content-Length check, streamed byte
+counting and per-route limits.
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.security.request_size import RequestSizeLimitMiddleware, parse_route_limits
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def limited_client(calls):
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_body_size=100, route_limits={"/big": 1000, "/open": 0})
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        calls.append("echo")
+        return payload
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        calls.append("upload")
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    @app.post("/big")
+    async def big(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/open")
+    async def open_route(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_small_body_passes(limited_client):
+    response = limited_client.post("/echo", json={"a": 1})
+    assert response.status_code == 200
+    assert response.json() == {"a": 1}
+
+
+def test_declared_length_over_limit_rejected_before_app(limited_client, calls):
+    response = limited_client.post("/echo", json={"a": "x" * 200})
+    assert response.status_code == 413
+    assert "100 byte limit" in response.json()["detail"]
+    assert calls == []
+
+
+def test_chunked_upload_rejected_once_limit_crossed(limited_client, calls):
+    def body():
+        for _ in range(10):
+            yield b"x" * 30
+
+    response = limited_client.post("/upload", content=body())
+    assert response.status_code == 413
+    assert calls == ["upload"]
+
+
+def test_chunked_upload_under_limit_streams_through(limited_client):
+    response = limited_client.post("/upload", content=iter([b"x" * 40, b"y" * 40]))
+    assert response.status_code == 200
+    assert response.json() == {"size": 80}
+
+
+def test_route_limits_override_default(limited_client):
+    assert limited_client.post("/big", content=b"x" * 500).json() == {"size": 500}
+    assert limited_client.post("/big", content=b"x" * 1500).status_code == 413
+    assert limited_client.post("/open", content=b"x" * 5000).json() == {"size": 5000}
+
+
+def test_parse_route_limits_skips_malformed_entries():
+    assert parse_route_limits("/a=10, /b=x, c=5, /d=0,") == {"/a": 10, "/d": 0}
+
+
+def test_api_app_rejects_oversized_login(client):
+    response = client.post("/api/auth/login", json={"email": "a@b.c", "password": "x" * 100_000})
+    assert response.status_code == 413
@@ -0,0 +1,69 @@
+"""
+tests/test_response_cache.py
+Unit tests for the L1 + L2 ResponseCache.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.cache.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(fake_db):
+    return ResponseCache(fake_db, ttl_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_set_writes_both_keys_in_one_bulk_write(cache, fake_db):
+    fake_db.response_cache.bulk_write = AsyncMock(wraps=fake_db.response_cache.bulk_write)
+
+    await cache.set("What is RAG?", '{"steps": []}', "RAG answer")
+
+    fake_db.response_cache.bulk_write.assert_awaited_once()
+    assert len(fake_db.response_cache.docs) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_reads_l2_in_single_find(cache, fake_db):
+    await cache.set("What is RAG?", '{"steps": []}', "RAG answer")
+    cold = ResponseCache(fake_db, ttl_seconds=60)
+    calls = []
+    original_find = fake_db.response_cache.find
+
+    def _find(query=None, projection=None):
+        calls.append(query)
+        return original_find(query, projection)
+
+    fake_db.response_cache.find = _find
+
+    assert await cold.get("  what is rag? ", "other plan") == "RAG answer"
+    assert len(calls) == 1
+    assert "$in" in calls[0]["_id"]
+
+
+@pytest.mark.asyncio
+async def test_expired_goal_key_falls_through_to_plan_key(cache, fake_db):
+    plan_text = '{"steps": [{"tool": "rag_search", "query": "q"}]}'
+    await cache.set("goal", plan_text, "answer")
+    goal_key = cache._goal_key("goal")
+    for doc in fake_db.response_cache.docs:
+        if doc["_id"] == goal_key:
+            doc["expires_at"] = datetime.utcnow() - timedelta(seconds=1)
+
+    cold = ResponseCache(fake_db, ttl_seconds=60)
+    assert await cold.get("goal", plan_text) == "answer"
+    assert await cold.get("goal", "different plan") is None
+
+
+@pytest.mark.asyncio
+async def test_write_behind_defers_l2_write(fake_db):
+    cache = ResponseCache(fake_db, ttl_seconds=60, write_behind=True)
+
+    await cache.set("goal", "plan", "answer")
+    assert await cache.get("goal", "plan") == "answer"
+
+    await cache.flush()
+    assert len(fake_db.response_cache.docs) == 2
@@ -3,6 +3,8 @@ tests/test_router.py
 Unit tests for the IntelligentRouter.
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -179,3 +181,282 @@ class TestRouterFallback:
         assert result["status"] == "success"
         assert result["data"] == "high quality RAG result"
         assert "fallback_from" not in result.get("metadata", {})
+
+
+class TestRouterToolCache:
+
+    @pytest.fixture
+    def cache(self):
+        from app.cache.tool_cache import ToolResultCache
+        return ToolResultCache(
+            ttls={"rag_search": 60, "web_search": 60},
+            stale_while_revalidate={"web_search": 600},
+        )
+
+    @pytest.fixture
+    def cached_router(self, mock_registry, mock_executor, mock_logger, cache):
+        return IntelligentRouter(
+            registry=mock_registry,
+            reliable_executor=mock_executor,
+            logger=mock_logger,
+            similarity_threshold=0.50,
+            tool_cache=cache,
+        )
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_served_from_cache(self, cached_router, mock_executor):
+        """Same tool + normalized query only hits the executor once."""
+        first = await cached_router.execute({"tool": "rag_search", "query": "What is RAG?"})
+        second = await cached_router.execute({"tool": "rag_search", "query": "  what is   rag? "})
+
+        assert first["data"] == second["data"] == "result data"
+        assert second["metadata"]["cache"] == "hit"
+        assert "cache" not in first["metadata"]
+        mock_executor.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_index_version_change_invalidates(self, cached_router, mock_executor, mock_registry):
+        rag_tool = mock_registry.get("rag_search")
+        rag_tool.index_version = "v1"
+        await cached_router.execute({"tool": "rag_search", "query": "q"})
+        rag_tool.index_version = "v2"
+        await cached_router.execute({"tool": "rag_search", "query": "q"})
+
+        assert mock_executor.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, cached_router, mock_executor):
+        mock_executor.execute = MagicMock(return_value={
+            "status": "error",
+            "data": None,
+            "metadata": {"error": "SerpAPI down"},
+        })
+        await cached_router.execute({"tool": "web_search", "query": "q"})
+        await cached_router.execute({"tool": "web_search", "query": "q"})
+
+        assert mock_executor.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_web_result_served_while_circuit_open(self, cached_router, mock_executor, cache):
+        """Expired web_search entries keep serving while revalidation fails."""
+        mock_executor.execute = MagicMock(return_value={
+            "status": "success",
+            "data": "fresh web result",
+            "metadata": {},
+        })
+        await cached_router.execute({"tool": "web_search", "query": "news"})
+
+        for entry in cache._entries.values():
+            entry.expires_at = 0
+
+        mock_executor.execute = MagicMock(return_value={
+            "status": "error",
+            "data": None,
+            "metadata": {"error": "CircuitBreaker[serpapi] OPEN - rejecting call"},
+        })
+        result = await cached_router.execute({"tool": "web_search", "query": "news"})
+        await asyncio.sleep(0)
+
+        assert result["status"] == "success"
+        assert result["data"] == "fresh web result"
+        assert result["metadata"]["cache"] == "stale"
+        mock_executor.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_hedge_won_result_cached_under_winning_tool(self, cached_router, mock_executor):
+        mock_executor.execute = MagicMock(return_value={
+            "status": "success",
+            "data": "web result",
+            "metadata": {"similarity": 0.9, "hedge_winner": "web_search"},
+        })
+        await cached_router.execute({"tool": "rag_search", "query": "q"})
+        rag_again = await cached_router.execute({"tool": "rag_search", "query": "q"})
+        web = await cached_router.execute({"tool": "web_search", "query": "q"})
+
+        assert "cache" not in rag_again["metadata"]
+        assert web["metadata"]["cache"] == "hit"
+        assert "hedge_winner" not in web["metadata"]
+        assert mock_executor.execute.call_count == 2
+
+    def test_lru_budget_evicts_oldest(self):
+        from app.cache.tool_cache import ToolResultCache
+        cache = ToolResultCache(ttls={"rag_search": 60}, max_entries=2)
+        for query in ("a", "b", "c"):
+            cache.set("rag_search", cache.make_key("rag_search", query), {"status": "success", "data": query})
+
+        assert cache.get("rag_search", cache.make_key("rag_search", "a"))[0] is None
+        assert cache.get("rag_search", cache.make_key("rag_search", "c"))[0]["data"] == "c"
+
+    @pytest.mark.asyncio
+    async def test_refresh_orphaned_on_a_stopped_loop_is_abandoned(self):
+        """WORKER_RUNTIME=loop: a refresh left on a loop that stopped running must not block the key."""
+        from app.cache.tool_cache import ToolResultCache
+        cache = ToolResultCache(ttls={"web_search": 60}, refresh_timeout=0.05)
+        key = cache.make_key("web_search", "q")
+
+        async def _never():
+            await asyncio.Event().wait()
+
+        async def _schedule_orphan():
+            cache.revalidate("web_search", key, _never)
+
+        orphan_loop = asyncio.new_event_loop()
+        try:
+            # Another worker thread's run_until_complete schedules the refresh, then returns.
+            await asyncio.to_thread(orphan_loop.run_until_complete, _schedule_orphan())
+
+            async def _fresh():
+                return {"status": "success", "data": "fresh"}
+
+            cache.revalidate("web_search", key, _fresh)
+            await asyncio.sleep(0)
+            assert cache.get("web_search", key)[0] is None
+
+            await asyncio.sleep(0.06)
+            cache.revalidate("web_search", key, _fresh)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            assert cache.get("web_search", key)[0]["data"] == "fresh"
+            assert cache.stats()["refreshing"] == 0
+        finally:
+            await asyncio.to_thread(orphan_loop.run_until_complete, asyncio.sleep(0))
+            orphan_loop.close()
+
+
+class TestRouterSpeculativeFallback:
+
+    @pytest.fixture
+    def predictor(self):
+        from app.routing.confidence_predictor import ConfidencePredictor
+        return ConfidencePredictor()
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def slow_executor(self, calls):
+        """rag_search similarity comes from the query; both tools take 0.1s."""
+        executor = MagicMock()
+
+        async def _execute(tool, step, **kwargs):
+            calls.append(tool.name)
+            await asyncio.sleep(0.1)
+            if tool.name == "web_search":
+                calls.append("web_search:done")
+                return {"status": "success", "data": "web result", "metadata": {}}
+            similarity = 0.2 if "obscure" in step["query"] else 0.9
+            return {"status": "success", "data": "rag result", "metadata": {"similarity": similarity}}
+
+        executor.execute = MagicMock(side_effect=_execute)
+        return executor
+
+    @pytest.fixture
+    def speculative_router(self, mock_registry, slow_executor, mock_logger, predictor):
+        return IntelligentRouter(
+            registry=mock_registry,
+            reliable_executor=slow_executor,
+            logger=mock_logger,
+            similarity_threshold=0.50,
+            speculative_fallback=True,
+            confidence_predictor=predictor,
+        )
+
+    def test_predictor_matches_near_duplicates(self, predictor):
+        predictor.record("obscure quantum gardening techniques", 0.2)
+
+        assert predictor.predict("Obscure quantum gardening techniques?") == pytest.approx(0.2)
+        assert predictor.predict("the obscure quantum gardening techniques for beginners") == pytest.approx(0.2)
+        assert predictor.predict("kubernetes networking") is None
+
+    def test_predictor_evicts_oldest(self):
+        from app.routing.confidence_predictor import ConfidencePredictor
+        predictor = ConfidencePredictor(max_entries=2)
+        for query in ("alpha", "beta", "gamma"):
+            predictor.record(query, 0.1)
+
+        assert predictor.predict("alpha") is None
+        assert predictor.stats()["entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cold_query_runs_serially(self, speculative_router, calls):
+        result = await speculative_router.execute({"tool": "rag_search", "query": "obscure topic"})
+
+        assert result["data"] == "web result"
+        assert calls == ["rag_search", "web_search", "web_search:done"]
+        assert "speculation" not in result["metadata"]
+
+    @pytest.mark.asyncio
+    async def test_predicted_low_confidence_runs_web_search_concurrently(self, speculative_router, predictor, calls):
+        predictor.record("obscure topic", 0.2)
+
+        started = asyncio.get_running_loop().time()
+        result = await speculative_router.execute({"tool": "rag_search", "query": "obscure topic"})
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert result["data"] == "web result"
+        assert result["metadata"]["fallback_from"] == "rag_search"
+        assert result["metadata"]["speculation"]["used"] is True
+        assert result["metadata"]["speculation"]["saved_seconds"] > 0.05
+        assert elapsed < 0.18
+
+    @pytest.mark.asyncio
+    async def test_speculation_is_charged_and_skipped_once_tool_budget_is_spent(
+        self, speculative_router, predictor, calls, monkeypatch
+    ):
+        from app.infra.rate_limits import QuotaSubject, use_quota_subject
+
+        monkeypatch.setenv("TOOL_CALL_BUDGET", "1")
+        use_quota_subject(QuotaSubject(user_id="u1", role="developer"))
+        predictor.record("obscure topic", 0.2)
+
+        first = await speculative_router.execute({"tool": "rag_search", "query": "obscure topic"})
+        calls.clear()
+        second = await speculative_router.execute({"tool": "rag_search", "query": "obscure topic"})
+
+        assert first["metadata"]["speculation"]["used"] is True
+        assert second["data"] == "web result"
+        assert "speculation" not in second["metadata"]
+        assert calls == ["rag_search", "web_search", "web_search:done"]
+
+    @pytest.mark.asyncio
+    async def test_misprediction_cancels_web_search(self, speculative_router, predictor, calls):
+        predictor.record("well known topic", 0.2)
+
+        result = await speculative_router.execute({"tool": "rag_search", "query": "well known topic"})
+        await asyncio.sleep(0.15)
+
+        assert result["data"] == "rag result"
+        assert result["metadata"]["speculation"] == {
+            "launched": True,
+            "used": False,
+            "saved_seconds": 0.0,
+            "wasted_calls": 1,
+        }
+        assert "web_search:done" not in calls
+        assert predictor.predict("well known topic") > 0.5
+
+    @pytest.mark.asyncio
+    async def test_no_speculation_when_rag_search_is_cached(self, mock_registry, slow_executor, mock_logger, predictor, calls):
+        from app.cache.tool_cache import ToolResultCache
+
+        cache = ToolResultCache(ttls={"rag_search": 60})
+        rag_tool = mock_registry.get("rag_search")
+        key = cache.make_key("rag_search", "obscure topic", getattr(rag_tool, "index_version", None))
+        cache.set("rag_search", key, {"status": "success", "data": "rag result", "metadata": {"similarity": 0.2}})
+        predictor.record("obscure topic", 0.2)
+        router = IntelligentRouter(
+            registry=mock_registry,
+            reliable_executor=slow_executor,
+            logger=mock_logger,
+            similarity_threshold=0.50,
+            tool_cache=cache,
+            speculative_fallback=True,
+            confidence_predictor=predictor,
+        )
+
+        result = await router.execute({"tool": "rag_search", "query": "obscure topic"})
+
+        assert result["data"] == "web result"
+        assert "speculation" not in result["metadata"]
+        assert calls == ["web_search", "web_search:done"]
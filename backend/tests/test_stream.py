@@ -0,0 +1,185 @@
+"""
+tests/test_stream.py
+Unit tests for SSE run streaming, the run event bus and run persistence.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import app.api.stream as stream_module
+from app.infra.event_bus import InMemoryEventBus, get_event_bus
+from app.infra.run_persistence import RunEventWriter, TraceWriter
+
+
+def _event(run_id: str, seq: int, event_type: str, data: dict) -> dict:
+    return {
+        "_id": f"{run_id}-{seq}",
+        "run_id": run_id,
+        "seq": seq,
+        "event": event_type,
+        "data": data,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+@pytest.fixture
+def stream_db(monkeypatch, fake_db):
+    from app.memory.database import MongoDB
+
+    monkeypatch.setattr(MongoDB, "get_database", lambda: fake_db)
+    return fake_db
+
+
+@pytest.mark.asyncio
+async def test_memory_bus_delivers_only_to_run_subscribers():
+    bus = InMemoryEventBus()
+    async with await bus.subscribe("run-1") as subscription:
+        await bus.publish("run-2", {"id": "x"})
+        await bus.publish("run-1", {"id": "y"})
+
+        assert await subscription.get(timeout=1) == {"id": "y"}
+        assert await subscription.get(timeout=0.01) is None
+
+    assert bus.subscriber_count("run-1") == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_last_event_id(stream_db):
+    stream_db.run_events.docs = [
+        _event("run-1", 1, "status_change", {"status": "running"}),
+        _event("run-1", 2, "tool_start", {"step": 1}),
+        _event("run-1", 3, "status_change", {"status": "completed"}),
+    ]
+
+    chunks = [chunk async for chunk in stream_module._event_generator("run-1", "1")]
+
+    assert chunks[1].startswith("id: 2\nevent: tool_start")
+    assert chunks[2].startswith("id: 3\nevent: status_change")
+    assert len(chunks) == 3
+
+
+@pytest.mark.asyncio
+async def test_catch_up_pages_past_batch_size(stream_db, monkeypatch):
+    monkeypatch.setattr(stream_module, "_CATCHUP_BATCH", 2)
+    stream_db.run_events.docs = [_event("run-1", seq, "tool_start", {"step": seq}) for seq in range(1, 6)]
+    stream_db.run_events.docs.append(_event("run-1", 6, "status_change", {"status": "failed"}))
+
+    chunks = [chunk async for chunk in stream_module._event_generator("run-1")]
+
+    assert [chunk.split("\n")[0] for chunk in chunks[1:]] == [f"id: {seq}" for seq in range(1, 7)]
+
+
+@pytest.mark.asyncio
+async def test_event_writer_batches_and_allocates_seq_range(stream_db):
+    stream_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "event_seq": 1})
+    writer = RunEventWriter(stream_db, "run-1", flush_interval=60)
+
+    await writer.emit("status_change", {"status": "running"})
+    await writer.emit("planner_start", {})
+    assert stream_db.run_events.docs == []
+
+    await writer.emit("status_change", {"status": "completed"})
+
+    assert [doc["seq"] for doc in stream_db.run_events.docs] == [2, 3, 4]
+    assert [doc["event"] for doc in stream_db.run_events.docs] == ["status_change", "planner_start", "status_change"]
+    assert stream_db.traces.docs[0]["event_seq"] == 4
+
+
+@pytest.mark.asyncio
+async def test_event_writer_flushes_on_interval(stream_db):
+    stream_db.traces.docs.append({"_id": "t1", "request_id": "run-1", "event_seq": 0})
+    writer = RunEventWriter(stream_db, "run-1", flush_interval=0.01)
+
+    await writer.emit("tool_start", {"step": 1})
+    await asyncio.sleep(0.05)
+
+    assert [doc["seq"] for doc in stream_db.run_events.docs] == [1]
+
+
+@pytest.mark.asyncio
+async def test_trace_writer_sends_only_changed_fields(stream_db):
+    writer = TraceWriter(stream_db, "run-1")
+    updates = []
+    original_update = stream_db.traces.update_one
+
+    async def _update_one(query, update, upsert=False):
+        updates.append(update)
+        return await original_update(query, update, upsert=upsert)
+
+    stream_db.traces.update_one = _update_one
+
+    await writer.write({"status": "running", "goal": "g", "observations": [{"step": 1}]})
+    await writer.write({"status": "running", "goal": "g", "observations": [{"step": 1}, {"step": 2}]})
+    assert await writer.write({"status": "running", "goal": "g"}) is False
+
+    assert updates[1]["$push"] == {"observations": {"$each": [{"step": 2}]}}
+    assert "$set" not in updates[1]
+    assert len(updates) == 2
+    assert stream_db.traces.docs[0]["observations"] == [{"step": 1}, {"step": 2}]
+    assert stream_db.traces.docs[0]["request_id"] == "run-1"
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_live_events_without_polling(stream_db, monkeypatch):
+    bus = get_event_bus()
+    queries = []
+    original_find = stream_db.run_events.find
+
+    def _find(query=None, projection=None):
+        queries.append(query)
+        return original_find(query, projection)
+
+    monkeypatch.setattr(stream_db.run_events, "find", _find)
+
+    async def consume():
+        return [chunk async for chunk in stream_module._event_generator("run-live")]
+
+    consumer = asyncio.create_task(consume())
+    while bus.subscriber_count("run-live") == 0:
+        await asyncio.sleep(0)
+
+    await bus.publish("run-live", {"seq": 1, "event": "tool_start", "data": {"step": 1}})
+    await bus.publish("run-live", {"seq": 1, "event": "tool_start", "data": {"step": 1}})
+    await bus.publish("run-live", {"seq": 2, "event": "status_change", "data": {"status": "completed"}})
+    chunks = await asyncio.wait_for(consumer, timeout=2)
+
+    assert [chunk.split("\n")[0] for chunk in chunks[1:]] == ["id: 1", "id: 2"]
+    assert len(queries) == 1
+    assert queries[0] == {"run_id": "run-live", "seq": {"$gt": 0}}
+
+
+class _UnreachableBus:
+    async def subscribe(self, run_id):
+        raise ConnectionError("redis unreachable")
+
+
+class _BrokenSubscription:
+    async def get(self, timeout):
+        raise ConnectionError("connection lost")
+
+    async def close(self):
+        pass
+
+
+class _FlakyBus:
+    async def subscribe(self, run_id):
+        return _BrokenSubscription()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bus", [_UnreachableBus(), _FlakyBus()])
+async def test_stream_falls_back_to_polling_when_bus_fails(stream_db, monkeypatch, bus):
+    monkeypatch.setattr(stream_module, "get_event_bus", lambda: bus)
+    monkeypatch.setattr(stream_module, "_POLL_INTERVAL", 0.01)
+
+    async def consume():
+        return [chunk async for chunk in stream_module._event_generator("run-poll")]
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    stream_db.run_events.docs.append(_event("run-poll", 1, "status_change", {"status": "completed"}))
+    chunks = await asyncio.wait_for(consumer, timeout=2)
+
+    assert chunks[-1].split("\n")[0] == "id: 1"